@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Wikitext Parser Benchmark
+=========================
+
+Compares the single-pass tokenizer in ``parse_wikitext`` against the previous
+per-line multi-regex parser on a corpus built by repeating the Torah wikitext
+files until it reaches roughly the size of the whole Bible.
+
+Usage:
+    python benchmarks/bench_parse_wikitext.py [--scale 1 2 4 8] [--repeat 3]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from parse_wikitext import COLOR_TO_SOURCE, parse_wikitext_file
+
+TORAH_BOOKS = ["Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy"]
+
+
+def legacy_parse_wikitext_file(file_path):
+    """Per-line multi-regex parser used before the single-pass tokenizer"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    verses = []
+    current_chapter = None
+    for line in content.split('\n'):
+        line = line.strip()
+        chapter_match = re.match(r'^==\s*Chapter\s+(\d+)\s*==$', line)
+        if chapter_match:
+            current_chapter = chapter_match.group(1)
+            continue
+        verse_patterns = [
+            r'{{font\|size=smaller\|color=#0000FF\|(\d+)}}(.*?)(?={{font\|size=smaller\|color=#0000FF\|\d+}}|$)',
+            r'<small>{{font\|color=#0000FF\|(\d+)}}</small>(.*?)(?=<small>{{font\|color=#0000FF\|\d+}}</small>|$)'
+        ]
+        for pattern in verse_patterns:
+            for verse_num, verse_content in re.findall(pattern, line, re.DOTALL):
+                verse_content = verse_content.strip()
+                if not current_chapter or not verse_num or not verse_content:
+                    continue
+                color_segments = re.findall(r'{{font\|color=([^|]+)\|([^}]+)}}', verse_content)
+                full_text = ""
+                sources, colors, source_texts = [], [], {}
+                for color, text in color_segments:
+                    text = text.strip()
+                    if text:
+                        source = COLOR_TO_SOURCE.get(color, "UNKNOWN")
+                        sources.append(source)
+                        colors.append(color)
+                        full_text += text + " "
+                        source_texts.setdefault(source, []).append(text)
+                if full_text.strip():
+                    verse = {'chapter': current_chapter, 'verse': verse_num, 'source': sources,
+                             'text': full_text.strip(), 'color': colors, 'segments': len(sources)}
+                    for source in ["J", "E", "P", "D", "R", "UNKNOWN"]:
+                        verse[f'text_{source}'] = " ".join(source_texts.get(source, []))
+                    verses.append(verse)
+    return verses
+
+
+def build_corpus(directory, scale):
+    """Write one wikitext file holding the Torah repeated ``scale`` times"""
+    parts = []
+    for book in TORAH_BOOKS:
+        with open(os.path.join(ROOT, "wiki_markdown", f"{book}.wikitext"), encoding="utf-8") as f:
+            parts.append(f.read())
+    corpus_path = os.path.join(directory, f"corpus_x{scale}.wikitext")
+    with open(corpus_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts * scale))
+    return corpus_path
+
+
+def best_time(func, path, repeat):
+    """Return the best wall time over ``repeat`` runs and the verse count"""
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(func(path))
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Torah repetitions per corpus (about 5 gives a full Bible)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    print(f"{'scale':>5} {'MB':>6} {'verses':>8} {'legacy s':>9} {'single-pass s':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scale:
+            path = build_corpus(tmp, scale)
+            size_mb = os.path.getsize(path) / 1e6
+            legacy, legacy_count = best_time(legacy_parse_wikitext_file, path, args.repeat)
+            current, count = best_time(parse_wikitext_file, path, args.repeat)
+            if count != legacy_count:
+                raise SystemExit(f"[ERROR] Verse counts differ: {count} != {legacy_count}")
+            print(f"{scale:>5} {size_mb:>6.1f} {count:>8} {legacy:>9.3f} {current:>14.3f} {legacy / current:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark Suite
+========================
+
+Times every stage of the tool chain on synthetic corpora of increasing size:
+
+    parse     parse_wikitext_file over every book
+    write     write_book_outputs (all default formats) for every book
+    load      CSVDataLoader.load_all_books
+    patterns  MathematicalPatternEngine.analyze_all_patterns
+    network   CytoscapeDataGenerator.generate_network_data
+
+Results can be stored as a baseline and later runs compared against it; a
+stage that got slower than the baseline by more than the tolerance is
+reported as a regression and the script exits with status 1.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--books 5 20 66] [--stages parse write load]
+    python benchmarks/bench_pipeline.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baseline.json [--tolerance 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parse_wikitext import DEFAULT_FORMATS, parse_wikitext_file, write_book_outputs
+from synthetic_corpus import generate_corpus
+
+STAGES = ["parse", "write", "load", "patterns", "network"]
+
+
+def bench_parse(corpus):
+    verses = 0
+    for book_name in corpus["books"]:
+        verses += len(parse_wikitext_file(os.path.join(corpus["dir"], "wiki_markdown", f"{book_name}.wikitext")))
+    return verses
+
+
+def bench_write(corpus):
+    verses = 0
+    with tempfile.TemporaryDirectory() as out_dir:
+        for book_name in corpus["books"]:
+            book_verses = parse_wikitext_file(os.path.join(corpus["dir"], "wiki_markdown", f"{book_name}.wikitext"))
+            write_book_outputs(book_verses, book_name, os.path.join(out_dir, book_name),
+                               formats=DEFAULT_FORMATS)
+            verses += len(book_verses)
+    return verses
+
+
+def bench_load(corpus):
+    from csv_data_loader import CSVDataLoader
+    corpus["words"] = CSVDataLoader(os.path.join(corpus["dir"], "output")).load_all_books()
+    return len(corpus["words"])
+
+
+def bench_patterns(corpus):
+    from csv_data_loader import CSVDataLoader
+    from mathematical_pattern_engine import MathematicalPatternEngine
+    if "words" not in corpus:
+        corpus["words"] = CSVDataLoader(os.path.join(corpus["dir"], "output")).load_all_books()
+    return len(MathematicalPatternEngine(corpus["words"]).analyze_all_patterns())
+
+
+def bench_network(corpus):
+    from cytoscape_data_generator import CytoscapeDataGenerator
+    return len(CytoscapeDataGenerator(os.path.join(corpus["dir"], "output")).generate_network_data()["nodes"])
+
+
+STAGE_FUNCTIONS = {
+    "parse": bench_parse,
+    "write": bench_write,
+    "load": bench_load,
+    "patterns": bench_patterns,
+    "network": bench_network,
+}
+
+
+def time_stage(func, corpus, repeat):
+    """Return the best wall time over repeat runs and the item count of the last run"""
+    best = float("inf")
+    items = 0
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            items = func(corpus)
+            best = min(best, time.perf_counter() - start)
+    return best, items
+
+
+def run_benchmarks(book_counts, stages, repeat, chapters, verses_per_chapter, seed):
+    """Run the selected stages for each corpus size and return the results dict"""
+    results = {}
+    print(f"{'books':>5} {'stage':<9} {'seconds':>9} {'items':>9} {'items/s':>11}")
+    for books in book_counts:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            names = generate_corpus(corpus_dir, books, chapters, verses_per_chapter, seed)
+            corpus = {"dir": corpus_dir, "books": names}
+            for stage in stages:
+                try:
+                    seconds, items = time_stage(STAGE_FUNCTIONS[stage], corpus, repeat)
+                except ImportError as e:
+                    print(f"{books:>5} {stage:<9} skipped ({e})")
+                    continue
+                results[f"{stage}@{books}"] = {"stage": stage, "books": books,
+                                               "seconds": seconds, "items": items}
+                print(f"{books:>5} {stage:<9} {seconds:>9.3f} {items:>9} {items / seconds:>11.0f}")
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Print the change of each stage against the baseline and return the regressions"""
+    regressions = []
+    print(f"\n{'benchmark':<16} {'baseline s':>10} {'current s':>10} {'change':>8}")
+    for key, result in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            print(f"{key:<16} {'-':>10} {result['seconds']:>10.3f} {'new':>8}")
+            continue
+        change = result["seconds"] / previous["seconds"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<16} {previous['seconds']:>10.3f} {result['seconds']:>10.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic corpora")
+    parser.add_argument("--books", type=int, nargs="+", default=[5, 20, 66],
+                        help="Corpus sizes in books (66 is the whole Bible)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                        help="Stages to run (default: all)")
+    parser.add_argument("--chapters", type=int, default=18, help="Chapters per synthetic book")
+    parser.add_argument("--verses", type=int, default=26, help="Verses per synthetic chapter")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results with a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline before failing (default: 0.25)")
+    args = parser.parse_args()
+
+    # The loaders log every book at INFO level
+    logging.disable(logging.INFO)
+
+    results = run_benchmarks(args.books, args.stages, args.repeat, args.chapters, args.verses, args.seed)
+
+    if args.save_baseline:
+        baseline = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": {"chapters": args.chapters, "verses": args.verses, "seed": args.seed},
+            "results": results,
+        }
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n[SUCCESS] Baseline written: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != {"chapters": args.chapters, "verses": args.verses, "seed": args.seed}:
+            print("[WARN] Baseline was recorded with a different corpus shape")
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[ERROR] {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n[SUCCESS] No regressions")
+
+
+if __name__ == "__main__":
+    main()
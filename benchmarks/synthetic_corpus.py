@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Synthetic Corpus Generator
+==========================
+
+Writes deterministic wikitext books in the same markup as the Wikisource
+Documentary Hypothesis pages, plus the enhanced CSVs the rest of the tool
+chain loads, so every stage can be measured at the size of the whole
+66-book Bible and beyond before real books are onboarded.
+
+Books alternate between the two verse-marker dialects and draw their words
+from a fixed KJV-style vocabulary that includes the proper names and places
+the network generator looks for. The default shape (18 chapters of 26
+verses) gives about 31,000 verses for 66 books, close to the real Bible.
+
+Usage:
+    python benchmarks/synthetic_corpus.py OUT_DIR [--books 66] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from parse_wikitext import COLOR_TO_SOURCE, parse_wikitext_file, write_csv_output
+
+BIBLE_BOOKS = [
+    "Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy", "Joshua", "Judges", "Ruth",
+    "1_Samuel", "2_Samuel", "1_Kings", "2_Kings", "1_Chronicles", "2_Chronicles", "Ezra",
+    "Nehemiah", "Esther", "Job", "Psalms", "Proverbs", "Ecclesiastes", "Song_of_Solomon",
+    "Isaiah", "Jeremiah", "Lamentations", "Ezekiel", "Daniel", "Hosea", "Joel", "Amos",
+    "Obadiah", "Jonah", "Micah", "Nahum", "Habakkuk", "Zephaniah", "Haggai", "Zechariah",
+    "Malachi", "Matthew", "Mark", "Luke", "John", "Acts", "Romans", "1_Corinthians",
+    "2_Corinthians", "Galatians", "Ephesians", "Philippians", "Colossians",
+    "1_Thessalonians", "2_Thessalonians", "1_Timothy", "2_Timothy", "Titus", "Philemon",
+    "Hebrews", "James", "1_Peter", "2_Peter", "1_John", "2_John", "3_John", "Jude",
+    "Revelation",
+]
+
+VOCABULARY = (
+    "and the of that he unto in shall for his a they be is them not him it with all thou "
+    "thy was which my me said but ye their have will thee from as are when this out were "
+    "upon by you there up then came land house day son people children father went men "
+    "hand before earth made even into king God LORD Israel Moses Aaron Abraham Isaac Jacob "
+    "Joseph Noah Adam Eve Egypt Canaan Jordan Sinai Bethel Hebron Eden east west north "
+    "south toward heaven water light darkness seed blood altar covenant priest offering "
+    "tabernacle brought gave called spake commanded saying behold also every name seven "
+    "forty twelve thousand hundred sons daughters wife brethren servant lord cattle sheep"
+).split()
+
+PUNCTUATION = [",", ",", ";", ":", "."]
+
+# Segment colours: every source the parser knows, weighted towards the main ones
+SEGMENT_COLORS = ["#888800"] * 4 + ["#000088"] * 3 + ["#008888"] * 2 + ["#880000", "#000000", "#888888"]
+assert all(color in COLOR_TO_SOURCE for color in SEGMENT_COLORS)
+
+
+def book_names(count):
+    """Return count book names, repeating the canon with a suffix beyond 66"""
+    return [
+        BIBLE_BOOKS[i % len(BIBLE_BOOKS)] + (f"_{i // len(BIBLE_BOOKS) + 1}" if i >= len(BIBLE_BOOKS) else "")
+        for i in range(count)
+    ]
+
+
+def verse_marker(dialect, verse_num):
+    """Verse number template in one of the two wikitext dialects"""
+    if dialect == 1:
+        return f"{{{{font|size=smaller|color=#0000FF|{verse_num}}}}}"
+    return f"<small>{{{{font|color=#0000FF|{verse_num}}}}}</small>"
+
+
+def random_sentence(rng, min_words, max_words):
+    """A capitalised run of vocabulary words with light punctuation"""
+    words = rng.choices(VOCABULARY, k=rng.randint(min_words, max_words))
+    words[0] = words[0][0].upper() + words[0][1:]
+    return " ".join(words) + rng.choice(PUNCTUATION)
+
+
+def generate_book_wikitext(book_name, chapters=18, verses_per_chapter=26, seed=0, dialect=1):
+    """Return the wikitext of one synthetic book.
+
+    About a quarter of the verses are split into two or three segments of
+    different colours, so multi-source handling is exercised as well.
+    """
+    rng = random.Random(f"{seed}:{book_name}")
+    lines = [f"Synthetic text of {book_name} with sources highlighted.", ""]
+    for chapter in range(1, chapters + 1):
+        lines.append(f"==Chapter {chapter}==")
+        lines.append("")
+        for verse_num in range(1, verses_per_chapter + 1):
+            segment_count = 1 if rng.random() < 0.75 else rng.randint(2, 3)
+            segments = "".join(
+                f"{{{{font|color={rng.choice(SEGMENT_COLORS)}| {random_sentence(rng, 4, 14)}}}}}"
+                for _ in range(segment_count)
+            )
+            lines.append(verse_marker(dialect, verse_num) + segments)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_corpus(out_dir, books=66, chapters=18, verses_per_chapter=26, seed=0, write_csv=True):
+    """Write a synthetic corpus under out_dir and return its book names.
+
+    Wikitext goes to out_dir/wiki_markdown/<Book>.wikitext. With write_csv,
+    each book is also parsed and written to out_dir/output/<Book>/<Book>.csv
+    by the real CSV writer, so the loaders see exactly what the pipeline
+    produces.
+    """
+    names = book_names(books)
+    wiki_dir = os.path.join(out_dir, "wiki_markdown")
+    os.makedirs(wiki_dir, exist_ok=True)
+    for index, book_name in enumerate(names):
+        wikitext_path = os.path.join(wiki_dir, f"{book_name}.wikitext")
+        with open(wikitext_path, "w", encoding="utf-8") as f:
+            f.write(generate_book_wikitext(book_name, chapters, verses_per_chapter, seed,
+                                           dialect=1 if index % 2 == 0 else 2))
+        if write_csv:
+            verses = parse_wikitext_file(wikitext_path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_csv_output(verses, book_name, os.path.join(out_dir, "output", book_name))
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic wikitext and CSV corpus")
+    parser.add_argument("out_dir", help="Directory to create wiki_markdown/ and output/ in")
+    parser.add_argument("--books", type=int, default=len(BIBLE_BOOKS),
+                        help="Number of books (66 is the whole Bible; more repeats the canon)")
+    parser.add_argument("--chapters", type=int, default=18, help="Chapters per book")
+    parser.add_argument("--verses", type=int, default=26, help="Verses per chapter")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--no-csv", action="store_true", help="Only write the wikitext files")
+    args = parser.parse_args()
+
+    names = generate_corpus(args.out_dir, args.books, args.chapters, args.verses, args.seed,
+                            write_csv=not args.no_csv)
+    print(f"[SUCCESS] Wrote {len(names)} books ({len(names) * args.chapters * args.verses} verses) "
+          f"to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
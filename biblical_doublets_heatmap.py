@@ -11,23 +11,28 @@ Author: KJV Sources Project
 License: MIT
 """
 
-import json
+import sys
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import seaborn as sns
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
-import re
+from typing import List, Tuple
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.doublet_index import DoubletIndex, get_doublet_index
+from kjv_sources.references import parse_reference
+from kjv_sources.verse_index import get_verse_index
+
 class BiblicalDoubletsHeatMap:
     """Creates heat map visualizations of biblical doublets"""
     
     def __init__(self, doublets_file: str = "doublets_data.json"):
         self.doublets_file = Path(doublets_file)
-        self.doublets_data = self.load_doublets_data()
+        self.doublet_index = self.load_doublet_index()
+        self.doublets_data = self.doublet_index.data
         
         # Biblical books in canonical order
         self.biblical_books = [
@@ -67,73 +72,35 @@ class BiblicalDoubletsHeatMap:
             "R": "#880000",  # Maroon Red - Redactor
         }
     
-    def load_doublets_data(self) -> Dict[str, Any]:
-        """Load doublets data from JSON file"""
+    def load_doublet_index(self) -> DoubletIndex:
+        """Load doublets data from JSON file, sharing its index with other users of the file"""
         if not self.doublets_file.exists():
             raise FileNotFoundError(f"Doublets file not found: {self.doublets_file}")
         
-        with open(self.doublets_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_doublet_index(str(self.doublets_file))
     
     def parse_biblical_reference(self, reference: str) -> Tuple[str, int, int, int, int]:
         """
         Parse biblical reference into components
         Returns: (book, start_chapter, start_verse, end_chapter, end_verse)
         """
-        # Handle references like "Genesis 1:1-2:3" or "Genesis 12:10-20"
-        pattern = r'([A-Za-z0-9\s]+)\s+(\d+):(\d+)(?:-(\d+):(\d+))?'
-        match = re.match(pattern, reference.strip())
-        
-        if not match:
-            # Fallback for simpler references
-            simple_pattern = r'([A-Za-z0-9\s]+)\s+(\d+):(\d+)'
-            simple_match = re.match(simple_pattern, reference.strip())
-            if simple_match:
-                book, chapter, verse = simple_match.groups()
-                return book.strip(), int(chapter), int(verse), int(chapter), int(verse)
-            else:
-                print(f"Warning: Could not parse reference: {reference}")
-                return "Unknown", 1, 1, 1, 1
-        
-        book = match.group(1).strip()
-        start_chapter = int(match.group(2))
-        start_verse = int(match.group(3))
-        
-        # Handle end chapter and verse
-        if match.group(4) and match.group(5):
-            end_chapter = int(match.group(4))
-            end_verse = int(match.group(5))
-        else:
-            end_chapter = start_chapter
-            end_verse = start_verse
-        
-        return book, start_chapter, start_verse, end_chapter, end_verse
+        try:
+            span = parse_reference(reference).span()
+        except ValueError:
+            print(f"Warning: Could not parse reference: {reference}")
+            return "Unknown", 1, 1, 1, 1
+        return span.book, span.chapter_start, span.verse_start, span.chapter_end, span.verse_end
     
     def calculate_verse_position(self, book: str, chapter: int, verse: int) -> int:
         """
-        Calculate relative position of verse within the Torah
+        Calculate the exact 1-based position of a verse within the Torah
         This creates a linear coordinate system across all five books
         """
-        # Approximate verse counts for positioning (based on KJV)
-        book_verse_counts = {
-            "Genesis": 1533,
-            "Exodus": 1213, 
-            "Leviticus": 859,
-            "Numbers": 1288,
-            "Deuteronomy": 959
-        }
-        
-        # Calculate cumulative position
-        position = 0
-        for torah_book in self.torah_books:
-            if torah_book == book:
-                # Rough estimate: 30 verses per chapter average
-                position += (chapter - 1) * 30 + verse
-                break
-            else:
-                position += book_verse_counts.get(torah_book, 1000)
-        
-        return position
+        verse_id = get_verse_index().find(book, chapter, verse)
+        if verse_id is None:
+            print(f"Warning: {book} {chapter}:{verse} is not a Torah verse")
+            return 0
+        return verse_id + 1
     
     def create_doublets_matrix(self) -> pd.DataFrame:
         """Create a matrix representation of doublets for heat map"""
@@ -150,12 +117,15 @@ class BiblicalDoubletsHeatMap:
                 source = passage.get("source", "Unknown")
                 book = passage.get("book", "Unknown")
                 
-                # Parse the reference
-                parsed_book, start_ch, start_v, end_ch, end_v = self.parse_biblical_reference(reference)
-                
-                # Calculate position
-                start_pos = self.calculate_verse_position(parsed_book, start_ch, start_v)
-                end_pos = self.calculate_verse_position(parsed_book, end_ch, end_v)
+                # Exact verse range from the doublet index, else parse the reference
+                verses = self.doublet_index.passage_ranges[doublet_id][i]
+                if verses:
+                    parsed_book = book
+                    start_pos, end_pos = verses.start + 1, verses.stop
+                else:
+                    parsed_book, start_ch, start_v, end_ch, end_v = self.parse_biblical_reference(reference)
+                    start_pos = self.calculate_verse_position(parsed_book, start_ch, start_v)
+                    end_pos = self.calculate_verse_position(parsed_book, end_ch, end_v)
                 
                 # Add to positions list
                 doublet_positions.append({
@@ -223,7 +193,7 @@ class BiblicalDoubletsHeatMap:
         ax.set_ylim(-0.5, len(self.torah_books) - 0.5)
         ax.set_yticks(range(len(self.torah_books)))
         ax.set_yticklabels(self.torah_books)
-        ax.set_xlabel('Position in Torah (Approximate)', fontsize=14)
+        ax.set_xlabel('Position in Torah (verse)', fontsize=14)
         ax.set_ylabel('Biblical Books', fontsize=14)
         ax.set_title('Biblical Doublets - Bird\'s Eye View\nDistribution of Repeated Passages in the Torah', 
                     fontsize=16, fontweight='bold', pad=20)
@@ -322,7 +292,7 @@ class BiblicalDoubletsHeatMap:
         ax.set_ylim(-0.5, len(self.torah_books) - 0.5)
         ax.set_yticks(range(len(self.torah_books)))
         ax.set_yticklabels(self.torah_books)
-        ax.set_xlabel('Position in Torah (Approximate)', fontsize=12)
+        ax.set_xlabel('Position in Torah (verse)', fontsize=12)
         ax.set_title('Doublets by Documentary Source', fontsize=14, fontweight='bold')
         ax.grid(True, alpha=0.3, axis='x')
         
@@ -11,25 +11,38 @@ License: MIT
 """
 
 import os
-import csv
+import sys
 import json
 import re
-from typing import List, Dict, Any, Optional
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import logging
 
-from word_level_parser import WordData
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.corpus import Corpus, discover_verse_tables, get_corpus
+from kjv_sources.word_export import EXPORT_CHUNK_SIZE, iter_chunks, word_export_path, write_words
+from kjv_sources.word_store import (
+    CAPITALIZED, NUMBER, PROPER_NAME, WordStore, WordView, mask_sources, source_mask
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sources with a pct_<source> column in the verse corpus
+PERCENTAGE_SOURCES = ['J', 'E', 'P', 'D', 'R', 'UNKNOWN']
+
+# Words compared ahead when a word could continue two segments of a verse
+SEGMENT_LOOKAHEAD = 8
+
 class CSVDataLoader:
     """Loader for converting CSV data to word-level data"""
     
     def __init__(self, output_dir: str = "output"):
         self.output_dir = output_dir
-        self.word_data: List[WordData] = []
         self.global_position = 0
         
         # Common proper names in the Bible
@@ -47,138 +60,234 @@ class CSVDataLoader:
             'Thomas', 'Andrew', 'Simon', 'Judas', 'Mary', 'Elizabeth', 'Anna',
             'Zacharias', 'John', 'Herod', 'Pilate', 'Caiaphas', 'Annas', 'Gamaliel'
         }
-    
-    def load_all_books(self) -> List[WordData]:
-        """Load data from all available CSV files"""
-        logger.info("Loading data from all available CSV files...")
         
-        # Get all book directories
-        book_dirs = [d for d in os.listdir(self.output_dir) 
-                    if os.path.isdir(os.path.join(self.output_dir, d))]
+        # Words as columns: a WordStore indexes to WordView objects shaped like WordData
+        self.word_data = WordStore(is_proper_name=self.proper_names.__contains__)
+    
+    def load_all_books(self, jobs: int = 1) -> WordStore:
+        """Load data from every book of the shared verse corpus, in a process pool when jobs > 1"""
+        logger.info("Loading data from all available verse tables...")
         
-        for book_dir in sorted(book_dirs):
-            book_path = os.path.join(self.output_dir, book_dir)
-            csv_files = [f for f in os.listdir(book_path) if f.endswith('.csv')]
+        if jobs > 1:
+            # Workers read their own book tables, so the corpus is not loaded here
+            self.load_books_parallel(discover_verse_tables(self.output_dir), jobs)
+        else:
+            corpus = get_corpus(self.output_dir)
             
-            if csv_files:
-                # Use the latest CSV file
-                latest_csv = sorted(csv_files)[-1]
-                csv_path = os.path.join(book_path, latest_csv)
-                logger.info(f"Loading {book_dir} from {latest_csv}")
-                
-                self.load_book_csv(csv_path, book_dir)
+            # Books in directory-name order, so global positions match earlier releases
+            for book_name in sorted(corpus.books):
+                logger.info(f"Loading {book_name} from {corpus.table_paths[book_name]}")
+                self.load_corpus_book(corpus, book_name)
         
         logger.info(f"Loaded {len(self.word_data)} words total")
         return self.word_data
     
-    def load_book_csv(self, csv_path: str, book_name: str) -> List[WordData]:
-        """Load data from a single book CSV file"""
+    def load_books_parallel(self, tables: Dict[str, str], jobs: int) -> None:
+        """Tokenize books in worker processes, then append them in directory-name order.
+
+        Appending a book numbers its positions from the prefix sums of the
+        verse word counts before it, so the result equals a serial load for
+        any number of jobs.
+        """
+        book_names = sorted(tables)
+        logger.info(f"Tokenizing {len(book_names)} books with {jobs} worker processes")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            book_stores = list(executor.map(
+                tokenize_book_table,
+                [self.output_dir] * len(book_names),
+                book_names,
+                [tables[book_name] for book_name in book_names],
+            ))
+        
+        for book_store in book_stores:
+            self.word_data.extend(book_store)
+            self.global_position += len(book_store)
+    
+    def load_book_csv(self, csv_path: str, book_name: str) -> List[WordView]:
+        """Load data from a single book CSV (or Parquet) verse table"""
         logger.info(f"Loading {book_name} from {csv_path}")
         
         if not os.path.exists(csv_path):
             logger.error(f"CSV file not found: {csv_path}")
             return []
         
-        book_words = []
-        
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                verse_words = self.process_verse(row, book_name)
-                book_words.extend(verse_words)
+        return self.load_corpus_book(Corpus({book_name: csv_path}), book_name)
+    
+    def load_corpus_book(self, corpus: Corpus, book_name: str) -> List[WordView]:
+        """Load one book of a verse corpus.
+
+        Sources, spans and percentages are already parsed by the corpus, so
+        no field is re-parsed here.
+        """
+        start = len(self.word_data)
+        for row_number in corpus.indices(book_name):
+            row = corpus.row(row_number)
+            row['source_percentages'] = corpus.percentages(row_number)
+            self.add_verse_words(row, book_name)
         
-        self.word_data.extend(book_words)
-        logger.info(f"Loaded {len(book_words)} words from {book_name}")
-        return book_words
+        logger.info(f"Loaded {len(self.word_data) - start} words from {book_name}")
+        return self.word_data[start:]
     
-    def process_verse(self, row: Dict[str, str], book_name: str) -> List[WordData]:
+    def process_verse(self, row: Dict[str, Any], book_name: str) -> List[WordView]:
         """Process a single verse row into word-level data"""
-        verse_words = []
-        
+        start = len(self.word_data)
+        self.add_verse_words(row, book_name)
+        return self.word_data[start:]
+    
+    def add_verse_words(self, row: Dict[str, Any], book_name: str) -> int:
+        """Append the words of a verse row to the word store; returns the number added"""
         # Extract verse information
         chapter = int(row['chapter'])
         verse = int(row['verse'])
-        verse_id = row['verse_id']
-        canonical_ref = row['canonical_reference']
         full_text = row['full_text']
         text_clean = row['text_clean']
         
-        # Parse sources
-        sources = row['sources'].split(';') if row['sources'] else []
-        source_percentages = self.parse_source_percentages(row['source_percentages'])
-        
-        # Get source-specific texts
-        text_j = row.get('text_J', '')
-        text_e = row.get('text_E', '')
-        text_p = row.get('text_P', '')
-        text_r = row.get('text_R', '')
+        # Parse sources (CSV rows hold strings, corpus rows native values)
+        sources = row['sources']
+        if isinstance(sources, str):
+            sources = sources.split(';') if sources else []
+        source_percentages = row['source_percentages']
+        if not isinstance(source_percentages, dict):
+            source_percentages = self.parse_source_percentages(source_percentages)
         
         # Split text into words
         words = text_clean.split()
         
+        # One source bitmask per word, from the segment spans when the file
+        # has them, else from the per-source texts; both are linear passes
+        spans = self.parse_source_spans(row.get('source_boundaries', row.get('source_spans')))
+        if spans:
+            word_masks = self.word_masks_from_spans(full_text, spans)
+        else:
+            word_masks = self.word_masks_from_source_texts(words, sources, row)
+        
+        # Verse attributes are stored once and shared by its words
+        store = self.word_data
+        
+        verse_row = store.add_verse(book_name, chapter, verse, row['verse_id'], row['canonical_reference'],
+                                    len(words), source_percentages)
+        added = 0
+        
         for word_pos, word in enumerate(words):
             # Clean the word
             clean_word = re.sub(r'[^\w\s]', '', word)
             if not clean_word:
                 continue
             
-            # Determine source attribution for this word
-            word_sources = self.determine_word_sources(
-                word, word_pos, words, sources, text_j, text_e, text_p, text_r
-            )
-            
-            # Create WordData object
-            word_data = WordData(
-                word=clean_word,
-                position_global=self.global_position + 1,
+            store.add_word(
+                clean_word,
+                verse_row,
+                position_global=0,
                 position_in_verse=word_pos + 1,
-                position_in_chapter=len(verse_words) + 1,  # Approximate
-                position_in_book=len(self.word_data) + 1,  # Approximate
-                book=book_name,
-                chapter=chapter,
-                verse=verse,
-                verse_id=verse_id,
-                canonical_reference=canonical_ref,
-                word_length=len(clean_word),
-                is_capitalized=clean_word[0].isupper() if clean_word else False,
-                is_number=clean_word.isdigit(),
-                is_proper_name=clean_word in self.proper_names,
-                source_attribution=word_sources,
-                mathematical_properties={
-                    'source_percentages': source_percentages,
-                    'verse_word_count': len(words),
-                    'is_first_word': word_pos == 0,
-                    'is_last_word': word_pos == len(words) - 1
-                }
+                position_in_chapter=0,
+                position_in_book=0,
+                sources_mask=word_masks[word_pos]
             )
             
-            verse_words.append(word_data)
-            self.global_position += 1
+            added += 1
         
-        return verse_words
+        # Global, book and chapter positions follow from the word counts of the verses before
+        store.number_positions(verse_row)
+        self.global_position += added
+        return added
     
-    def determine_word_sources(self, word: str, word_pos: int, all_words: List[str], 
-                             sources: List[str], text_j: str, text_e: str, 
-                             text_p: str, text_r: str) -> List[str]:
-        """Determine which sources contributed to a specific word"""
-        word_sources = []
+    def parse_source_spans(self, value: Any) -> List[Tuple[int, int, str]]:
+        """Parse a verse's segment spans into (start, end, source) tuples.
+
+        CSV files store them as "0:16:P:#888800;17:30:J:#000088" and corpus
+        rows as (start, end, source, color) tuples. Files written before spans
+        were recorded hold "boundary_N" placeholders or "none", which give an
+        empty list.
+        """
+        if not value:
+            return []
+        if isinstance(value, str):
+            spans = []
+            for part in value.split(';'):
+                fields = part.split(':')
+                if len(fields) != 4 or not fields[0].isdigit():
+                    return []
+                spans.append((int(fields[0]), int(fields[1]), fields[2]))
+            return spans
+        return [(start, end, source) for start, end, source, _ in value]
+    
+    def word_masks_from_spans(self, full_text: str, spans: List[Tuple[int, int, str]]) -> List[int]:
+        """Source bitmask of each whitespace-separated word of full_text, from its segment's source.
+
+        Spans are sorted and words are visited in order, so this is a single
+        linear pass over both. Words outside every span get 0.
+        """
+        word_masks = []
+        span_index = 0
+        for match in re.finditer(r'\S+', full_text):
+            start = match.start()
+            while span_index < len(spans) and spans[span_index][1] <= start:
+                span_index += 1
+            if span_index < len(spans) and spans[span_index][0] <= start:
+                word_masks.append(source_mask((spans[span_index][2],)))
+            else:
+                word_masks.append(0)
+        return word_masks
+    
+    def word_masks_from_source_texts(self, words: List[str], sources: List[str], row: Dict[str, Any]) -> List[int]:
+        """Source bitmask of each word for files without segment spans.
+
+        sources is the verse's segment sequence (e.g. P;J;R;J) and each
+        text_<source> holds that source's segments joined by spaces, so the
+        verse words are a merge of the per-source word lists. Walking the
+        segment sequence and the source word lists together in one pass
+        recovers each word's segment. Words that match no source, as in
+        hand-edited files, get the verse's combined mask.
+        """
+        verse_mask = source_mask(sources)
+        if len(set(sources)) <= 1:
+            return [verse_mask] * len(words)
         
-        # Simple heuristic: check if word appears in source-specific texts
-        if text_j and word.lower() in text_j.lower():
-            word_sources.append('J')
-        if text_e and word.lower() in text_e.lower():
-            word_sources.append('E')
-        if text_p and word.lower() in text_p.lower():
-            word_sources.append('P')
-        if text_r and word.lower() in text_r.lower():
-            word_sources.append('R')
+        source_words = {source: (row.get(f'text_{source}') or '').split() for source in sources}
+        next_word = dict.fromkeys(source_words, 0)
+        masks = {source: source_mask((source,)) for source in source_words}
         
-        # If no specific sources found, use the general sources
-        if not word_sources and sources:
-            word_sources = sources
+        def matches(source: str, word: str) -> bool:
+            position = next_word[source]
+            return position < len(source_words[source]) and source_words[source][position] == word
         
-        return word_sources
+        def run_length(source: str, word_index: int) -> int:
+            """Words from word_index on that continue source's word list (bounded)"""
+            position = next_word[source]
+            source_list = source_words[source]
+            length = 0
+            while (length < SEGMENT_LOOKAHEAD and word_index + length < len(words)
+                   and position + length < len(source_list)
+                   and words[word_index + length] == source_list[position + length]):
+                length += 1
+            return length
+        
+        word_masks = []
+        segment = 0
+        for word_index, word in enumerate(words):
+            # Stay in the current segment, else move on to the next one; when
+            # both fit (a repeated source whose later segment starts with the
+            # same word), the longer continuing run decides
+            current = sources[segment]
+            following = sources[segment + 1] if segment + 1 < len(sources) else None
+            stay = matches(current, word)
+            advance = following is not None and following != current and matches(following, word)
+            if stay and advance and run_length(following, word_index) > run_length(current, word_index):
+                stay = False
+            if stay:
+                source = current
+            elif advance:
+                segment += 1
+                source = following
+            else:
+                source = next((candidate for candidate in source_words if matches(candidate, word)), None)
+            
+            if source is None:
+                word_masks.append(verse_mask)
+            else:
+                next_word[source] += 1
+                word_masks.append(masks[source])
+        return word_masks
     
     def parse_source_percentages(self, percentages_str: str) -> Dict[str, float]:
         """Parse source percentages string into dictionary"""
@@ -202,12 +311,13 @@ class CSVDataLoader:
         if not self.word_data:
             return {}
         
+        store = self.word_data
         stats = {
-            'total_words': len(self.word_data),
-            'total_verses': len(set(word.verse_id for word in self.word_data)),
-            'total_chapters': len(set(f"{word.book}_{word.chapter}" for word in self.word_data)),
-            'total_books': len(set(word.book for word in self.word_data)),
-            'books': list(set(word.book for word in self.word_data)),
+            'total_words': len(store),
+            'total_verses': len(set(store.verse_ids)),
+            'total_chapters': len(set(zip(store.verse_books, store.verse_chapters))),
+            'total_books': len(store.books),
+            'books': list(store.books),
             'word_length_distribution': {},
             'source_distribution': {},
             'proper_names': [],
@@ -215,75 +325,85 @@ class CSVDataLoader:
             'numeric_words': []
         }
         
-        # Analyze word properties
-        for word in self.word_data:
-            # Word length distribution
-            length = word.word_length
-            stats['word_length_distribution'][length] = stats['word_length_distribution'].get(length, 0) + 1
+        # Word properties are per vocabulary entry: count ids once, then expand
+        word_counts = Counter(store.word_ids)
+        for word_id, count in word_counts.items():
+            word = store.vocab[word_id]
+            flags = store.vocab_flags[word_id]
             
-            # Source distribution
-            for source in word.source_attribution:
-                stats['source_distribution'][source] = stats['source_distribution'].get(source, 0) + 1
+            # Word length distribution
+            length = len(word)
+            stats['word_length_distribution'][length] = stats['word_length_distribution'].get(length, 0) + count
             
             # Collect special words
-            if word.is_proper_name:
-                stats['proper_names'].append(word.word)
-            if word.is_capitalized:
-                stats['capitalized_words'].append(word.word)
-            if word.is_number:
-                stats['numeric_words'].append(word.word)
+            if flags & PROPER_NAME:
+                stats['proper_names'].append(word)
+            if flags & CAPITALIZED:
+                stats['capitalized_words'].append(word)
+            if flags & NUMBER:
+                stats['numeric_words'].append(word)
         
-        # Remove duplicates
-        stats['proper_names'] = list(set(stats['proper_names']))
-        stats['capitalized_words'] = list(set(stats['capitalized_words']))
-        stats['numeric_words'] = list(set(stats['numeric_words']))
+        # Source distribution, from the per-word source bitmasks
+        for mask, count in Counter(store.source_masks).items():
+            for source in mask_sources(mask):
+                stats['source_distribution'][source] = stats['source_distribution'].get(source, 0) + count
         
         return stats
     
     def save_word_data(self, output_file: str = "word_data.json"):
-        """Save word data to JSON file"""
+        """Save word data to a JSON document, one word per line.
+
+        The words are serialized a chunk at a time instead of building the
+        whole document in memory.
+        """
         logger.info(f"Saving word data to {output_file}")
         
-        data = {
-            'metadata': {
-                'total_words': len(self.word_data),
-                'books_loaded': list(set(word.book for word in self.word_data)),
-                'version': '1.0.0'
-            },
-            'words': [
-                {
-                    'word': word.word,
-                    'position_global': word.position_global,
-                    'position_in_verse': word.position_in_verse,
-                    'position_in_chapter': word.position_in_chapter,
-                    'position_in_book': word.position_in_book,
-                    'book': word.book,
-                    'chapter': word.chapter,
-                    'verse': word.verse,
-                    'verse_id': word.verse_id,
-                    'canonical_reference': word.canonical_reference,
-                    'word_length': word.word_length,
-                    'is_capitalized': word.is_capitalized,
-                    'is_number': word.is_number,
-                    'is_proper_name': word.is_proper_name,
-                    'source_attribution': word.source_attribution,
-                    'mathematical_properties': word.mathematical_properties
-                }
-                for word in self.word_data
-            ]
+        metadata = {
+            'total_words': len(self.word_data),
+            'books_loaded': list(self.word_data.books),
+            'version': '1.0.0'
         }
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write('{\n  "metadata": ' + json.dumps(metadata, ensure_ascii=False) + ',\n  "words": [')
+            separator = '\n    '
+            for chunk in iter_chunks(self.word_data, EXPORT_CHUNK_SIZE):
+                f.write(separator + ',\n    '.join(json.dumps(word.to_dict(), ensure_ascii=False) for word in chunk))
+                separator = ',\n    '
+            f.write('\n  ]\n}\n')
         
         logger.info(f"Saved {len(self.word_data)} words to {output_file}")
+    
+    def export_word_data(self, output_file: Optional[str] = None, format: Optional[str] = None,
+                         chunk_size: int = EXPORT_CHUNK_SIZE) -> str:
+        """Stream word data to an NDJSON or Parquet export (format from the extension by default)"""
+        output_file = output_file or word_export_path(self.output_dir)
+        logger.info(f"Exporting word data to {output_file}")
+        count = write_words(self.word_data, output_file, format=format, chunk_size=chunk_size)
+        logger.info(f"Exported {count} words to {output_file}")
+        return output_file
+
+def tokenize_book_table(output_dir: str, book_name: str, table_path: str) -> WordStore:
+    """Tokenize one book's verse table in a fresh loader (process pool worker)"""
+    loader = CSVDataLoader(output_dir)
+    loader.load_corpus_book(Corpus({book_name: table_path}), book_name)
+    return loader.word_data
 
 def main():
     """Main function to load CSV data"""
+    parser = argparse.ArgumentParser(description="Load the verse tables into word-level data")
+    parser.add_argument("--output", default="word_data.json",
+                        help="Word data file; .ndjson/.jsonl or .parquet stream a chunked export")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes (default: 1, serial)")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    
     loader = CSVDataLoader()
     
     # Load all books
-    word_data = loader.load_all_books()
+    word_data = loader.load_all_books(jobs=args.jobs)
     
     if word_data:
         # Get statistics
@@ -296,8 +416,11 @@ def main():
         logger.info(f"  Books: {', '.join(stats['books'])}")
         logger.info(f"  Source distribution: {stats['source_distribution']}")
         
-        # Save to JSON
-        loader.save_word_data()
+        # Save to JSON, or stream to NDJSON / Parquet
+        if args.output.endswith('.json'):
+            loader.save_word_data(args.output)
+        else:
+            loader.export_word_data(args.output)
         
         return word_data
     else:
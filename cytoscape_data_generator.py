@@ -10,14 +10,17 @@ Author: KJV Sources Project
 License: MIT
 """
 
+import sys
 import json
 import re
-import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Any, Set, Tuple
 from collections import defaultdict, Counter
 import logging
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.corpus import Corpus, get_corpus
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -185,12 +188,17 @@ class CytoscapeDataGenerator:
     
     def process_csv_file(self, csv_path: Path) -> Dict[str, Any]:
         """Process a single CSV file and extract network data"""
-        logger.info(f"Processing {csv_path}")
+        csv_path = Path(csv_path)
+        self.process_corpus_book(Corpus({csv_path.parent.name: str(csv_path)}), csv_path.parent.name)
+    
+    def process_corpus_book(self, corpus: Corpus, book_name: str):
+        """Extract network data from one book of a verse corpus"""
+        logger.info(f"Processing {book_name}")
         
         try:
-            df = pd.read_csv(csv_path)
+            rows = corpus.indices(book_name)
             
-            for _, row in df.iterrows():
+            for row in map(corpus.row, rows):
                 # Extract entities from the verse text
                 entities = self.extract_entities_from_text(row['full_text'])
                 
@@ -205,7 +213,7 @@ class CytoscapeDataGenerator:
                         "chapter": row['chapter'],
                         "verse": row['verse'],
                         "text": row['full_text'][:100] + "..." if len(row['full_text']) > 100 else row['full_text'],
-                        "sources": row['sources'].split(';') if pd.notna(row['sources']) else [],
+                        "sources": row['sources'],
                         "primary_source": row['primary_source'],
                         "source_count": row['source_count'],
                         "word_count": row['word_count']
@@ -213,7 +221,7 @@ class CytoscapeDataGenerator:
                 )
                 
                 # Add source nodes
-                sources = row['sources'].split(';') if pd.notna(row['sources']) else []
+                sources = row['sources']
                 for source in sources:
                     if source.strip():
                         source_id = f"source_{source.strip()}"
@@ -292,10 +300,10 @@ class CytoscapeDataGenerator:
                     direction_id = f"direction_{direction}"
                     self.add_edge(direction_id, verse_id, "mentioned_in")
             
-            logger.info(f"Processed {len(df)} verses from {csv_path.name}")
+            logger.info(f"Processed {len(rows)} verses from {book_name}")
             
         except Exception as e:
-            logger.error(f"Error processing {csv_path}: {e}")
+            logger.error(f"Error processing {book_name}: {e}")
     
     def get_source_description(self, source: str) -> str:
         """Get description for source"""
@@ -312,12 +320,10 @@ class CytoscapeDataGenerator:
         """Generate complete network data for Cytoscape.js"""
         logger.info("Generating network data...")
         
-        # Process all CSV files
-        csv_files = list(self.output_dir.glob("**/*.csv"))
-        
-        for csv_file in csv_files:
-            if csv_file.name.endswith('.csv') and not csv_file.name.startswith('.'):
-                self.process_csv_file(csv_file)
+        # Process every book of the shared corpus
+        corpus = get_corpus(str(self.output_dir))
+        for book_name in corpus.books:
+            self.process_corpus_book(corpus, book_name)
         
         # Create network data structure
         network_data = {
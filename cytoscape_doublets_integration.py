@@ -11,13 +11,17 @@ Author: KJV Sources Project
 License: MIT
 """
 
+import sys
 import json
-import re
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Set
 from collections import defaultdict, Counter
 import logging
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.doublet_index import DoubletIndex, get_doublet_index
+from kjv_sources.references import parse_reference
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,7 +33,8 @@ class CytoscapeDoubletsIntegration:
                  output_dir: str = "frontend"):
         self.doublets_file = Path(doublets_file)
         self.output_dir = Path(output_dir)
-        self.doublets_data = self.load_doublets_data()
+        self.doublet_index = self.load_doublet_index()
+        self.doublets_data = self.doublet_index.data
         
         # Network data structures
         self.nodes = []
@@ -71,26 +76,18 @@ class CytoscapeDoubletsIntegration:
             "chapter": {"size": 30, "shape": "triangle", "border_width": 1}
         }
     
-    def load_doublets_data(self) -> Dict[str, Any]:
-        """Load doublets data from JSON file"""
+    def load_doublet_index(self) -> DoubletIndex:
+        """Load doublets data from JSON file, sharing its index with other users of the file"""
         if not self.doublets_file.exists():
             raise FileNotFoundError(f"Doublets file not found: {self.doublets_file}")
         
-        with open(self.doublets_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_doublet_index(str(self.doublets_file))
     
     def parse_biblical_reference(self, reference: str) -> Tuple[str, int, int]:
         """Parse biblical reference into components"""
-        # Handle complex references, extract first clear reference
-        pattern = r'([A-Za-z0-9\s]+)\s+(\d+):(\d+)'
-        match = re.search(pattern, reference.strip())
-        
-        if match:
-            book = match.group(1).strip()
-            chapter = int(match.group(2))
-            verse = int(match.group(3))
-            return book, chapter, verse
-        else:
+        try:
+            return parse_reference(reference).first
+        except ValueError:
             logger.warning(f"Could not parse reference: {reference}")
             return "Unknown", 1, 1
     
@@ -193,6 +190,7 @@ class CytoscapeDoubletsIntegration:
                 passage_id = f"passage_{doublet['id']}_{i}"
                 source = passage.get("source", "Unknown")
                 book, chapter, verse = self.parse_biblical_reference(passage["reference"])
+                verses = self.doublet_index.passage_ranges[doublet["id"]][i]
                 
                 # Add passage node
                 self.add_node(
@@ -206,6 +204,8 @@ class CytoscapeDoubletsIntegration:
                         "chapter": chapter,
                         "verse": verse,
                         "reference": passage["reference"],
+                        "verse_start_id": verses.start if verses else None,
+                        "verse_count": len(verses) if verses else 0,
                         "themes": passage.get("themes", []),
                         "characteristics": passage.get("characteristics", [])
                     }
@@ -271,6 +271,20 @@ class CytoscapeDoubletsIntegration:
                         {"style": "dashed", "weight": 2}
                     )
         
+        # Connect passages of different doublets that share verses
+        for doublet_id, ranges in self.doublet_index.passage_ranges.items():
+            for i, verses in enumerate(ranges):
+                if not verses:
+                    continue
+                for other_id, j in self.doublet_index.passages_overlapping(verses):
+                    if other_id > doublet_id:
+                        self.add_edge(
+                            f"passage_{doublet_id}_{i}",
+                            f"passage_{other_id}_{j}",
+                            "shares_verses",
+                            {"style": "dotted", "weight": 1}
+                        )
+        
         # Create network data structure
         network_data = {
             "nodes": self.nodes,
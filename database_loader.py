@@ -10,8 +10,8 @@ License: MIT
 """
 
 import os
+import sys
 import json
-import csv
 import psycopg2
 from psycopg2.extras import RealDictCursor, execute_values
 from typing import List, Dict, Any, Optional
@@ -20,10 +20,25 @@ import logging
 from word_level_parser import WordLevelParser, WordData
 from mathematical_pattern_engine import MathematicalPatternEngine, WordPattern, GlobalAnalysis
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from kjv_sources.corpus import Corpus, get_corpus
+from kjv_sources.verse_table import join_field
+from kjv_sources.word_export import EXPORT_CHUNK_SIZE, iter_word_chunks
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bulk insert of words rows (execute_values fills in VALUES %s)
+WORDS_INSERT_QUERY = """
+    INSERT INTO words (
+        verse_id, word, position_global, position_in_verse, 
+        position_in_chapter, position_in_book, word_length, 
+        is_capitalized, is_number, is_proper_name, 
+        source_attribution, mathematical_properties
+    ) VALUES %s
+"""
+
 class BibleDatabaseLoader:
     """Database loader for KJV Bible with mathematical analysis"""
     
@@ -76,35 +91,10 @@ class BibleDatabaseLoader:
         logger.info(f"Loading {len(word_data)} words into database...")
         
         # Prepare data for bulk insert
-        words_data = []
-        for word in word_data:
-            words_data.append((
-                word.verse_id,
-                word.word,
-                word.position_global,
-                word.position_in_verse,
-                word.position_in_chapter,
-                word.position_in_book,
-                word.word_length,
-                word.is_capitalized,
-                word.is_number,
-                word.is_proper_name,
-                word.source_attribution,
-                json.dumps(word.mathematical_properties)
-            ))
-        
-        # Bulk insert words
-        insert_query = """
-            INSERT INTO words (
-                verse_id, word, position_global, position_in_verse, 
-                position_in_chapter, position_in_book, word_length, 
-                is_capitalized, is_number, is_proper_name, 
-                source_attribution, mathematical_properties
-            ) VALUES %s
-        """
+        words_data = [self._word_row(word) for word in word_data]
         
         try:
-            execute_values(self.cursor, insert_query, words_data)
+            execute_values(self.cursor, WORDS_INSERT_QUERY, words_data)
             self.conn.commit()
             logger.info(f"Successfully loaded {len(words_data)} words")
         except Exception as e:
@@ -112,6 +102,41 @@ class BibleDatabaseLoader:
             self.conn.rollback()
             raise
     
+    def load_word_export(self, export_path: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+        """Load an NDJSON or Parquet word export chunk by chunk, committing each chunk"""
+        logger.info(f"Loading words from {export_path} in chunks of {chunk_size}...")
+        
+        loaded = 0
+        for chunk in iter_word_chunks(export_path, chunk_size):
+            try:
+                execute_values(self.cursor, WORDS_INSERT_QUERY, [self._word_row(word) for word in chunk])
+                self.conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to load words {loaded + 1}-{loaded + len(chunk)}: {e}")
+                self.conn.rollback()
+                raise
+            loaded += len(chunk)
+        
+        logger.info(f"Successfully loaded {loaded} words")
+        return loaded
+    
+    def _word_row(self, word) -> tuple:
+        """Row of the words table for a word object"""
+        return (
+            word.verse_id,
+            word.word,
+            word.position_global,
+            word.position_in_verse,
+            word.position_in_chapter,
+            word.position_in_book,
+            word.word_length,
+            word.is_capitalized,
+            word.is_number,
+            word.is_proper_name,
+            word.source_attribution,
+            json.dumps(word.mathematical_properties)
+        )
+    
     def load_word_patterns(self, patterns: Dict[str, WordPattern]):
         """Load word patterns into database"""
         logger.info(f"Loading {len(patterns)} word patterns into database...")
@@ -192,50 +217,59 @@ class BibleDatabaseLoader:
         # First, ensure books and chapters exist
         self._ensure_books_and_chapters(csv_path)
         
-        # Load verses
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        book_name = os.path.basename(os.path.dirname(os.path.abspath(csv_path)))
+        self.load_corpus_verses(Corpus({book_name: csv_path}), book_name)
+    
+    def load_all_verses(self):
+        """Load every book of the shared verse corpus into the verses table"""
+        corpus = get_corpus(self.output_dir)
+        for book_name in corpus.books:
+            self._ensure_books_and_chapters(corpus.table_paths[book_name])
+            self.load_corpus_verses(corpus, book_name)
+    
+    def load_corpus_verses(self, corpus: Corpus, book_name: str):
+        """Insert one book of a verse corpus into the verses table"""
+        for row_number in corpus.indices(book_name):
+            row = corpus.row(row_number)
+            # Get book and chapter IDs
+            book_id = self._get_book_id(book_name)
+            chapter_id = self._get_chapter_id(book_id, row['chapter'])
+            
+            # Insert verse
+            insert_query = """
+                INSERT INTO verses (
+                    chapter_id, verse, osis_ref, canonical_reference,
+                    text_full, word_count, sources, source_count,
+                    primary_source, source_sequence, source_percentages,
+                    redaction_indicators, text_J, text_E, text_P, text_R,
+                    metadata, mathematical_properties
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
             
-            for row in reader:
-                # Get book and chapter IDs
-                book_id = self._get_book_id(row['book'])
-                chapter_id = self._get_chapter_id(book_id, int(row['chapter']))
-                
-                # Insert verse
-                insert_query = """
-                    INSERT INTO verses (
-                        chapter_id, verse, osis_ref, canonical_reference,
-                        text_full, word_count, sources, source_count,
-                        primary_source, source_sequence, source_percentages,
-                        redaction_indicators, text_J, text_E, text_P, text_R,
-                        metadata, mathematical_properties
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                try:
-                    self.cursor.execute(insert_query, (
-                        chapter_id,
-                        int(row['verse']),
-                        row['verse_id'],
-                        row['canonical_reference'],
-                        row['full_text'],
-                        int(row['word_count']),
-                        row['sources'].split(';') if row['sources'] else [],
-                        int(row['source_count']),
-                        row['primary_source'],
-                        row['source_sequence'],
-                        json.dumps(self._parse_percentages(row['source_percentages'])),
-                        row['redaction_indicators'].split(';') if row['redaction_indicators'] and row['redaction_indicators'] != 'none' else [],
-                        row['text_J'],
-                        row['text_E'],
-                        row['text_P'],
-                        row['text_R'],
-                        row['metadata'],
-                        json.dumps({})  # Placeholder for mathematical properties
-                    ))
-                except Exception as e:
-                    logger.error(f"Failed to insert verse {row['verse_id']}: {e}")
-                    continue
+            try:
+                self.cursor.execute(insert_query, (
+                    chapter_id,
+                    row['verse'],
+                    row['verse_id'],
+                    row['canonical_reference'],
+                    row['full_text'],
+                    row['word_count'],
+                    row['sources'],
+                    row['source_count'],
+                    row['primary_source'],
+                    join_field(row['source_sequence'], sep="->"),
+                    json.dumps(corpus.percentages(row_number)),
+                    row['redaction_indicators'],
+                    row['text_J'],
+                    row['text_E'],
+                    row['text_P'],
+                    row['text_R'],
+                    row['metadata'],
+                    json.dumps({})  # Placeholder for mathematical properties
+                ))
+            except Exception as e:
+                logger.error(f"Failed to insert verse {row['verse_id']}: {e}")
+                continue
         
         self.conn.commit()
         logger.info("Successfully loaded verses from CSV")
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Sharded JSONL Datasets
+======================
+
+Writer and streaming reader for JSONL training datasets split into
+fixed-size, optionally compressed shards.
+
+A dataset ``<prefix>`` is stored as ``<prefix>-00000.jsonl[.gz|.zst]``,
+``<prefix>-00001.jsonl[...]``, ... plus ``<prefix>.index.json``, which lists
+every shard with its record count, the index of its first record, its byte
+offset in the uncompressed dataset, its uncompressed and compressed sizes
+and its SHA-256. Every shard except the last holds exactly ``shard_records``
+records, so a shard can be read on its own without touching the others.
+
+gzip uses the standard library; zstd needs the ``zstandard`` package.
+
+Author: KJV Sources Project
+License: MIT
+"""
+
+import os
+import io
+import json
+import gzip
+import bisect
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Default number of records per shard
+DEFAULT_SHARD_RECORDS = 10000
+
+# File extension of each compression
+COMPRESSION_EXTENSIONS = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+def check_compression(compression: Optional[str]) -> None:
+    """Raise if a compression is unknown or its library is not installed"""
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Unknown compression: {compression} "
+                         f"(expected one of: gzip, zstd)")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression requires zstandard (pip install zstandard)")
+
+# File name suffix of a dataset's shard index
+SHARD_INDEX_SUFFIX = ".index.json"
+
+def shard_index_path(prefix: str) -> str:
+    """Path of the index file of the dataset stored under prefix"""
+    return f"{prefix}{SHARD_INDEX_SUFFIX}"
+
+def shard_file_name(prefix: str, shard_number: int, compression: Optional[str]) -> str:
+    """File name (without directory) of one shard"""
+    return f"{os.path.basename(prefix)}-{shard_number:05d}.jsonl{COMPRESSION_EXTENSIONS[compression]}"
+
+def _sha256_file(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+class ShardedJsonlWriter:
+    """File-like writer that splits JSONL text into fixed-size compressed shards.
+
+    write() takes text made of complete lines, one record per line, exactly
+    like a text file opened for JSONL. Shards are written next to their final
+    names with a ".tmp" suffix; close() finishes them and builds the index,
+    and publish() moves everything into place and removes shards left over
+    from a larger previous version.
+    """
+
+    def __init__(self, prefix: str, compression: Optional[str] = None,
+                 shard_records: int = DEFAULT_SHARD_RECORDS, level: Optional[int] = None):
+        check_compression(compression)
+        if shard_records < 1:
+            raise ValueError("shard_records must be at least 1")
+        self.prefix = prefix
+        self.directory = os.path.dirname(prefix)
+        self.index_path = shard_index_path(prefix)
+        self.compression = compression
+        self.shard_records = shard_records
+        self.level = level
+        self.shards: List[Dict[str, Any]] = []
+        self.temp_paths: List[str] = []
+        self.raw = None
+        self.stream = None
+        self.shard_count = 0
+        self.shard_bytes = 0
+        self.total_records = 0
+        self.total_bytes = 0
+        self.closed = False
+
+    def _open_shard(self) -> None:
+        file_name = shard_file_name(self.prefix, len(self.shards), self.compression)
+        temp_path = os.path.join(self.directory, file_name + ".tmp")
+        self.temp_paths.append(temp_path)
+        self.raw = open(temp_path, "wb")
+        if self.compression == "gzip":
+            # Empty file name and zero mtime keep the output reproducible
+            self.stream = gzip.GzipFile(filename="", mode="wb", fileobj=self.raw, mtime=0,
+                                        compresslevel=9 if self.level is None else self.level)
+        elif self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=3 if self.level is None else self.level)
+            self.stream = compressor.stream_writer(self.raw, closefd=False)
+        else:
+            self.stream = self.raw
+        self.shards.append({
+            "file": file_name,
+            "records": 0,
+            "first_record": self.total_records,
+            "offset": self.total_bytes,
+        })
+        self.shard_count = 0
+        self.shard_bytes = 0
+
+    def _close_shard(self) -> None:
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.close()
+        shard = self.shards[-1]
+        shard["records"] = self.shard_count
+        shard["uncompressed_bytes"] = self.shard_bytes
+        shard["compressed_bytes"] = os.path.getsize(self.temp_paths[-1])
+        shard["sha256"] = _sha256_file(self.temp_paths[-1])
+        self.raw = self.stream = None
+
+    def _write_lines(self, data: bytes, count: int) -> None:
+        self.stream.write(data)
+        self.shard_count += count
+        self.shard_bytes += len(data)
+        self.total_records += count
+        self.total_bytes += len(data)
+
+    def write(self, text: str) -> None:
+        """Write one or more complete JSONL lines"""
+        count = text.count("\n")
+        if self.stream is not None and self.shard_count + count <= self.shard_records:
+            self._write_lines(text.encode("utf-8"), count)
+            return
+        # Split on "\n" only, matching the count above; str.splitlines() also
+        # breaks on \r, \x0b, \u2028 and others, which JSON text may contain
+        for line in text.split("\n")[:-1]:
+            if self.stream is None or self.shard_count == self.shard_records:
+                if self.stream is not None:
+                    self._close_shard()
+                self._open_shard()
+            self._write_lines((line + "\n").encode("utf-8"), 1)
+
+    def close(self) -> None:
+        """Finish the last shard and write the index (to a temporary file)"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.stream is not None:
+            self._close_shard()
+        index = {
+            "format": "jsonl",
+            "compression": self.compression,
+            "shard_records": self.shard_records,
+            "records": self.total_records,
+            "uncompressed_bytes": self.total_bytes,
+            "shards": self.shards,
+        }
+        with open(self.index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        self.temp_paths.append(self.index_path + ".tmp")
+
+    def publish(self, publish_file) -> bool:
+        """Move the shards and index into place with publish_file(temp, path).
+
+        Returns True if anything changed. Shards of a previous, larger version
+        of the dataset are removed.
+        """
+        previous = load_shard_index(self.index_path) if os.path.exists(self.index_path) else None
+        changed = False
+        for temp_path in self.temp_paths:
+            changed = publish_file(temp_path, temp_path[:-len(".tmp")]) or changed
+        if previous is not None:
+            current_files = {shard["file"] for shard in self.shards}
+            for shard in previous["shards"]:
+                stale_path = os.path.join(self.directory, shard["file"])
+                if shard["file"] not in current_files and os.path.exists(stale_path):
+                    os.remove(stale_path)
+        return changed
+
+    def discard(self) -> None:
+        """Abandon the dataset, removing every temporary file"""
+        if self.stream is not None:
+            if self.stream is not self.raw:
+                self.stream.close()
+            self.raw.close()
+            self.raw = self.stream = None
+        self.closed = True
+        for temp_path in self.temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def load_shard_index(index_path: str) -> Dict[str, Any]:
+    """Load a dataset's shard index"""
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class ShardedDatasetReader:
+    """Streaming reader for datasets written by ShardedJsonlWriter.
+
+    Records are decoded lazily shard by shard; read_shard() and get() only
+    decompress the shard they need.
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.directory = os.path.dirname(index_path)
+        self.index = load_shard_index(index_path)
+        self.compression = self.index["compression"]
+        check_compression(self.compression)
+        self.shards = self.index["shards"]
+        self._first_records = [shard["first_record"] for shard in self.shards]
+
+    def __len__(self) -> int:
+        return self.index["records"]
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.shards)
+
+    def open_shard(self, shard_number: int) -> io.TextIOBase:
+        """Open one shard as a decompressed text stream"""
+        path = os.path.join(self.directory, self.shards[shard_number]["file"])
+        if self.compression == "gzip":
+            return gzip.open(path, "rt", encoding="utf-8")
+        if self.compression == "zstd":
+            raw = open(path, "rb")
+            return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True),
+                                    encoding="utf-8")
+        return open(path, "r", encoding="utf-8")
+
+    def iter_shard(self, shard_number: int) -> Iterator[Dict[str, Any]]:
+        """Stream the records of one shard"""
+        with self.open_shard(shard_number) as f:
+            for line in f:
+                yield json.loads(line)
+
+    def read_shard(self, shard_number: int) -> List[Dict[str, Any]]:
+        """Read all records of one shard"""
+        return list(self.iter_shard(shard_number))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for shard_number in range(len(self.shards)):
+            yield from self.iter_shard(shard_number)
+
+    def shard_for_record(self, record_index: int) -> int:
+        """Number of the shard holding a record"""
+        if not 0 <= record_index < len(self):
+            raise IndexError(f"Record {record_index} out of range (0-{len(self) - 1})")
+        return bisect.bisect_right(self._first_records, record_index) - 1
+
+    def get(self, record_index: int) -> Dict[str, Any]:
+        """Read a single record by its index in the dataset"""
+        shard_number = self.shard_for_record(record_index)
+        skip = record_index - self.shards[shard_number]["first_record"]
+        with self.open_shard(shard_number) as f:
+            for position, line in enumerate(f):
+                if position == skip:
+                    return json.loads(line)
+        raise IndexError(f"Record {record_index} missing from shard {shard_number}")
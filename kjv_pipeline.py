@@ -127,6 +127,16 @@ def create_csv_exports(python_cmd):
     
     print("✅ CSV exports completed")
 
+def build_corpus_snapshot(python_cmd):
+    """Compile the book CSVs into the memory-mapped corpus snapshot."""
+    print("\n[SNAPSHOT] Building corpus snapshot...")
+    run_command(f"{python_cmd} kjv_cli.py snapshot", "Building corpus snapshot")
+
+def build_verse_database(python_cmd):
+    """Load the book CSVs into the embedded SQLite verse database."""
+    print("\n[DATABASE] Building SQLite verse database...")
+    run_command(f"{python_cmd} kjv_cli.py database", "Building SQLite verse database")
+
 def setup_qdrant(python_cmd):
     """Set up Qdrant vector database."""
     print("\n[QDRANT SETUP] Setting up Qdrant vector database...")
@@ -193,6 +203,12 @@ def main():
     # Create CSV exports
     create_csv_exports(python_cmd)
     
+    # Build the corpus snapshot the CLIs and API servers map at startup
+    build_corpus_snapshot(python_cmd)
+    
+    # Build the SQLite database behind full-text search
+    build_verse_database(python_cmd)
+    
     # Show summary
     show_data_summary(python_cmd)
     
@@ -232,10 +248,13 @@ def main():
     print("  - output/ (processed data)")
     print("  - *.csv (CSV exports)")
     print("  - kjv_sources_combined.csv (combined data)")
+    print("  - output/corpus.snapshot (memory-mapped verse corpus)")
+    print("  - output/kjv_sources.db (SQLite verse database with full-text search)")
     print("\n[COMMANDS] Available commands:")
     print("  python kjv_cli.py view <book> -- View data")
     print("  python kjv_cli.py stats <book> -- Show statistics")
     print("  python kjv_cli.py search <book> -- Search verses")
+    print("  python kjv_cli.py search-text 'query' -- Full-text search")
     print("  python kjv_cli.py export-csv <book> -- Export to CSV")
     print("  python kjv_cli.py qdrant search-semantic 'query' -- Semantic search")
 
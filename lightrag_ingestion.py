@@ -6,6 +6,7 @@ Supports hybrid mode for optimal retrieval performance
 """
 
 import os
+import sys
 import json
 import re
 import glob
@@ -28,6 +29,11 @@ except ImportError:
     LIGHTRAG_AVAILABLE = False
     print("LightRAG not available. Install with: pip install lightrag")
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.corpus import get_corpus
+from kjv_sources.references import parse_reference
+from kjv_sources.verse_table import join_field, source_percentages_field
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -114,34 +120,22 @@ class KJVLightRAGIngestion:
     
     def parse_verse_reference(self, reference: str) -> Tuple[str, int, int]:
         """Parse verse reference into book, chapter, verse"""
-        # Handle various reference formats
-        patterns = [
-            r"(\w+)\s+(\d+):(\d+)",  # Genesis 1:1
-            r"(\w+)\s+(\d+)\s+(\d+)",  # Genesis 1 1
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, reference)
-            if match:
-                book, chapter, verse = match.groups()
-                return book, int(chapter), int(verse)
-        
-        return reference, 0, 0
+        try:
+            return parse_reference(reference).first
+        except ValueError:
+            return reference, 0, 0
     
     def load_csv_data(self, book_name: str) -> List[VerseEntity]:
-        """Load verse data from CSV files"""
-        csv_path = self.output_dir / book_name / f"{book_name}.csv"
+        """Load a book's verses from the shared corpus of the output directory"""
+        corpus = get_corpus(str(self.output_dir))
         
-        if not csv_path.exists():
-            logger.warning(f"CSV file not found: {csv_path}")
+        if book_name not in corpus.book_index:
+            logger.warning(f"Verse table not found for {book_name} in {self.output_dir}")
             return []
         
         verses = []
         try:
-            import pandas as pd
-            df = pd.read_csv(csv_path)
-            
-            for _, row in df.iterrows():
+            for row in corpus.iter_rows(book_name):
                 book, chapter, verse = self.parse_verse_reference(row['canonical_reference'])
                 
                 verse_entity = VerseEntity(
@@ -150,13 +144,13 @@ class KJVLightRAGIngestion:
                     book=book,
                     chapter=chapter,
                     verse=verse,
-                    sources=row['sources'].split(';') if pd.notna(row['sources']) else [],
+                    sources=row['sources'],
                     primary_source=row['primary_source'],
                     source_count=row['source_count'],
                     word_count=row['word_count'],
-                    source_sequence=row.get('source_sequence', ''),
-                    source_percentages=row.get('source_percentages', ''),
-                    redaction_indicators=row.get('redaction_indicators', ''),
+                    source_sequence=join_field(row['source_sequence'], sep="->"),
+                    source_percentages=source_percentages_field(row),
+                    redaction_indicators=join_field(row['redaction_indicators'], empty="none"),
                     text_J=row.get('text_J', ''),
                     text_E=row.get('text_E', ''),
                     text_P=row.get('text_P', ''),
@@ -10,13 +10,16 @@ Author: KJV Sources Project
 License: MIT
 """
 
+import sys
 import json
 import pandas as pd
-import re
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.references import parse_reference
+
 class MinimalHeatMapTest:
     """Minimal heat map test using available libraries"""
     
@@ -35,19 +38,12 @@ class MinimalHeatMapTest:
     
     def parse_biblical_reference(self, reference: str) -> Tuple[str, int, int, int, int]:
         """Parse biblical reference into components"""
-        # Handle complex references like "Genesis 6:5-8; 7:1-5,7,10,12,16b-20,22-23; 8:2b-3a,6,8-12,13b,20-22"
-        # For testing, just extract the first book and chapter
-        simple_pattern = r'([A-Za-z0-9\s]+)\s+(\d+):(\d+)'
-        match = re.search(simple_pattern, reference.strip())
-        
-        if match:
-            book = match.group(1).strip()
-            chapter = int(match.group(2))
-            verse = int(match.group(3))
-            return book, chapter, verse, chapter, verse
-        else:
+        try:
+            span = parse_reference(reference).span()
+        except ValueError:
             print(f"Warning: Could not parse reference: {reference}")
             return "Unknown", 1, 1, 1, 1
+        return span.book, span.chapter_start, span.verse_start, span.chapter_end, span.verse_end
     
     def create_doublets_dataframe(self) -> pd.DataFrame:
         """Create a pandas DataFrame of doublets for analysis"""
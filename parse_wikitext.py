@@ -7,348 +7,336 @@ import json
 import time
 import sys
 import shutil
+import argparse
+import hashlib
+import filecmp
+import tempfile
+import contextlib
+import io
+from bisect import bisect_left, bisect_right
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
 
-# Color to source mapping from the wikitext files
-COLOR_TO_SOURCE = {
-    "#888800": "P",  # Priestly source - olive yellow
-    "#000088": "J",  # Jahwist source - navy blue  
-    "#008888": "E",  # Elohist source - teal blueish grey
-    "#880000": "R",  # Redactor - maroon red
-    "#000000": "D",  # Deuteronomist source - black
-    "#800080": "D",  # Deuteronomist source - purple (Dtr1)
-    "#008800": "D",  # Deuteronomist source - green (Dtr2)
-    "#00FF88": "D",  # Deuteronomist source - turquoise (Song of Moses)
-    "#888888": "UNKNOWN",  # Grey text (unknown source)
+from dataset_shards import DEFAULT_SHARD_RECORDS, SHARD_INDEX_SUFFIX, ShardedJsonlWriter, load_shard_index
+
+# pyarrow is only needed for the optional parquet output format
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Version of the parser and writers. Bump it whenever the generated artifacts
+# change so incremental pipeline runs rebuild every book.
+PARSER_VERSION = "2.2"
+
+# Single colour table shared by every parser: colour -> (source, sub-source).
+# The Deuteronomist colours also identify its sub-sources (Dtr1, Dtr2, Song of
+# Moses); other sources have no sub-source.
+COLOR_TABLE = {
+    "#888800": ("P", None),  # Priestly source - olive yellow
+    "#000088": ("J", None),  # Jahwist source - navy blue
+    "#008888": ("E", None),  # Elohist source - teal blueish grey
+    "#880000": ("R", "Late_insertion"),  # Redactor / late insertions - maroon red
+    "#000000": ("D", "Core"),  # Deuteronomist source - black (core Deuteronomic Code)
+    "#800080": ("D", "Dtr1"),  # Deuteronomist source - purple (Dtr1)
+    "#008800": ("D", "Dtr2"),  # Deuteronomist source - green (Dtr2)
+    "#00FF88": ("D", "Song_of_Moses"),  # Deuteronomist source - turquoise (Song of Moses)
+    "#888888": ("UNKNOWN", None),  # Grey text (unknown source)
 }
 
-def parse_wikitext_file(file_path):
-    """Parse a wikitext file to extract verses with their sources"""
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    verses = []
+# Color to source mapping from the wikitext files
+COLOR_TO_SOURCE = {color: source for color, (source, _) in COLOR_TABLE.items()}
+
+# Color to sub-source mapping, for the colours that have one
+COLOR_TO_SUB_SOURCE = {color: sub_source for color, (_, sub_source) in COLOR_TABLE.items() if sub_source}
+
+# Precompiled wikitext grammar, matched in a single scan over the whole file.
+# Headings are either "==Chapter N==" (books) or titled sections (source
+# pages such as Deuteronomist_source, which are split into numbered parts).
+# Section headings of levels 2-4 all count: pages such as Deuteronomic_Laws
+# restart their verse numbers in every "===" and "====" subsection.
+# Verse markers come in three dialects:
+#   1. {{font|size=smaller|color=#0000FF|verse_num}} (Genesis, Deuteronomy)
+#   2. <small>{{font|color=#0000FF|verse_num}}</small> (Exodus, Leviticus, Numbers)
+#   3. {{font|verse_num|size=smaller|color=#0000FF}} (source pages)
+# Every other {{font|color=...|text}} or {{font|text|color=...}} template is a
+# colour-coded source segment.
+WIKITEXT_TOKEN_RE = re.compile(
+    r'^[^\S\n]*={2,4}(?!=)[^\S\n]*(?:Chapter[^\S\n]+(?P<chapter>\d+)|(?P<section>[^=\n]*[^=\s]))[^\S\n]*={2,4}[^\S\n]*$'
+    r'|{{font\|(?:'
+    r'size=smaller\|color=#0000FF\|(?P<verse_small>\d+)}}'
+    r'|color=(?:(?<=<small>{{font\|color=)#0000FF\|(?P<verse_tag>\d+)}}</small>'
+    r'|(?P<color>[^|\n]+)\|(?P<text>[^}\n]+)}})'
+    r'|(?P<verse_pos>\d+)\|size=smaller\|color=#0000FF}}'
+    r'|(?!size=)(?P<text_pos>[^|}\n]+)\|color=(?P<color_pos>[^|}\n]+)}})',
+    re.MULTILINE,
+)
+
+# Markup stripped from plain (untemplated) verse text
+PLAIN_MARKUP_RE = re.compile(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>|{{[^{}]*}}|<[^>]+>|''+")
+WIKILINK_RE = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+
+TOKEN_CHAPTER = "chapter"
+TOKEN_SECTION = "section"
+TOKEN_VERSE = "verse"
+TOKEN_SEGMENT = "segment"
+
+def clean_plain_text(text):
+    """Strip references, templates, tags and link markup from plain wikitext"""
+    text = WIKILINK_RE.sub(r"\1", PLAIN_MARKUP_RE.sub("", text))
+    return " ".join(text.split())
+
+def tokenize_wikitext(content, plain_color=None):
+    """Yield chapter, section, verse and colour-segment tokens from wikitext in one scan.
+
+    Tokens are (kind, chapter, verse, color, text) tuples where kind is one of
+    the TOKEN_* constants and color/text are only set for segments (section
+    tokens carry their title as text). A verse runs from its marker to the
+    next verse marker or the end of the line. Verses before the first chapter
+    header, segments outside a verse and segments with blank text are skipped.
+
+    Files without "==Chapter N==" headings are split into titled sections
+    (subsections included), which are numbered 1, 2, ... and used as chapters. In files that have
+    chapter headings any other heading (e.g. References) is ignored.
+
+    If plain_color is given, untemplated text following a verse marker is
+    emitted as a segment of that colour.
+    """
     current_chapter = None
-    
-    # Split into lines and process
-    lines = content.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Check for chapter headers
-        chapter_match = re.match(r'^==\s*Chapter\s+(\d+)\s*==$', line)
-        if chapter_match:
-            current_chapter = chapter_match.group(1)
-            continue
-        
-        # Check for verse lines with multiple sources
-        # Handle both formats:
-        # 1. {{font|size=smaller|color=#0000FF|verse_num}} (Genesis, Deuteronomy)
-        # 2. <small>{{font|color=#0000FF|verse_num}}</small> (Exodus, Leviticus, Numbers)
-        verse_patterns = [
-            r'{{font\|size=smaller\|color=#0000FF\|(\d+)}}(.*?)(?={{font\|size=smaller\|color=#0000FF\|\d+}}|$)',
-            r'<small>{{font\|color=#0000FF\|(\d+)}}</small>(.*?)(?=<small>{{font\|color=#0000FF\|\d+}}</small>|$)'
-        ]
-        
-        for pattern in verse_patterns:
-            matches = re.findall(pattern, line, re.DOTALL)
-            
-            for match in matches:
-                verse_num = match[0]
-                verse_content = match[1].strip()
-                
-                if not current_chapter or not verse_num or not verse_content:
-                    continue
-                
-                # Extract all color-coded segments from the verse
-                color_segments = re.findall(r'{{font\|color=([^|]+)\|([^}]+)}}', verse_content)
-                
-                if not color_segments:
-                    continue
-                
-                # Process each segment and combine into a single verse
-                full_text = ""
-                sources = []
-                colors = []
-                source_texts = {}  # Dictionary to store text for each source
-                
-                for color, text in color_segments:
-                    text = text.strip()
-                    if text:
-                        source = COLOR_TO_SOURCE.get(color, "UNKNOWN")
-                        sources.append(source)
-                        colors.append(color)
-                        full_text += text + " "
-                        
-                        # Store text for each source
-                        if source not in source_texts:
-                            source_texts[source] = []
-                        source_texts[source].append(text)
-                
-                if full_text.strip():
-                    # Create source-specific text columns
-                    source_text_columns = {}
-                    for source in ["J", "E", "P", "D", "R", "UNKNOWN"]:
-                        if source in source_texts:
-                            source_text_columns[source] = " ".join(source_texts[source])
-                        else:
-                            source_text_columns[source] = ""
-                    
-                    verses.append({
-                        'chapter': current_chapter,
-                        'verse': verse_num,
-                        'source': sources,  # Now a list of sources
-                        'text': full_text.strip(),
-                        'color': colors,  # Now a list of colors
-                        'segments': len(sources),  # Number of source segments
-                        'text_J': source_text_columns.get("J", ""),
-                        'text_E': source_text_columns.get("E", ""),
-                        'text_P': source_text_columns.get("P", ""),
-                        'text_D': source_text_columns.get("D", ""),
-                        'text_R': source_text_columns.get("R", ""),
-                        'text_UNKNOWN': source_text_columns.get("UNKNOWN", "")
-                    })
-    
-    return verses
+    current_verse = None
+    verse_line_end = -1
+    has_chapter_headings = False
+    section_count = 0
 
-def write_csv_output(verses, book_name, output_dir):
-    """Write verses to enhanced CSV file optimized for LLM training"""
-    
-    os.makedirs(output_dir, exist_ok=True)
-    csv_path = os.path.join(output_dir, f"{book_name}.csv")
-    
-    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            'book', 'chapter', 'verse', 'verse_id', 'canonical_reference',
-            'full_text', 'text_clean', 'word_count',
-            'sources', 'source_count', 'primary_source', 'source_sequence',
-            'text_J', 'text_E', 'text_P', 'text_D', 'text_R', 'text_UNKNOWN',
-            'source_percentages', 'source_confidence',
-            'narrative_context', 'theological_themes', 'literary_features',
-            'cross_references', 'redaction_indicators', 'source_boundaries',
-            'translation_notes', 'scholarly_notes', 'metadata'
-        ])
-        
-        for verse in verses:
-            # Convert lists to strings for CSV
-            sources = verse['source'] if isinstance(verse['source'], list) else [verse['source']]
-            sources_str = ';'.join(sources)
-            source_count = len(sources)
-            primary_source = sources[0] if sources else "UNKNOWN"
-            
-            # Create verse ID and canonical reference
-            verse_id = f"{book_name}_{verse['chapter']}_{verse['verse']}"
-            canonical_ref = f"{book_name} {verse['chapter']}:{verse['verse']}"
-            
-            # Clean text (remove extra spaces, normalize)
-            text_clean = ' '.join(verse['text'].split())
-            word_count = len(text_clean.split())
-            
-            # Source sequence (order of sources in verse)
-            source_sequence = '->'.join(sources)
-            
-            # Calculate source percentages
-            source_percentages = {}
-            total_chars = len(verse['text'])
-            for source in ['J', 'E', 'P', 'D', 'R', 'UNKNOWN']:
-                source_text = verse.get(f'text_{source}', '')
-                if source_text and total_chars > 0:
-                    percentage = round((len(source_text) / total_chars) * 100, 1)
-                    source_percentages[source] = percentage
+    for match in WIKITEXT_TOKEN_RE.finditer(content):
+        kind = match.lastgroup
+        if kind == "text" or kind == "color_pos":
+            if current_verse is not None and match.start() < verse_line_end:
+                if kind == "text":
+                    color, text = match.group("color"), match.group("text").strip()
                 else:
-                    source_percentages[source] = 0.0
-            
-            source_percentages_str = ';'.join([f"{k}:{v}" for k, v in source_percentages.items()])
-            
-            # Redaction indicators
-            redaction_indicators = []
-            if source_count > 1:
-                redaction_indicators.append("multi_source")
-            if 'R' in sources:
-                redaction_indicators.append("redactor_present")
-            if len(sources) > 2:
-                redaction_indicators.append("complex_redaction")
-            
-            redaction_str = ';'.join(redaction_indicators) if redaction_indicators else "none"
-            
-            # Source boundaries (positions where sources change)
-            source_boundaries = []
-            if source_count > 1:
-                # This would need more sophisticated parsing to identify exact boundaries
-                source_boundaries = [f"boundary_{i+1}" for i in range(source_count-1)]
-            
-            boundaries_str = ';'.join(source_boundaries) if source_boundaries else "none"
-            
-            # Metadata as JSON
-            metadata = {
-                "parsing_version": "2.0",
-                "source_colors": verse.get('color', []),
-                "segments": verse.get('segments', 1),
-                "has_redaction": 'R' in sources,
-                "is_multi_source": source_count > 1,
-                "source_complexity": "high" if source_count > 2 else "medium" if source_count > 1 else "low"
-            }
-            
-            writer.writerow([
-                book_name,
-                verse['chapter'],
-                verse['verse'],
-                verse_id,
-                canonical_ref,
-                verse['text'],
-                text_clean,
-                word_count,
-                sources_str,
-                source_count,
-                primary_source,
-                source_sequence,
-                verse.get('text_J', ''),
-                verse.get('text_E', ''),
-                verse.get('text_P', ''),
-                verse.get('text_D', ''),
-                verse.get('text_R', ''),
-                verse.get('text_UNKNOWN', ''),
-                source_percentages_str,
-                "high" if source_count == 1 else "medium" if source_count == 2 else "low",
-                "",  # narrative_context - could be filled with AI analysis
-                "",  # theological_themes - could be filled with AI analysis
-                "",  # literary_features - could be filled with AI analysis
-                "",  # cross_references - could be filled with AI analysis
-                redaction_str,
-                boundaries_str,
-                "",  # translation_notes
-                "",  # scholarly_notes
-                json.dumps(metadata)
-            ])
-    
-    print(f"[SUCCESS] Enhanced CSV written: {csv_path} ({len(verses)} verses)")
-    return csv_path
+                    color, text = match.group("color_pos"), match.group("text_pos").strip()
+                if text:
+                    yield (TOKEN_SEGMENT, current_chapter, current_verse, color, text)
+        elif kind == "chapter":
+            has_chapter_headings = True
+            current_chapter = match.group("chapter")
+            current_verse = None
+            yield (TOKEN_CHAPTER, current_chapter, None, None, None)
+        elif kind == "section":
+            if not has_chapter_headings:
+                section_count += 1
+                current_chapter = str(section_count)
+                current_verse = None
+                yield (TOKEN_SECTION, current_chapter, None, None, match.group("section").strip())
+        elif current_chapter is not None:
+            current_verse = match.group(kind)
+            verse_line_end = content.find("\n", match.end())
+            if verse_line_end < 0:
+                verse_line_end = len(content)
+            yield (TOKEN_VERSE, current_chapter, current_verse, None, None)
+            if plain_color is not None:
+                plain = content[match.end():verse_line_end]
+                if "{{font|" not in plain:
+                    text = clean_plain_text(plain)
+                    if text:
+                        yield (TOKEN_SEGMENT, current_chapter, current_verse, plain_color, text)
 
-def write_training_formats(verses, book_name, output_dir):
-    """Write multiple formats optimized for different LLM training approaches"""
-    
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # 1. JSONL format for fine-tuning
-    jsonl_path = os.path.join(output_dir, f"{book_name}_training.jsonl")
-    with open(jsonl_path, 'w', encoding='utf-8') as f:
-        for verse in verses:
-            sources = verse['source'] if isinstance(verse['source'], list) else [verse['source']]
-            
-            # Create training examples
-            training_example = {
-                "instruction": "Analyze the source composition of this biblical verse.",
-                "input": f"Verse: {verse['text']}\nReference: {book_name} {verse['chapter']}:{verse['verse']}",
-                "output": f"This verse contains {len(sources)} source(s): {', '.join(sources)}. " + 
-                         f"Primary source: {sources[0] if sources else 'UNKNOWN'}.",
-                "metadata": {
-                    "book": book_name,
-                    "chapter": verse['chapter'],
-                    "verse": verse['verse'],
-                    "sources": sources,
-                    "is_multi_source": len(sources) > 1
-                }
-            }
-            f.write(json.dumps(training_example, ensure_ascii=False) + '\n')
-    
-    # 2. Source classification format
-    classification_path = os.path.join(output_dir, f"{book_name}_classification.jsonl")
-    with open(classification_path, 'w', encoding='utf-8') as f:
-        for verse in verses:
-            sources = verse['source'] if isinstance(verse['source'], list) else [verse['source']]
-            
-            # Create classification examples
-            for source in ['J', 'E', 'P', 'R']:
-                classification_example = {
-                    "text": verse['text'],
-                    "label": 1 if source in sources else 0,
-                    "source": source,
-                    "metadata": {
-                        "book": book_name,
-                        "chapter": verse['chapter'],
-                        "verse": verse['verse'],
-                        "all_sources": sources
-                    }
-                }
-                f.write(json.dumps(classification_example, ensure_ascii=False) + '\n')
-    
-    # 3. Sequence labeling format (for identifying source boundaries)
-    sequence_path = os.path.join(output_dir, f"{book_name}_sequence.jsonl")
-    with open(sequence_path, 'w', encoding='utf-8') as f:
-        for verse in verses:
-            if len(verse['source']) > 1:  # Only multi-source verses
-                # This would require more sophisticated tokenization
-                # For now, create a simplified version
-                sequence_example = {
-                    "text": verse['text'],
-                    "labels": verse['source'],  # Simplified - would need token-level labels
-                    "metadata": {
-                        "book": book_name,
-                        "chapter": verse['chapter'],
-                        "verse": verse['verse'],
-                        "source_sequence": '->'.join(verse['source'])
-                    }
-                }
-                f.write(json.dumps(sequence_example, ensure_ascii=False) + '\n')
-    
-    print(f"[SUCCESS] Training formats written: {jsonl_path}, {classification_path}, {sequence_path}")
+# Tokens of the sequence labelling dataset: words (with inner apostrophes)
+# and single punctuation marks
+SEQUENCE_TOKEN_RE = re.compile(r"\w+(?:['\u2019]\w+)*|[^\w\s]")
 
-def write_analysis_dataset(verses, book_name, output_dir):
-    """Create dataset for complex source analysis tasks"""
+def label_verse_tokens(verse):
+    """Tokenize a verse into (start, end) token spans with one BIO label each.
+
+    The first token of a segment is labelled "B-<source>", the rest
+    "I-<source>". Only the sequence dataset needs this, so it is computed
+    there rather than for every parsed verse.
+    """
+    # Tokenize the whole verse in one scan; the single spaces between
+    # segments mean no token crosses a segment boundary
+    tokens = [match.span() for match in SEQUENCE_TOKEN_RE.finditer(verse['text'])]
+    labels = []
+    first = 0
+    for _, end, source, _ in verse['spans']:
+        last = bisect_left(tokens, (end,), first)
+        if last > first:
+            labels.append(f"B-{source}")
+            labels.extend([f"I-{source}"] * (last - first - 1))
+        first = last
+    return tokens, labels
+
+def build_verse(chapter, verse_num, segments, section=None):
+    """Build a verse record from its (color, text) segments.
+
+    Besides the joined text, the record keeps one (start, end, source, color)
+    span per segment, giving its exact character range in the verse text,
+    and the title of its section in files split into sections.
+    """
+    colors = [color for color, _ in segments]
+    sources = [COLOR_TO_SOURCE.get(color, "UNKNOWN") for color in colors]
+    texts = [text for _, text in segments]
+
+    # Segments are joined with single spaces
+    spans = []
+    start = 0
+    for text, source, color in zip(texts, sources, colors):
+        end = start + len(text)
+        spans.append((start, end, source, color))
+        start = end + 1
+
+    full_text = " ".join(texts)
+    verse = {
+        'chapter': chapter,
+        'verse': verse_num,
+        'source': sources,  # Now a list of sources
+        'text': full_text,
+        'color': colors,  # Now a list of colors
+        'segments': len(sources),  # Number of source segments
+        'spans': spans,  # (start, end, source, color) of each segment in text
+        'section': section,  # Section title, None in files with chapter headings
+        'text_J': "", 'text_E': "", 'text_P': "", 'text_D': "", 'text_R': "", 'text_UNKNOWN': "",
+    }
+    if len(set(sources)) == 1:
+        verse[f'text_{sources[0]}'] = verse['text']
+    else:
+        # Create source-specific text columns
+        for source in dict.fromkeys(sources):
+            verse[f'text_{source}'] = " ".join(
+                text for text, text_source in zip(texts, sources) if text_source == source
+            )
+    return verse
+
+def iter_verses(tokens):
+    """Group a token stream into verse records, skipping verses without text"""
+    chapter = verse_num = None
+    section = verse_section = None
+    segments = []
+
+    for kind, token_chapter, token_verse, color, text in tokens:
+        if kind == TOKEN_SEGMENT:
+            segments.append((color, text))
+        elif kind == TOKEN_VERSE:
+            if segments:
+                yield build_verse(chapter, verse_num, segments, verse_section)
+                segments = []
+            chapter, verse_num, verse_section = token_chapter, token_verse, section
+        elif kind == TOKEN_SECTION:
+            section = text
+
+    if segments:
+        yield build_verse(chapter, verse_num, segments, verse_section)
+
+def iter_wikitext_file(file_path, plain_color=None):
+    """Stream verses with their sources from a wikitext file"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    return iter_verses(tokenize_wikitext(content, plain_color))
+
+def parse_wikitext_file(file_path, plain_color=None):
+    """Parse a wikitext file to extract verses with their sources"""
+    return list(iter_wikitext_file(file_path, plain_color))
+
+def parse_wikitext_files(file_paths, jobs=1, plain_colors=None):
+    """Parse several wikitext files, in a process pool when jobs > 1.
+
+    plain_colors optionally gives a plain_color per file. Returns one verse
+    list per file, in the order of file_paths.
+    """
+    file_paths = list(file_paths)
+    if plain_colors is None:
+        plain_colors = [None] * len(file_paths)
+    if jobs > 1 and len(file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(parse_wikitext_file, file_paths, plain_colors))
+    return [parse_wikitext_file(path, color) for path, color in zip(file_paths, plain_colors)]
+
+def parse_wikitext_directory(directory="wiki_markdown", jobs=1):
+    """Parse every .wikitext file in a directory, returning {file stem: verses}"""
+    file_names = sorted(name for name in os.listdir(directory) if name.endswith(".wikitext"))
+    results = parse_wikitext_files([os.path.join(directory, name) for name in file_names], jobs=jobs)
+    return {name[:-len(".wikitext")]: verses for name, verses in zip(file_names, results)}
+
+def verse_text_key(text):
+    """Normalise verse text for matching the same verse across files"""
+    return " ".join(re.sub(r"[^\w\s]", "", text).lower().split())
+
+class VerseTextIndex:
+    """Locate quoted verse text in a book to recover its canonical reference.
+
+    Source pages quote book verses under their own section numbering, often
+    splitting one book verse over several numbered lines. find() matches a
+    quote against the normalised text of the whole book at word boundaries,
+    so a whole verse, a fragment of one or a quote running into the next
+    verse all resolve to the verse the quote starts in.
+    """
     
-    os.makedirs(output_dir, exist_ok=True)
-    analysis_path = os.path.join(output_dir, f"{book_name}_analysis.jsonl")
+    def __init__(self, verses, book_name):
+        keys = [verse_text_key(verse['text']) for verse in verses]
+        self.references = [(book_name, verse['chapter'], verse['verse']) for verse in verses]
+        # Each verse key is preceded by one space; offsets[i] is that space
+        self.text = " " + " ".join(keys) + " "
+        self.offsets = list(accumulate((len(key) + 1 for key in keys[:-1]), initial=0))
+        self.exact = defaultdict(list)
+        for position, key in enumerate(keys):
+            self.exact[key].append(position)
     
-    with open(analysis_path, 'w', encoding='utf-8') as f:
-        for verse in verses:
-            sources = verse['source'] if isinstance(verse['source'], list) else [verse['source']]
-            
-            # Create analysis prompts
-            analysis_examples = [
-                {
-                    "task": "source_identification",
-                    "prompt": f"Identify the documentary sources in this verse: {verse['text']}",
-                    "answer": f"Sources: {', '.join(sources)}",
-                    "metadata": {"verse_id": f"{book_name}_{verse['chapter']}_{verse['verse']}"}
-                },
-                {
-                    "task": "redaction_analysis", 
-                    "prompt": f"Analyze the redaction process in: {verse['text']}",
-                    "answer": f"Redaction indicators: {'Complex redaction' if len(sources) > 2 else 'Simple redaction' if len(sources) > 1 else 'No redaction'}",
-                    "metadata": {"verse_id": f"{book_name}_{verse['chapter']}_{verse['verse']}"}
-                },
-                {
-                    "task": "source_characteristics",
-                    "prompt": f"What are the characteristics of each source in: {verse['text']}?",
-                    "answer": f"Source breakdown: {json.dumps({s: verse.get(f'text_{s}', '') for s in sources})}",
-                    "metadata": {"verse_id": f"{book_name}_{verse['chapter']}_{verse['verse']}"}
-                }
-            ]
-            
-            for example in analysis_examples:
-                f.write(json.dumps(example, ensure_ascii=False) + '\n')
+    def __len__(self):
+        return len(self.references)
     
-    print(f"[SUCCESS] Analysis dataset written: {analysis_path}")
+    def find(self, text, start=0):
+        """Return the position of the verse a quote comes from, or None.
 
-def write_html_preview(verses, book_name, output_dir):
-    """Write HTML preview with color-coded sources"""
-    
-    os.makedirs(output_dir, exist_ok=True)
-    html_path = os.path.join(output_dir, f"{book_name}.html")
-    
-    # Source color mapping for HTML display
-    source_colors = {
-        "J": "#000088",  # Navy blue
-        "E": "#008888",  # Teal
-        "P": "#888800",  # Olive yellow
-        "R": "#880000",  # Maroon red
-        "UNKNOWN": "#666666",  # Grey for unknown
-    }
-    
-    html_content = f"""
+        A whole-verse match wins. Otherwise the first occurrence at or after
+        verse position start is taken, falling back to the first one in the
+        book, so consecutive quotes resolve to consecutive verses.
+        """
+        key = verse_text_key(text)
+        if not key:
+            return None
+        positions = self.exact.get(key)
+        if positions:
+            return next((position for position in positions if position >= start), positions[0])
+        needle = f" {key} "
+        offset = -1
+        if start < len(self.offsets):
+            offset = self.text.find(needle, self.offsets[start])
+        if offset < 0:
+            offset = self.text.find(needle)
+        if offset < 0:
+            return None
+        return bisect_right(self.offsets, offset) - 1
+
+# Buffer size for artifact files; each sink writes through its own buffer
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Shared encoder for JSONL records, same output as json.dumps(..., ensure_ascii=False)
+JSONL_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+CSV_COLUMNS = [
+    'book', 'chapter', 'verse', 'verse_id', 'canonical_reference',
+    'full_text', 'text_clean', 'word_count',
+    'sources', 'source_count', 'primary_source', 'source_sequence',
+    'text_J', 'text_E', 'text_P', 'text_D', 'text_R', 'text_UNKNOWN',
+    'source_percentages', 'source_confidence',
+    'narrative_context', 'theological_themes', 'literary_features',
+    'cross_references', 'redaction_indicators', 'source_boundaries',
+    'translation_notes', 'scholarly_notes', 'metadata'
+]
+
+# Source color mapping for HTML display
+HTML_SOURCE_COLORS = {
+    "J": "#000088",  # Navy blue
+    "E": "#008888",  # Teal
+    "P": "#888800",  # Olive yellow
+    "R": "#880000",  # Maroon red
+    "UNKNOWN": "#666666",  # Grey for unknown
+}
+
+HTML_HEADER_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -471,28 +459,28 @@ def write_html_preview(verses, book_name, output_dir):
 <body>
     <div class="header">
         <h1>{book_name} Source Analysis</h1>
-        <p>Documentary Hypothesis Source Analysis - Generated from Wikitext on {time.strftime("%Y-%m-%d %H:%M:%S")}</p>
+        <p>Documentary Hypothesis Source Analysis - Generated from Wikitext by parser v{parser_version}</p>
     </div>
     
     <div class="legend">
         <div class="legend-item">
-            <div class="color-box" style="background-color: {source_colors.get('J', '#000088')}"></div>
+            <div class="color-box" style="background-color: {color_J}"></div>
             <span><strong>J</strong> - Jahwist Source</span>
         </div>
         <div class="legend-item">
-            <div class="color-box" style="background-color: {source_colors.get('E', '#008888')}"></div>
+            <div class="color-box" style="background-color: {color_E}"></div>
             <span><strong>E</strong> - Elohist Source</span>
         </div>
         <div class="legend-item">
-            <div class="color-box" style="background-color: {source_colors.get('P', '#888800')}"></div>
+            <div class="color-box" style="background-color: {color_P}"></div>
             <span><strong>P</strong> - Priestly Source</span>
         </div>
         <div class="legend-item">
-            <div class="color-box" style="background-color: {source_colors.get('D', '#000000')}"></div>
+            <div class="color-box" style="background-color: {color_D}"></div>
             <span><strong>D</strong> - Deuteronomist Source</span>
         </div>
         <div class="legend-item">
-            <div class="color-box" style="background-color: {source_colors.get('R', '#880000')}"></div>
+            <div class="color-box" style="background-color: {color_R}"></div>
             <span><strong>R</strong> - Redactor</span>
         </div>
         <div class="legend-item">
@@ -501,135 +489,832 @@ def write_html_preview(verses, book_name, output_dir):
         </div>
     </div>
 """
+
+def derive_verse_fields(verse, book_name):
+    """Compute the derived per-verse fields shared by every output format"""
+    # Convert lists to strings for CSV
+    sources = verse['source'] if isinstance(verse['source'], list) else [verse['source']]
+    source_count = len(sources)
     
-    # Add statistics
-    source_counts = Counter()
-    multi_source_count = 0
-    for verse in verses:
-        if isinstance(verse['source'], list):
-            if len(verse['source']) > 1:
-                multi_source_count += 1
-            for source in verse['source']:
-                source_counts[source] += 1
+    # Clean text (remove extra spaces, normalize)
+    text_clean = ' '.join(verse['text'].split())
+    
+    # Calculate source percentages
+    source_percentages = {}
+    total_chars = len(verse['text'])
+    for source in ['J', 'E', 'P', 'D', 'R', 'UNKNOWN']:
+        source_text = verse.get(f'text_{source}', '')
+        if source_text and total_chars > 0:
+            source_percentages[source] = round((len(source_text) / total_chars) * 100, 1)
         else:
-            source_counts[verse['source']] += 1
+            source_percentages[source] = 0.0
+    
+    # Redaction indicators
+    redaction_indicators = []
+    if source_count > 1:
+        redaction_indicators.append("multi_source")
+    if 'R' in sources:
+        redaction_indicators.append("redactor_present")
+    if source_count > 2:
+        redaction_indicators.append("complex_redaction")
+    
+    # Source boundaries: exact character span of every segment of the verse text
+    spans = verse.get('spans', [])
+    
+    # Metadata as JSON
+    metadata = {
+        "parsing_version": PARSER_VERSION,
+        "source_colors": verse.get('color', []),
+        "segments": verse.get('segments', 1),
+        "has_redaction": 'R' in sources,
+        "is_multi_source": source_count > 1,
+        "source_complexity": "high" if source_count > 2 else "medium" if source_count > 1 else "low"
+    }
+    
+    return {
+        'sources': sources,
+        'sources_str': ';'.join(sources),
+        'source_count': source_count,
+        'primary_source': sources[0] if sources else "UNKNOWN",
+        'source_sequence': '->'.join(sources),
+        'verse_id': f"{book_name}_{verse['chapter']}_{verse['verse']}",
+        'canonical_reference': f"{book_name} {verse['chapter']}:{verse['verse']}",
+        'text_clean': text_clean,
+        'word_count': len(text_clean.split()),
+        'source_percentages': ';'.join([f"{k}:{v}" for k, v in source_percentages.items()]),
+        'source_confidence': "high" if source_count == 1 else "medium" if source_count == 2 else "low",
+        'redaction_indicators': ';'.join(redaction_indicators) if redaction_indicators else "none",
+        'source_boundaries': ';'.join(
+            f"{start}:{end}:{source}:{color}" for start, end, source, color in spans
+        ) if spans else "none",
+        'metadata': json.dumps(metadata),
+        # Unserialized values for typed (columnar) formats
+        'percentage_values': source_percentages,
+        'redaction_indicator_list': redaction_indicators,
+        'source_spans': spans,
+        'metadata_values': metadata,
+    }
+
+def publish_file(temp_path, path):
+    """Move a finished temporary file into place.
+
+    If path already holds identical content it is left untouched and the
+    temporary file is removed. Returns True if path was replaced.
+    """
+    if os.path.exists(path) and filecmp.cmp(temp_path, path, shallow=False):
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, path)
+    return True
+
+class OutputSink:
+    """One output format of the fused book writer.
+
+    Subclasses set suffix (appended to the book name to form the file name)
+    and label, and implement write(). New formats are enabled by adding the
+    subclass to OUTPUT_FORMATS.
+
+    JSONL sinks are shardable: given dataset_options (the keyword arguments
+    of ShardedJsonlWriter, e.g. {"compression": "gzip", "shard_records":
+    10000}) they write fixed-size, optionally compressed shards plus a shard
+    index instead of a single file, and the index is the published path.
+    """
+    suffix = ""
+    label = ""
+    newline = None
+    binary = False
+    shardable = False
     
-    html_content += f"""
+    def __init__(self, book_name, output_dir, dataset_options=None):
+        self.book_name = book_name
+        self.path = os.path.join(output_dir, f"{book_name}{self.suffix}")
+        # Write to a temporary file so the published file (which may share its
+        # inode with an artifact store blob) is only ever replaced, never rewritten
+        self.temp_path = self.path + ".tmp"
+        self.sharded = self.shardable and dataset_options is not None
+        if self.sharded:
+            self.file = ShardedJsonlWriter(os.path.splitext(self.path)[0], **dataset_options)
+            self.path = self.file.index_path
+        elif self.binary:
+            self.file = open(self.temp_path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        else:
+            self.file = open(self.temp_path, 'w', newline=self.newline, encoding='utf-8',
+                             buffering=WRITE_BUFFER_SIZE)
+    
+    def write(self, verse, fields):
+        """Write one verse given its derived fields"""
+        raise NotImplementedError
+    
+    def finish(self):
+        """Write anything that has to follow the last verse"""
+    
+    def close(self):
+        """Finish and publish the file, returning its path.
+
+        If the new content is identical to the existing file, the existing
+        file is kept as is.
+        """
+        self.finish()
+        self.file.close()
+        if self.sharded:
+            changed = self.file.publish(publish_file)
+        else:
+            changed = publish_file(self.temp_path, self.path)
+        if changed:
+            print(f"[SUCCESS] {self.label} written: {self.path}")
+        else:
+            print(f"[INFO] {self.label} unchanged: {self.path}")
+        return self.path
+    
+    def discard(self):
+        """Close the file and remove it without publishing"""
+        if self.sharded:
+            self.file.discard()
+            return
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+class CsvSink(OutputSink):
+    """Enhanced CSV file optimized for LLM training"""
+    suffix = ".csv"
+    label = "Enhanced CSV"
+    newline = ''
+    
+    def __init__(self, book_name, output_dir):
+        super().__init__(book_name, output_dir)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_COLUMNS)
+    
+    def write(self, verse, fields):
+        self.writer.writerow([
+            self.book_name,
+            verse['chapter'],
+            verse['verse'],
+            fields['verse_id'],
+            fields['canonical_reference'],
+            verse['text'],
+            fields['text_clean'],
+            fields['word_count'],
+            fields['sources_str'],
+            fields['source_count'],
+            fields['primary_source'],
+            fields['source_sequence'],
+            verse.get('text_J', ''),
+            verse.get('text_E', ''),
+            verse.get('text_P', ''),
+            verse.get('text_D', ''),
+            verse.get('text_R', ''),
+            verse.get('text_UNKNOWN', ''),
+            fields['source_percentages'],
+            fields['source_confidence'],
+            "",  # narrative_context - could be filled with AI analysis
+            "",  # theological_themes - could be filled with AI analysis
+            "",  # literary_features - could be filled with AI analysis
+            "",  # cross_references - could be filled with AI analysis
+            fields['redaction_indicators'],
+            fields['source_boundaries'],
+            "",  # translation_notes
+            "",  # scholarly_notes
+            fields['metadata']
+        ])
+
+class TrainingSink(OutputSink):
+    """JSONL instruction examples for fine-tuning"""
+    suffix = "_training.jsonl"
+    label = "Training dataset"
+    shardable = True
+    
+    def write(self, verse, fields):
+        sources = fields['sources']
+        training_example = {
+            "instruction": "Analyze the source composition of this biblical verse.",
+            "input": f"Verse: {verse['text']}\nReference: {fields['canonical_reference']}",
+            "output": f"This verse contains {len(sources)} source(s): {', '.join(sources)}. " + 
+                     f"Primary source: {sources[0] if sources else 'UNKNOWN'}.",
+            "metadata": {
+                "book": self.book_name,
+                "chapter": verse['chapter'],
+                "verse": verse['verse'],
+                "sources": sources,
+                "is_multi_source": len(sources) > 1,
+                "source_spans": fields['source_spans']
+            }
+        }
+        self.file.write(JSONL_ENCODER.encode(training_example) + '\n')
+
+class ClassificationSink(OutputSink):
+    """Per-source binary classification examples"""
+    suffix = "_classification.jsonl"
+    label = "Classification dataset"
+    shardable = True
+    
+    def write(self, verse, fields):
+        sources = fields['sources']
+        # The four records differ only in label and source, so the shared
+        # text and metadata are encoded once
+        text_json = JSONL_ENCODER.encode(verse['text'])
+        metadata_json = JSONL_ENCODER.encode({
+            "book": self.book_name,
+            "chapter": verse['chapter'],
+            "verse": verse['verse'],
+            "all_sources": sources,
+            "source_spans": fields['source_spans']
+        })
+        self.file.write(''.join(
+            f'{{"text": {text_json}, "label": {1 if source in sources else 0}, '
+            f'"source": "{source}", "metadata": {metadata_json}}}\n'
+            for source in ['J', 'E', 'P', 'R']
+        ))
+
+class SequenceSink(OutputSink):
+    """Token-level BIO sequence labeling examples for identifying source boundaries"""
+    suffix = "_sequence.jsonl"
+    label = "Sequence dataset"
+    shardable = True
+    
+    def write(self, verse, fields):
+        text = verse['text']
+        token_spans, labels = label_verse_tokens(verse)
+        sequence_example = {
+            "text": text,
+            "tokens": [text[start:end] for start, end in token_spans],
+            "offsets": token_spans,
+            "labels": labels,
+            "metadata": {
+                "book": self.book_name,
+                "chapter": verse['chapter'],
+                "verse": verse['verse'],
+                "is_multi_source": fields['source_count'] > 1,
+                "source_sequence": fields['source_sequence'],
+                "source_spans": fields['source_spans']
+            }
+        }
+        self.file.write(JSONL_ENCODER.encode(sequence_example) + '\n')
+
+class AnalysisSink(OutputSink):
+    """Prompts for complex source analysis tasks"""
+    suffix = "_analysis.jsonl"
+    label = "Analysis dataset"
+    shardable = True
+    
+    def write(self, verse, fields):
+        sources = fields['sources']
+        metadata = {"verse_id": fields['verse_id'], "source_spans": fields['source_spans']}
+        analysis_examples = [
+            {
+                "task": "source_identification",
+                "prompt": f"Identify the documentary sources in this verse: {verse['text']}",
+                "answer": f"Sources: {', '.join(sources)}",
+                "metadata": metadata
+            },
+            {
+                "task": "redaction_analysis", 
+                "prompt": f"Analyze the redaction process in: {verse['text']}",
+                "answer": f"Redaction indicators: {'Complex redaction' if len(sources) > 2 else 'Simple redaction' if len(sources) > 1 else 'No redaction'}",
+                "metadata": metadata
+            },
+            {
+                "task": "source_characteristics",
+                "prompt": f"What are the characteristics of each source in: {verse['text']}?",
+                "answer": f"Source breakdown: {json.dumps({s: verse.get(f'text_{s}', '') for s in sources})}",
+                "metadata": metadata
+            }
+        ]
+        self.file.write(''.join(JSONL_ENCODER.encode(example) + '\n' for example in analysis_examples))
+
+# Sources with a float percentage column in the typed verse table
+PERCENTAGE_SOURCES = ['J', 'E', 'P', 'D', 'R', 'UNKNOWN']
+
+def verse_table_schema():
+    """Arrow schema of the typed verse table written by the parquet format.
+
+    Same data as the enhanced CSV, but lists are native list columns, the
+    source percentages are one float column per source (pct_J, pct_E, ...),
+    the metadata JSON is flattened into columns and low-cardinality strings
+    are dictionary encoded (categoricals in pandas).
+    """
+    categorical = pa.dictionary(pa.int8(), pa.string())
+    string_list = pa.list_(pa.string())
+    fields = [
+        ('book', categorical),
+        ('chapter', pa.int16()),
+        ('verse', pa.int16()),
+        ('verse_id', pa.string()),
+        ('canonical_reference', pa.string()),
+        ('full_text', pa.string()),
+        ('text_clean', pa.string()),
+        ('word_count', pa.int32()),
+        ('sources', string_list),
+        ('source_count', pa.int8()),
+        ('primary_source', categorical),
+        ('source_sequence', string_list),
+    ]
+    fields += [(f'text_{source}', pa.string()) for source in PERCENTAGE_SOURCES]
+    fields += [(f'pct_{source}', pa.float64()) for source in PERCENTAGE_SOURCES]
+    fields += [
+        ('source_confidence', categorical),
+        ('redaction_indicators', string_list),
+        ('source_spans', pa.list_(pa.struct([
+            ('start', pa.int32()),
+            ('end', pa.int32()),
+            ('source', pa.string()),
+            ('color', pa.string()),
+        ]))),
+        ('source_colors', string_list),
+        ('segments', pa.int16()),
+        ('has_redaction', pa.bool_()),
+        ('is_multi_source', pa.bool_()),
+        ('source_complexity', categorical),
+    ]
+    return pa.schema(fields, metadata={'parsing_version': PARSER_VERSION})
+
+class ParquetSink(OutputSink):
+    """Typed columnar verse table (Apache Parquet, requires pyarrow)"""
+    suffix = ".parquet"
+    label = "Parquet verse table"
+    binary = True
+    
+    def __init__(self, book_name, output_dir):
+        if pa is None:
+            raise RuntimeError("The parquet format requires pyarrow (pip install pyarrow)")
+        super().__init__(book_name, output_dir)
+        self.schema = verse_table_schema()
+        self.columns = {name: [] for name in self.schema.names}
+    
+    def write(self, verse, fields):
+        columns = self.columns
+        metadata = fields['metadata_values']
+        columns['book'].append(self.book_name)
+        columns['chapter'].append(int(verse['chapter']))
+        columns['verse'].append(int(verse['verse']))
+        columns['verse_id'].append(fields['verse_id'])
+        columns['canonical_reference'].append(fields['canonical_reference'])
+        columns['full_text'].append(verse['text'])
+        columns['text_clean'].append(fields['text_clean'])
+        columns['word_count'].append(fields['word_count'])
+        columns['sources'].append(fields['sources'])
+        columns['source_count'].append(fields['source_count'])
+        columns['primary_source'].append(fields['primary_source'])
+        columns['source_sequence'].append(fields['sources'])
+        for source in PERCENTAGE_SOURCES:
+            columns[f'text_{source}'].append(verse.get(f'text_{source}', ''))
+            columns[f'pct_{source}'].append(fields['percentage_values'][source])
+        columns['source_confidence'].append(fields['source_confidence'])
+        columns['redaction_indicators'].append(fields['redaction_indicator_list'])
+        columns['source_spans'].append([
+            {'start': start, 'end': end, 'source': source, 'color': color}
+            for start, end, source, color in fields['source_spans']
+        ])
+        columns['source_colors'].append(metadata['source_colors'])
+        columns['segments'].append(metadata['segments'])
+        columns['has_redaction'].append(metadata['has_redaction'])
+        columns['is_multi_source'].append(metadata['is_multi_source'])
+        columns['source_complexity'].append(metadata['source_complexity'])
+    
+    def finish(self):
+        table = pa.Table.from_pydict(self.columns, schema=self.schema)
+        pq.write_table(table, self.file, compression='zstd')
+
+def render_html_header(book_name):
+    """Render the page head, title block and source legend.
+
+    The header carries the parser version rather than a wall-clock time, so
+    identical input always renders identical bytes and an unchanged book
+    adds no new version to the artifact store.
+    """
+    return HTML_HEADER_TEMPLATE.format(
+        book_name=book_name,
+        parser_version=PARSER_VERSION,
+        color_J=HTML_SOURCE_COLORS.get('J', '#000088'),
+        color_E=HTML_SOURCE_COLORS.get('E', '#008888'),
+        color_P=HTML_SOURCE_COLORS.get('P', '#888800'),
+        color_D=HTML_SOURCE_COLORS.get('D', '#000000'),
+        color_R=HTML_SOURCE_COLORS.get('R', '#880000'),
+    )
+
+def render_html_stats(verse_count, chapter_count, multi_source_count, source_counts):
+    """Render the statistics block"""
+    parts = [f"""
     <div class="stats">
         <h3>Statistics</h3>
         <div class="stats-grid">
             <div class="stat-item">
-                <div class="stat-number">{len(verses)}</div>
+                <div class="stat-number">{verse_count}</div>
                 <div class="stat-label">Total Verses</div>
             </div>
             <div class="stat-item">
-                <div class="stat-number">{len(set(v['chapter'] for v in verses))}</div>
+                <div class="stat-number">{chapter_count}</div>
                 <div class="stat-label">Chapters</div>
             </div>
             <div class="stat-item">
                 <div class="stat-number">{multi_source_count}</div>
                 <div class="stat-label">Multi-Source Verses</div>
             </div>
-"""
-    
+"""]
     for source, count in source_counts.most_common():
-        html_content += f"""
+        parts.append(f"""
             <div class="stat-item">
                 <div class="stat-number">{count}</div>
                 <div class="stat-label">{source} Source</div>
             </div>
-"""
-    
-    html_content += """
+""")
+    parts.append("""
         </div>
     </div>
-"""
+""")
+    return "".join(parts)
+
+def render_html_chapter_start(chapter, element_id=None):
+    """Render the opening of a chapter section"""
+    id_attr = f' id="{element_id}"' if element_id else ''
+    return f'<div class="chapter"{id_attr}>\n<h2 class="chapter-title">Chapter {chapter}</h2>\n'
+
+def render_html_verse(verse, sources):
+    """Render one verse block with its source tags"""
+    if len(sources) > 1:
+        # Multi-source verse
+        source_tags = []
+        for source in sources:
+            color = HTML_SOURCE_COLORS.get(source, "#666666")
+            source_tags.append(f'<span class="source-tag" style="background-color: {color}">{source}</span>')
+        source_tag_html = f'<span class="source-tag multi-source">Multi-Source</span> {" ".join(source_tags)}'
+    else:
+        color = HTML_SOURCE_COLORS.get(sources[0], "#666666")
+        source_tag_html = f'<span class="source-tag" style="background-color: {color}">{sources[0]}</span>'
     
-    # Add verses by chapter
-    current_chapter = None
-    for verse in verses:
-        if verse['chapter'] != current_chapter:
-            if current_chapter is not None:
-                html_content += "</div>\n"  # Close previous chapter
-            html_content += f'<div class="chapter">\n'
-            html_content += f'<h2 class="chapter-title">Chapter {verse["chapter"]}</h2>\n'
-            current_chapter = verse['chapter']
-        
-        # Create source tags
-        if isinstance(verse['source'], list):
-            if len(verse['source']) > 1:
-                # Multi-source verse
-                source_tags = []
-                for i, source in enumerate(verse['source']):
-                    color = source_colors.get(source, "#666666")
-                    source_tags.append(f'<span class="source-tag" style="background-color: {color}">{source}</span>')
-                source_tag_html = ' '.join(source_tags)
-                source_tag_html = f'<span class="source-tag multi-source">Multi-Source</span> {source_tag_html}'
-            else:
-                # Single source in list format
-                color = source_colors.get(verse['source'][0], "#666666")
-                source_tag_html = f'<span class="source-tag" style="background-color: {color}">{verse["source"][0]}</span>'
-        else:
-            # Single source (backward compatibility)
-            color = source_colors.get(verse['source'], "#666666")
-            source_tag_html = f'<span class="source-tag" style="background-color: {color}">{verse["source"]}</span>'
-        
-        html_content += f"""
+    # Colour each segment by its source, keeping its character span
+    text = verse['text']
+    text_html = " ".join(
+        f'<span class="segment" data-source="{source}" data-start="{start}" data-end="{end}" '
+        f'style="color: {HTML_SOURCE_COLORS.get(source, "#666666")}">{text[start:end]}</span>'
+        for start, end, source, _ in verse.get('spans', [])
+    ) or text
+    
+    return f"""
         <div class="verse">
             <div class="verse-header">
                 Verse {verse['verse']} {source_tag_html}
             </div>
-            <div class="text">{verse['text']}</div>
+            <div class="text">{text_html}</div>
         </div>
 """
-    
-    if current_chapter is not None:
-        html_content += "</div>\n"  # Close last chapter
-    
-    html_content += """
+
+HTML_CHAPTER_END = "</div>\n"
+
+HTML_FOOTER = """
 </body>
 </html>
 """
+
+class HtmlSink(OutputSink):
+    """HTML preview with color-coded sources.
+
+    Chapter sections and verse blocks are streamed as they arrive. The
+    statistics block precedes them on the page, so they are spooled to a
+    temporary file and copied in after the header once the last verse has
+    been seen; memory use does not grow with the size of the book.
+    """
+    suffix = ".html"
+    label = "HTML preview"
+    
+    def __init__(self, book_name, output_dir):
+        super().__init__(book_name, output_dir)
+        self.output_dir = output_dir
+        self.source_counts = Counter()
+        self.multi_source_count = 0
+        self.verse_count = 0
+        self.chapters = set()
+        self.current_chapter = None
+        self.body = self.open_body()
+    
+    def open_body(self):
+        """Open the stream that chapter sections and verse blocks go to"""
+        return tempfile.TemporaryFile('w+', encoding='utf-8', newline='', dir=self.output_dir)
+    
+    def start_chapter(self, chapter):
+        self.body.write(render_html_chapter_start(chapter))
+    
+    def end_chapter(self):
+        self.body.write(HTML_CHAPTER_END)
+    
+    def write(self, verse, fields):
+        sources = fields['sources']
+        self.verse_count += 1
+        self.chapters.add(verse['chapter'])
+        if len(sources) > 1:
+            self.multi_source_count += 1
+        self.source_counts.update(sources)
+        
+        if verse['chapter'] != self.current_chapter:
+            if self.current_chapter is not None:
+                self.end_chapter()  # Close previous chapter
+            self.start_chapter(verse['chapter'])
+            self.current_chapter = verse['chapter']
+        
+        self.body.write(render_html_verse(verse, sources))
+    
+    def write_page_start(self):
+        """Write the header and statistics block"""
+        self.file.write(render_html_header(self.book_name))
+        self.file.write(render_html_stats(self.verse_count, len(self.chapters),
+                                          self.multi_source_count, self.source_counts))
     
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    def finish(self):
+        if self.current_chapter is not None:
+            self.end_chapter()  # Close last chapter
+        self.write_page_start()
+        
+        # Add verses by chapter
+        self.body.seek(0)
+        shutil.copyfileobj(self.body, self.file, WRITE_BUFFER_SIZE)
+        self.body.close()
+        self.file.write(HTML_FOOTER)
+    
+    def close(self):
+        path = super().close()
+        print(f"[TIP] Open {path} in your web browser to view the full analysis")
+        return path
     
-    print(f"[SUCCESS] HTML preview written: {html_path}")
-    print(f"[TIP] Open {html_path} in your web browser to view the full analysis")
+    def discard(self):
+        if self.body is not None:
+            self.body.close()
+        super().discard()
+
+HTML_CHAPTER_INDEX_TEMPLATE = """
+    <div class="chapter-nav" style="display: flex; flex-wrap: wrap; gap: 10px; margin-bottom: 30px;">
+{links}
+    </div>
+    <div id="chapter-content"><div class="chapter"><p>Select a chapter to load it.</p></div></div>
+    <script>
+        document.querySelectorAll('.chapter-nav a').forEach(function (link) {{
+            link.addEventListener('click', async function (event) {{
+                event.preventDefault();
+                const response = await fetch(link.getAttribute('href'));
+                document.getElementById('chapter-content').innerHTML = await response.text();
+            }});
+        }});
+    </script>
+"""
 
-def create_latest_files(book_name, output_dir):
-    """Create timestamped and latest files for a book"""
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
+class HtmlChaptersSink(HtmlSink):
+    """HTML preview split into one fragment per chapter plus an index page.
+
+    Fragments are written to chapters/<Book>_<chapter>.html next to the index
+    and hold a single chapter section, so a reader can fetch one chapter
+    instead of the whole book.
+    """
+    suffix = "_index.html"
+    label = "HTML chapter index"
+    chapter_dir_name = "chapters"
     
-    # Source files
-    csv_source = os.path.join(output_dir, f"{book_name}.csv")
-    html_source = os.path.join(output_dir, f"{book_name}.html")
+    def open_body(self):
+        self.chapter_dir = os.path.join(self.output_dir, self.chapter_dir_name)
+        os.makedirs(self.chapter_dir, exist_ok=True)
+        self.fragments = []
+        return None
     
-    # Timestamped files
-    csv_timestamped = os.path.join(output_dir, f"{book_name}_{timestamp}.csv")
-    html_timestamped = os.path.join(output_dir, f"{book_name}_{timestamp}.html")
+    def fragment_name(self, chapter):
+        return f"{self.book_name}_{chapter}.html"
     
-    # Latest files
-    latest_csv = os.path.join(output_dir, f"{book_name}_latest.csv")
-    latest_html = os.path.join(output_dir, f"{book_name}_latest.html")
+    def start_chapter(self, chapter):
+        fragment_path = os.path.join(self.chapter_dir, self.fragment_name(chapter))
+        self.body = open(fragment_path + ".tmp", 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+        self.body.write(render_html_chapter_start(chapter, element_id=f"chapter-{chapter}"))
+        self.fragments.append((chapter, fragment_path))
     
-    # Create timestamped copies
-    if os.path.exists(csv_source):
-        shutil.copy2(csv_source, csv_timestamped)
-        print(f"[SUCCESS] Timestamped CSV: {csv_timestamped}")
+    def end_chapter(self):
+        self.body.write(HTML_CHAPTER_END)
+        self.body.close()
+        self.body = None
+        fragment_path = self.fragments[-1][1]
+        publish_file(fragment_path + ".tmp", fragment_path)
     
-    if os.path.exists(html_source):
-        shutil.copy2(html_source, html_timestamped)
-        print(f"[SUCCESS] Timestamped HTML: {html_timestamped}")
+    def finish(self):
+        if self.current_chapter is not None:
+            self.end_chapter()  # Close last chapter
+        self.write_page_start()
+        links = "\n".join(
+            f'        <a href="{self.chapter_dir_name}/{os.path.basename(path)}">Chapter {chapter}</a>'
+            for chapter, path in self.fragments
+        )
+        self.file.write(HTML_CHAPTER_INDEX_TEMPLATE.format(links=links))
+        self.file.write(HTML_FOOTER)
     
-    # Create 'latest' files (overwrite existing)
-    if os.path.exists(csv_source):
-        shutil.copy2(csv_source, latest_csv)
-        print(f"[SUCCESS] Latest CSV: {latest_csv}")
+    def close(self):
+        path = OutputSink.close(self)
+        print(f"[SUCCESS] {len(self.fragments)} chapter fragments written: {self.chapter_dir}")
+        return path
     
-    if os.path.exists(html_source):
-        shutil.copy2(html_source, latest_html)
-        print(f"[SUCCESS] Latest HTML: {latest_html}")
+    def discard(self):
+        if self.body is not None:
+            # The open fragment is unpublished; published ones are kept
+            self.body.close()
+            fragment_temp_path = self.fragments[-1][1] + ".tmp"
+            if os.path.exists(fragment_temp_path):
+                os.remove(fragment_temp_path)
+            self.body = None
+        OutputSink.discard(self)
+
+# Output formats of the fused writer, in write order
+OUTPUT_FORMATS = {
+    "csv": CsvSink,
+    "html": HtmlSink,
+    "html_chapters": HtmlChaptersSink,
+    "training": TrainingSink,
+    "classification": ClassificationSink,
+    "sequence": SequenceSink,
+    "analysis": AnalysisSink,
+    "parquet": ParquetSink,
+}
+
+# Formats written when none are requested explicitly
+DEFAULT_FORMATS = ("csv", "html", "training", "classification", "sequence", "analysis")
+
+TRAINING_FORMATS = ("training", "classification", "sequence")
+
+def write_book_outputs(verses, book_name, output_dir, formats=None, dataset_options=None):
+    """Write every enabled output format for a book in a single pass over its verses.
+
+    Derived fields are computed once per verse and fanned out to one sink per
+    format. With dataset_options the JSONL datasets are written as shards
+    (see OutputSink). Returns a dict mapping each format name to the file it
+    wrote (the shard index for sharded datasets).
+    """
+    if formats is None:
+        formats = DEFAULT_FORMATS
+    unknown = [name for name in formats if name not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)}")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    sinks = []
+    try:
+        for name in formats:
+            if OUTPUT_FORMATS[name].shardable:
+                sinks.append(OUTPUT_FORMATS[name](book_name, output_dir, dataset_options=dataset_options))
+            else:
+                sinks.append(OUTPUT_FORMATS[name](book_name, output_dir))
+        
+        for verse in verses:
+            fields = derive_verse_fields(verse, book_name)
+            for sink in sinks:
+                sink.write(verse, fields)
+        
+    except BaseException:
+        for sink in sinks:
+            sink.discard()
+        raise
+    
+    return {name: sink.close() for name, sink in zip(formats, sinks)}
+
+def write_csv_output(verses, book_name, output_dir):
+    """Write verses to enhanced CSV file optimized for LLM training"""
+    return write_book_outputs(verses, book_name, output_dir, formats=["csv"])["csv"]
+
+def write_training_formats(verses, book_name, output_dir):
+    """Write multiple formats optimized for different LLM training approaches"""
+    write_book_outputs(verses, book_name, output_dir, formats=TRAINING_FORMATS)
+
+def write_analysis_dataset(verses, book_name, output_dir):
+    """Create dataset for complex source analysis tasks"""
+    write_book_outputs(verses, book_name, output_dir, formats=["analysis"])
+
+def write_html_preview(verses, book_name, output_dir, split=False):
+    """Write HTML preview with color-coded sources, optionally split into chapter fragments"""
+    formats = ["html_chapters"] if split else ["html"]
+    write_book_outputs(verses, book_name, output_dir, formats=formats)
+
+# Content-addressed artifact store, shared by all books under the output root.
+# Blobs have no file extension so "**/*.csv" style globs never see them.
+ARTIFACT_STORE_DIR = ".store"
+
+def load_json_file(file_path):
+    """Load a JSON file, or return None if it is missing or unreadable"""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def file_sha256(file_path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def artifact_store_dir(output_dir):
+    """Return the artifact store of the output root that holds a book directory"""
+    return os.path.join(os.path.dirname(os.path.normpath(output_dir)), ARTIFACT_STORE_DIR)
+
+def artifact_blob_path(store_dir, sha256):
+    """Return the store path of the blob with the given hash"""
+    return os.path.join(store_dir, sha256[:2], sha256)
+
+def store_artifact(file_path, store_dir):
+    """Add a file to the artifact store and return its SHA-256.
+
+    The blob is a hard link to the file when the filesystem allows it and a
+    copy otherwise. Content already in the store is not written again, even
+    when another worker stores the same content concurrently: an existing
+    blob may be a hard link to another book's published file, so it must
+    never be written through.
+    """
+    sha256 = file_sha256(file_path)
+    blob_path = artifact_blob_path(store_dir, sha256)
+    if not os.path.exists(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            os.link(file_path, blob_path)
+        except FileExistsError:
+            pass  # Stored by another worker in the meantime
+        except OSError:
+            # No hard links here (cross-device or unsupported): copy under a
+            # unique name and move the complete copy into place
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), prefix=f"{sha256}.", suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copy2(file_path, temp_path)
+                os.replace(temp_path, blob_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+    return sha256
+
+def store_dataset_shards(index_path, store_dir):
+    """Add every shard listed in a shard index to the artifact store.
+
+    The index records each shard's SHA-256, so a stored index version
+    resolves to its shards through artifact_blob_path().
+    """
+    directory = os.path.dirname(index_path)
+    for shard in load_shard_index(index_path)["shards"]:
+        store_artifact(os.path.join(directory, shard["file"]), store_dir)
+
+def artifact_index_path(book_name, output_dir):
+    """Return the path of a book's artifact index"""
+    return os.path.join(output_dir, f"{book_name}_artifacts.json")
+
+def update_artifact_index(book_name, output_dir, artifact_paths, timestamp=None):
+    """Store a book's artifacts by content hash and record them in its index.
+
+    The index maps "latest" to the current hash of every format and keeps a
+    list of timestamped versions; it replaces the old *_latest and
+    *_<timestamp> file copies. For a sharded dataset the hash is that of its
+    shard index, and the shards it lists are stored alongside it. A new version is only recorded when some
+    artifact changed. Returns the latest {format: sha256} mapping.
+    """
+    if timestamp is None:
+        timestamp = time.strftime("%Y%m%d_%H%M%S", time.gmtime())
+    store_dir = artifact_store_dir(output_dir)
+    latest = {}
+    for fmt, path in artifact_paths.items():
+        latest[fmt] = store_artifact(path, store_dir)
+        if path.endswith(SHARD_INDEX_SUFFIX):
+            store_dataset_shards(path, store_dir)
+    
+    index_path = artifact_index_path(book_name, output_dir)
+    index = load_json_file(index_path) or {"book": book_name, "latest": {}, "versions": []}
+    if index["latest"] == latest:
+        print(f"[INFO] Artifacts unchanged for {book_name}")
+        return latest
+    
+    index["latest"] = latest
+    index["versions"].append({"timestamp": timestamp, "artifacts": latest})
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    print(f"[SUCCESS] Artifact index updated: {index_path} (version {timestamp})")
+    return latest
+
+def resolve_artifact(book_name, output_dir, fmt, timestamp=None):
+    """Return the store path of a book artifact, latest or at a given version"""
+    index = load_json_file(artifact_index_path(book_name, output_dir))
+    if index is None:
+        return None
+    if timestamp is None:
+        sha256 = index["latest"].get(fmt)
+    else:
+        versions = [v for v in index["versions"] if v["timestamp"] <= timestamp]
+        sha256 = versions[-1]["artifacts"].get(fmt) if versions else None
+    if sha256 is None:
+        return None
+    return artifact_blob_path(artifact_store_dir(output_dir), sha256)
+
+def count_sources(verses):
+    """Count segments per source and multi-source verses"""
+    source_counts = Counter()
+    multi_source_count = 0
+    for verse in verses:
+        if isinstance(verse['source'], list):
+            if len(verse['source']) > 1:
+                multi_source_count += 1
+            for source in verse['source']:
+                source_counts[source] += 1
+        else:
+            source_counts[verse['source']] += 1
+    return source_counts, multi_source_count
 
 def process_single_book(book_name):
     """Process a single book interactively"""
@@ -651,16 +1336,7 @@ def process_single_book(book_name):
     print(f"[DEBUG] {book_name.title()}: found {len(verses)} verses")
     
     # Count sources and multi-source verses
-    source_counts = Counter()
-    multi_source_count = 0
-    for verse in verses:
-        if isinstance(verse['source'], list):
-            if len(verse['source']) > 1:
-                multi_source_count += 1
-            for source in verse['source']:
-                source_counts[source] += 1
-        else:
-            source_counts[verse['source']] += 1
+    source_counts, multi_source_count = count_sources(verses)
     
     print(f"[DEBUG] {book_name.title()} source counts: {dict(source_counts)}")
     print(f"[DEBUG] {book_name.title()} multi-source verses: {multi_source_count}")
@@ -686,16 +1362,11 @@ def process_single_book(book_name):
         book_output_dir = os.path.join("output", book_name.title())
         os.makedirs(book_output_dir, exist_ok=True)
         
-        # Generate enhanced files
-        csv_path = write_csv_output(verses, book_name.title(), book_output_dir)
-        write_html_preview(verses, book_name.title(), book_output_dir)
-        
-        # Generate LLM training datasets
-        write_training_formats(verses, book_name.title(), book_output_dir)
-        write_analysis_dataset(verses, book_name.title(), book_output_dir)
+        # Generate enhanced files and LLM training datasets in one pass
+        output_paths = write_book_outputs(verses, book_name.title(), book_output_dir)
         
-        # Create latest files
-        create_latest_files(book_name.title(), book_output_dir)
+        # Record this version in the artifact store
+        update_artifact_index(book_name.title(), book_output_dir, output_paths)
         
         print(f"\n[SUCCESS] Enhanced files generated in {book_output_dir}/ directory")
         print(f"[FOLDER] Book folder: {book_output_dir}")
@@ -705,71 +1376,228 @@ def process_single_book(book_name):
         print(f"  - {book_name.title()}_classification.jsonl (source classification)")
         print(f"  - {book_name.title()}_sequence.jsonl (sequence labeling)")
         print(f"  - {book_name.title()}_analysis.jsonl (complex analysis tasks)")
-        print(f"[FILE] Latest files: {book_name.title()}_latest.csv and {book_name.title()}_latest.html")
+        print(f"[FILE] Version history: {book_name.title()}_artifacts.json")
     else:
         print("[INFO] Files not generated")
 
-def process_all_books():
-    """Process all books in pipeline mode"""
-    print("[INFO] Starting pipeline processing for all books...")
+def process_book_batch(book_name, output_root="output", formats=DEFAULT_FORMATS,
+                       wikitext_dir="wiki_markdown", run_time=None, dataset_options=None):
+    """Parse one book and write its artifacts without prompting or printing.
+
+    Returns a result dict with the book's status ("ok", "missing", "empty" or
+    "error"), verse and source counts, artifact paths and stage timings.
+    Errors are reported in the result rather than raised, so one bad book
+    does not stop a batch.
+    """
+    book_name = book_name.title()
+    file_path = os.path.join(wikitext_dir, f"{book_name}.wikitext")
+    result = {
+        "book": book_name,
+        "input_file": file_path,
+        "status": "ok",
+        "error": None,
+        "verses": 0,
+        "multi_source_verses": 0,
+        "source_counts": {},
+        "artifacts": {},
+        "timings": {},
+    }
+    if not os.path.exists(file_path):
+        result["status"] = "missing"
+        result["error"] = f"File not found: {file_path}"
+        return result
+    
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            verses = parse_wikitext_file(file_path)
+            parsed = time.perf_counter()
+            result["timings"]["parse"] = parsed - start
+            if not verses:
+                result["status"] = "empty"
+                return result
+            
+            source_counts, multi_source_count = count_sources(verses)
+            result["verses"] = len(verses)
+            result["multi_source_verses"] = multi_source_count
+            result["source_counts"] = dict(source_counts)
+            
+            book_output_dir = os.path.join(output_root, book_name)
+            output_paths = write_book_outputs(verses, book_name, book_output_dir, formats=formats,
+                                              dataset_options=dataset_options)
+            update_artifact_index(book_name, book_output_dir, output_paths,
+                                  timestamp=time.strftime("%Y%m%d_%H%M%S", run_time or time.gmtime()))
+            result["artifacts"] = output_paths
+            result["timings"]["write"] = time.perf_counter() - parsed
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["timings"]["total"] = time.perf_counter() - start
+    return result
+
+def process_books(book_names, output_root="output", formats=DEFAULT_FORMATS, jobs=1,
+                  wikitext_dir="wiki_markdown", dataset_options=None):
+    """Process several books non-interactively, concurrently when jobs > 1.
+
+    This is the scriptable counterpart of process_single_book. Every book is
+    stamped with the same UTC run time, and the results are returned in the
+    order of book_names whichever worker finished first.
+    """
+    run_time = time.gmtime()
+    book_names = list(book_names)
+    if jobs > 1 and len(book_names) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(process_book_batch, book_names, repeat(output_root),
+                                     repeat(formats), repeat(wikitext_dir), repeat(run_time),
+                                     repeat(dataset_options)))
+    return [process_book_batch(book_name, output_root, formats, wikitext_dir, run_time, dataset_options)
+            for book_name in book_names]
+
+# Books processed in pipeline mode, in manifest order
+PIPELINE_BOOKS = {
+    "Genesis": "wiki_markdown/Genesis.wikitext",
+    "Exodus": "wiki_markdown/Exodus.wikitext",
+    "Leviticus": "wiki_markdown/Leviticus.wikitext",
+    "Numbers": "wiki_markdown/Numbers.wikitext",
+    "Deuteronomy": "wiki_markdown/Deuteronomy.wikitext"
+}
+
+def process_book(book_name, file_path, run_time, formats=DEFAULT_FORMATS, dataset_options=None):
+    """Parse one book and write all of its artifacts.
+
+    Every book's new artifact version and processed_at are stamped with
+    the pipeline's UTC run_time, whichever worker process handles it.
+    Returns the book's manifest entry, or None if the book was skipped.
+    """
+    if not os.path.exists(file_path):
+        print(f"[WARN] File not found: {file_path}")
+        return None
+        
+    print(f"\n[BOOK] Processing {book_name}...")
+    
+    # Parse the wikitext file
+    verses = parse_wikitext_file(file_path)
+    
+    if not verses:
+        print(f"[WARN] No verses found in {book_name}")
+        return None
+    
+    print(f"[DEBUG] {book_name}: found {len(verses)} verses")
     
-    # Define the books to process
-    books = {
-        "Genesis": "wiki_markdown/Genesis.wikitext",
-        "Exodus": "wiki_markdown/Exodus.wikitext", 
-        "Leviticus": "wiki_markdown/Leviticus.wikitext",
-        "Numbers": "wiki_markdown/Numbers.wikitext",
-        "Deuteronomy": "wiki_markdown/Deuteronomy.wikitext"
+    # Create book-specific output directory
+    book_output_dir = os.path.join("output", book_name)
+    os.makedirs(book_output_dir, exist_ok=True)
+    
+    # Generate enhanced files and LLM training datasets in one pass
+    output_paths = write_book_outputs(verses, book_name, book_output_dir, formats=formats,
+                                      dataset_options=dataset_options)
+    
+    # Record this version in the artifact store
+    artifacts = update_artifact_index(book_name, book_output_dir, output_paths,
+                                      timestamp=time.strftime("%Y%m%d_%H%M%S", run_time))
+    
+    print(f"[SUCCESS] {book_name} processed successfully")
+    
+    return {
+        "verses": len(verses),
+        "csv_path": output_paths["csv"],
+        "artifacts": artifacts,
+        "artifact_paths": output_paths,
+        "processed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", run_time)
     }
+
+def artifact_files(path):
+    """Return the files behind an artifact path: the file, plus its shards for a shard index"""
+    files = [path]
+    if path.endswith(SHARD_INDEX_SUFFIX) and os.path.exists(path):
+        directory = os.path.dirname(path)
+        files.extend(os.path.join(directory, shard["file"]) for shard in load_shard_index(path)["shards"])
+    return files
+
+def is_book_up_to_date(previous_entry, input_sha256, formats, dataset_options=None):
+    """Check whether a manifest entry was built from the same input, parser version and formats.
+
+    Every artifact the entry records, and every shard of a sharded dataset,
+    must still exist; entries from before artifact paths were recorded are
+    rebuilt once.
+    """
+    return (
+        previous_entry is not None
+        and previous_entry.get("input_sha256") == input_sha256
+        and previous_entry.get("parser_version") == PARSER_VERSION
+        and previous_entry.get("formats", list(DEFAULT_FORMATS)) == list(formats)
+        and previous_entry.get("dataset_options") == dataset_options
+        and bool(previous_entry.get("artifact_paths"))
+        and all(os.path.exists(file_path)
+                for path in previous_entry["artifact_paths"].values()
+                for file_path in artifact_files(path))
+    )
+
+def process_all_books(jobs=1, force=False, formats=DEFAULT_FORMATS, dataset_options=None):
+    """Process all books in pipeline mode, using a process pool when jobs > 1.
+
+    Books whose wikitext hash and parser version match the previous manifest
+    are skipped unless force is set.
+    """
+    print("[INFO] Starting pipeline processing for all books...")
     
+    pipeline_manifest_path = os.path.join("output", "pipeline_manifest.json")
+    previous_manifest = None if force else load_json_file(pipeline_manifest_path)
+    previous_books = (previous_manifest or {}).get("books", {})
+    
+    run_time = time.gmtime()
     pipeline_manifest = {
-        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", run_time),
         "pipeline_version": "2.0",
+        "parser_version": PARSER_VERSION,
         "books": {}
     }
     
-    for book_name, file_path in books.items():
+    # Hash every input and keep the manifest entries of unchanged books
+    entries = {}
+    input_hashes = {}
+    for book_name, file_path in PIPELINE_BOOKS.items():
         if not os.path.exists(file_path):
             print(f"[WARN] File not found: {file_path}")
             continue
-            
-        print(f"\n[BOOK] Processing {book_name}...")
-        
-        # Parse the wikitext file
-        verses = parse_wikitext_file(file_path)
-        
-        if not verses:
-            print(f"[WARN] No verses found in {book_name}")
-            continue
-        
-        print(f"[DEBUG] {book_name}: found {len(verses)} verses")
-        
-        # Create book-specific output directory
-        book_output_dir = os.path.join("output", book_name)
-        os.makedirs(book_output_dir, exist_ok=True)
-        
-        # Generate enhanced files
-        csv_path = write_csv_output(verses, book_name, book_output_dir)
-        write_html_preview(verses, book_name, book_output_dir)
-        
-        # Generate LLM training datasets
-        write_training_formats(verses, book_name, book_output_dir)
-        write_analysis_dataset(verses, book_name, book_output_dir)
-        
-        # Create latest files
-        create_latest_files(book_name, book_output_dir)
-        
-        # Update manifest
-        pipeline_manifest["books"][book_name] = {
-            "verses": len(verses),
-            "csv_path": csv_path,
-            "processed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ")
-        }
-        
-        print(f"[SUCCESS] {book_name} processed successfully")
+        input_hashes[book_name] = file_sha256(file_path)
+        previous_entry = previous_books.get(book_name)
+        if is_book_up_to_date(previous_entry, input_hashes[book_name], formats, dataset_options):
+            print(f"[SKIP] {book_name} is up to date")
+            entries[book_name] = previous_entry
+    
+    skipped_count = len(entries)
+    book_names = [book_name for book_name in input_hashes if book_name not in entries]
+    file_paths = [PIPELINE_BOOKS[book_name] for book_name in book_names]
+    
+    if jobs > 1 and len(book_names) > 1:
+        print(f"[INFO] Processing {len(book_names)} books with {jobs} worker processes")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(process_book, book_names, file_paths, repeat(run_time),
+                                        repeat(formats), repeat(dataset_options)))
+    else:
+        results = [process_book(book_name, file_path, run_time, formats, dataset_options)
+                   for book_name, file_path in zip(book_names, file_paths)]
+    
+    for book_name, file_path, entry in zip(book_names, file_paths, results):
+        if entry is not None:
+            entry["input_file"] = file_path
+            entry["input_sha256"] = input_hashes[book_name]
+            entry["parser_version"] = PARSER_VERSION
+            entry["formats"] = list(formats)
+            if dataset_options is not None:
+                entry["dataset_options"] = dataset_options
+            entries[book_name] = entry
+    
+    # Merge manifest entries in PIPELINE_BOOKS order, whatever order workers finished in
+    for book_name in PIPELINE_BOOKS:
+        if book_name in entries:
+            pipeline_manifest["books"][book_name] = entries[book_name]
+    
+    print(f"\n[INFO] Rebuilt {len(entries) - skipped_count} book(s), skipped {skipped_count} unchanged")
     
     # Write pipeline manifest
-    pipeline_manifest_path = os.path.join("output", "pipeline_manifest.json")
     with open(pipeline_manifest_path, "w", encoding="utf-8") as f:
         json.dump(pipeline_manifest, f, indent=2)
     print(f"\n[SUCCESS] Pipeline manifest written: {pipeline_manifest_path}")
@@ -784,13 +1612,84 @@ def process_all_books():
     print(f"[INFO] All books processed successfully!")
     print(f"[INFO] Check the 'output/' directory for generated files")
 
+def add_dataset_arguments(parser):
+    """Add the sharded dataset options shared by the pipeline and batch commands"""
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="Write the JSONL datasets as compressed shards (zstd requires zstandard)")
+    parser.add_argument("--shard-records", type=int, metavar="N",
+                        help=f"Records per dataset shard (default: {DEFAULT_SHARD_RECORDS} when sharding)")
+
+def dataset_options_from_args(args):
+    """ShardedJsonlWriter options selected on the command line, or None for plain JSONL files"""
+    if args.compress is None and args.shard_records is None:
+        return None
+    return {"compression": args.compress, "shard_records": args.shard_records or DEFAULT_SHARD_RECORDS}
+
+def parse_pipeline_args(argv):
+    """Parse the options of the pipeline command"""
+    parser = argparse.ArgumentParser(prog="parse_wikitext.py pipeline",
+                                     description="Process all books in pipeline mode")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes (default: 1, serial)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every book even if its input is unchanged")
+    parser.add_argument("--split-html", action="store_true",
+                        help="Also write one HTML fragment per chapter plus an index page")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Also write a typed Parquet verse table (requires pyarrow)")
+    add_dataset_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.shard_records is not None and args.shard_records < 1:
+        parser.error("--shard-records must be at least 1")
+    return args
+
+def parse_batch_args(argv):
+    """Parse the options of the batch command"""
+    parser = argparse.ArgumentParser(prog="parse_wikitext.py batch",
+                                     description="Process books without prompting and print JSON results")
+    parser.add_argument("books", nargs="+", help="Book names, e.g. genesis exodus")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes (default: 1, serial)")
+    parser.add_argument("--formats", nargs="+", choices=sorted(OUTPUT_FORMATS), default=list(DEFAULT_FORMATS),
+                        help="Output formats to write (default: the pipeline defaults)")
+    parser.add_argument("--output-dir", default="output", help="Root output directory (default: output)")
+    parser.add_argument("--wikitext-dir", default="wiki_markdown",
+                        help="Directory holding <Book>.wikitext files (default: wiki_markdown)")
+    add_dataset_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.shard_records is not None and args.shard_records < 1:
+        parser.error("--shard-records must be at least 1")
+    return args
+
 def main():
+    # Batch mode prints nothing but its JSON results, so job runners can parse stdout
+    if len(sys.argv) > 1 and sys.argv[1].lower() == "batch":
+        args = parse_batch_args(sys.argv[2:])
+        results = process_books(args.books, output_root=args.output_dir, formats=tuple(args.formats),
+                                jobs=args.jobs, wikitext_dir=args.wikitext_dir,
+                                dataset_options=dataset_options_from_args(args))
+        print(json.dumps(results, indent=2))
+        if any(result["status"] != "ok" for result in results):
+            sys.exit(1)
+        return
+    
     print("[INFO] Starting enhanced wikitext parser (v2.0)...")
     
     # Check command line arguments
     if len(sys.argv) > 1:
         if sys.argv[1].lower() == "pipeline":
-            process_all_books()
+            args = parse_pipeline_args(sys.argv[2:])
+            formats = DEFAULT_FORMATS
+            if args.split_html:
+                formats += ("html_chapters",)
+            if args.parquet:
+                formats += ("parquet",)
+            process_all_books(jobs=args.jobs, force=args.force, formats=formats,
+                              dataset_options=dataset_options_from_args(args))
             return
         else:
             book_name = sys.argv[1]
@@ -799,7 +1698,13 @@ def main():
     
     print("[INFO] Usage:")
     print("  python parse_wikitext.py <book_name>  - Process single book")
+    print("  python parse_wikitext.py batch <book>... [--jobs N] - Process books without prompting, print JSON")
     print("  python parse_wikitext.py pipeline     - Process all books")
+    print("  python parse_wikitext.py pipeline --jobs N - Process all books with N worker processes")
+    print("  python parse_wikitext.py pipeline --force  - Rebuild books whose input is unchanged")
+    print("  python parse_wikitext.py pipeline --compress gzip - Write JSONL datasets as compressed shards")
+    print("  python parse_wikitext.py pipeline --split-html - Also write per-chapter HTML fragments")
+    print("  python parse_wikitext.py pipeline --parquet - Also write typed Parquet verse tables")
     print("  Available books: genesis, exodus, leviticus, numbers, deuteronomy")
     print("\n[INFO] Enhanced features:")
     print("  - LLM-optimized CSV with source analysis")
@@ -14,15 +14,18 @@ The script handles:
 """
 
 import os
-import re
 import json
 import csv
+import argparse
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime
 import logging
 
+from parse_wikitext import COLOR_TO_SUB_SOURCE, VerseTextIndex, parse_wikitext_files
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,6 +42,8 @@ class DeuteronomistVerse:
     full_text: str
     word_count: int
     metadata: Dict[str, Any]
+    section: str = ""  # Section title in the source page
+    sub_sources: List[str] = field(default_factory=list)  # Sub-source of every segment
 
 class DeuteronomistProcessor:
     """Processes Deuteronomist source for vector database ingestion"""
@@ -48,65 +53,96 @@ class DeuteronomistProcessor:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
-        # Deuteronomist color mappings
-        self.deuteronomist_colors = {
-            "#000000": "Core",           # Core Deuteronomic Code
-            "#800080": "Dtr1",           # First Deuteronomist version
-            "#008800": "Dtr2",           # Second Deuteronomist version
-            "#00FF88": "Song_of_Moses",  # Song of Moses
-            "#880000": "Late_insertion"  # Late insertions
+        # Deuteronomist sub-source of each colour, shared with parse_wikitext
+        self.deuteronomist_colors = COLOR_TO_SUB_SOURCE
+        
+        # Source files to process: file -> (sub-source of every verse, colour of
+        # untemplated verse text). A sub-source of None means the segment colours
+        # decide; the Dtr1 pages use colours for genres, not sub-sources.
+        self.source_files = {
+            "Deuteronomist_source.wikitext": (None, None),
+            "First_Deuteronomist_Version.wikitext": ("Dtr1", None),
+            "Deuteronomic_Laws.wikitext": ("Dtr1", "#800080"),
+            "Song_of_Moses.wikitext": ("Song_of_Moses", None),
         }
         
-        # Source files to process
-        self.source_files = [
-            "Deuteronomist_source.wikitext",
-            "First_Deuteronomist_Version.wikitext",
-            "Deuteronomic_Laws.wikitext",
-            "Song_of_Moses.wikitext"
-        ]
+        # Book whose verse texts give the canonical chapter and verse numbers
+        self.book_file = "Deuteronomy.wikitext"
+        self.reference_index: Optional[VerseTextIndex] = None
     
-    def parse_deuteronomist_wikitext(self, file_path: Path) -> List[DeuteronomistVerse]:
-        """Parse Deuteronomist wikitext file and extract verses"""
+    def load_reference_index(self) -> VerseTextIndex:
+        """Index the Deuteronomy verses by text to recover canonical references"""
+        if self.reference_index is None:
+            book_path = self.wiki_dir / self.book_file
+            if book_path.exists():
+                book_verses = parse_wikitext_files([str(book_path)])[0]
+            else:
+                logger.warning(f"Book file not found: {book_path}, keeping section numbering")
+                book_verses = []
+            self.reference_index = VerseTextIndex(book_verses, "Deuteronomy")
+        return self.reference_index
+    
+    def convert_verses(self, parsed_verses: List[Dict[str, Any]], file_name: str) -> List[DeuteronomistVerse]:
+        """Convert verse records from the shared parser into Deuteronomist verses.
+
+        Source pages number their verses within titled sections and often
+        split one Deuteronomy verse over several numbered lines. Verses whose
+        text is found in Deuteronomy, whole or as a fragment, get its chapter
+        and verse numbers; the others keep the section number as chapter.
+        Fragments of the same reference are numbered by metadata["part"].
+        """
+        fixed_sub_source, _ = self.source_files.get(file_name, (None, None))
+        reference_index = self.load_reference_index()
+        source_title = file_name[:-len(".wikitext")].replace("_", " ")
+        reference_parts = Counter()
+        position = 0
         verses = []
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Extract verses with color coding
-            verse_pattern = r'{{font\|(\d+)\|size=smaller\|color=#0000FF}}{{font\|([^}]+)\|color=([^}]+)}}'
-            matches = re.findall(verse_pattern, content, re.DOTALL)
-            
-            for match in matches:
-                verse_num = match[0]
-                verse_text = match[1].strip()
-                color = match[2]
-                
-                if not verse_text:
-                    continue
-                
-                # Determine sub-source from color
-                sub_source = self.deuteronomist_colors.get(color, "Unknown")
-                
-                # Create verse object
-                verse = DeuteronomistVerse(
-                    reference=f"Deuteronomy {verse_num}",
-                    text=verse_text,
-                    chapter=1,  # Will be updated if chapter info is available
-                    verse=int(verse_num),
-                    sub_source=sub_source,
-                    color=color,
-                    full_text=verse_text,
-                    word_count=len(verse_text.split()),
-                    metadata={
-                        "source_file": file_path.name,
-                        "color_code": color,
-                        "sub_source": sub_source,
-                        "parsing_date": datetime.now().isoformat()
-                    }
-                )
-                verses.append(verse)
+        for parsed in parsed_verses:
+            colors = parsed['color']
+            sub_sources = [fixed_sub_source or self.deuteronomist_colors.get(color, "Unknown")
+                           for color in colors]
+            match = reference_index.find(parsed['text'], position)
+            if match is not None:
+                position = match
+                book, chapter, verse_num = reference_index.references[match]
+                reference = f"{book} {chapter}:{verse_num}"
+            else:
+                chapter, verse_num = parsed['chapter'], parsed['verse']
+                reference = f"{source_title} {chapter}:{verse_num}"
+            reference_parts[reference] += 1
             
+            verses.append(DeuteronomistVerse(
+                reference=reference,
+                text=parsed['text'],
+                chapter=int(chapter),
+                verse=int(verse_num),
+                sub_source=sub_sources[0],
+                color=colors[0],
+                full_text=parsed['text'],
+                word_count=len(parsed['text'].split()),
+                metadata={
+                    "source_file": file_name,
+                    "color_code": colors[0],
+                    "sub_source": sub_sources[0],
+                    "section_number": int(parsed['chapter']),
+                    "section_verse": int(parsed['verse']),
+                    "canonical_match": match is not None,
+                    "part": reference_parts[reference],
+                    "parsing_date": datetime.now().isoformat()
+                },
+                section=parsed['section'] or "",
+                sub_sources=list(dict.fromkeys(sub_sources)),
+            ))
+        
+        return verses
+    
+    def parse_deuteronomist_wikitext(self, file_path: Path) -> List[DeuteronomistVerse]:
+        """Parse Deuteronomist wikitext file and extract verses"""
+        try:
+            _, plain_color = self.source_files.get(file_path.name, (None, None))
+            parsed_verses = parse_wikitext_files([str(file_path)], plain_colors=[plain_color])[0]
+            verses = self.convert_verses(parsed_verses, file_path.name)
             logger.info(f"Parsed {len(verses)} verses from {file_path.name}")
             return verses
             
@@ -127,6 +163,7 @@ class DeuteronomistProcessor:
                     "output": f"This verse belongs to the {verse.sub_source} sub-source of the Deuteronomist tradition. It contains {verse.word_count} words and shows characteristic Deuteronomic themes.",
                     "metadata": {
                         "book": "Deuteronomy",
+                        "chapter": verse.chapter,
                         "verse": verse.verse,
                         "sub_source": verse.sub_source,
                         "word_count": verse.word_count
@@ -154,8 +191,14 @@ class DeuteronomistProcessor:
         
         for verse in verses:
             # Create document for vector database
+            source_name = verse.metadata.get("source_file", "").replace(".wikitext", "")
+            # Keyed on the resolved reference; later fragments of a verse get a part suffix
+            reference_key = verse.reference.replace(" ", "_").replace(":", "_")
+            doc_id = f"deuteronomist_{source_name}_{reference_key}"
+            if verse.metadata.get("part", 1) > 1:
+                doc_id += f"_{verse.metadata['part']}"
             doc = {
-                "id": f"deuteronomist_{verse.verse}",
+                "id": doc_id,
                 "text": verse.text,
                 "metadata": {
                     "reference": verse.reference,
@@ -163,13 +206,15 @@ class DeuteronomistProcessor:
                     "chapter": verse.chapter,
                     "verse": verse.verse,
                     "sub_source": verse.sub_source,
+                    "sub_sources": verse.sub_sources,
+                    "section": verse.section,
                     "source": "D",
                     "word_count": verse.word_count,
                     "color_code": verse.color,
                     "document_type": "deuteronomist_verse",
                     "parsing_date": datetime.now().isoformat()
                 },
-                "embedding_text": f"Deuteronomy {verse.verse}: {verse.text} [Deuteronomist source, {verse.sub_source} sub-source]"
+                "embedding_text": f"{verse.reference}: {verse.text} [Deuteronomist source, {verse.sub_source} sub-source]"
             }
             documents.append(doc)
         
@@ -183,7 +228,8 @@ class DeuteronomistProcessor:
             writer = csv.writer(f)
             writer.writerow([
                 'reference', 'text', 'chapter', 'verse', 'sub_source', 
-                'color', 'word_count', 'source_file', 'parsing_date'
+                'color', 'word_count', 'source_file', 'parsing_date',
+                'section', 'sub_sources'
             ])
             
             for verse in verses:
@@ -196,7 +242,9 @@ class DeuteronomistProcessor:
                     verse.color,
                     verse.word_count,
                     verse.metadata.get('source_file', ''),
-                    verse.metadata.get('parsing_date', '')
+                    verse.metadata.get('parsing_date', ''),
+                    verse.section,
+                    ';'.join(verse.sub_sources)
                 ])
         
         logger.info(f"Saved CSV: {csv_path}")
@@ -211,8 +259,8 @@ class DeuteronomistProcessor:
         
         logger.info(f"Saved JSONL: {jsonl_path}")
     
-    def process_all_sources(self) -> Dict[str, Any]:
-        """Process all Deuteronomist source files"""
+    def process_all_sources(self, jobs: int = 1) -> Dict[str, Any]:
+        """Process all Deuteronomist source files, parsing them in parallel when jobs > 1"""
         logger.info("🚀 Processing Deuteronomist sources...")
         
         all_verses = []
@@ -223,16 +271,30 @@ class DeuteronomistProcessor:
             "errors": []
         }
         
-        # Process each source file
+        filenames = []
         for filename in self.source_files:
             file_path = self.wiki_dir / filename
             if not file_path.exists():
                 logger.warning(f"File not found: {file_path}")
                 results["errors"].append(f"File not found: {filename}")
                 continue
-            
+            filenames.append(filename)
+        
+        # Parse the source pages and the Deuteronomy book together in one pool
+        book_path = self.wiki_dir / self.book_file
+        paths = [str(self.wiki_dir / filename) for filename in filenames]
+        plain_colors = [self.source_files[filename][1] for filename in filenames]
+        if self.reference_index is None and book_path.exists():
+            paths.append(str(book_path))
+            plain_colors.append(None)
+        parsed_files = parse_wikitext_files(paths, jobs=jobs, plain_colors=plain_colors)
+        if len(parsed_files) > len(filenames):
+            self.reference_index = VerseTextIndex(parsed_files.pop(), "Deuteronomy")
+        
+        # Process each source file
+        for filename, parsed_verses in zip(filenames, parsed_files):
             logger.info(f"📖 Processing: {filename}")
-            verses = self.parse_deuteronomist_wikitext(file_path)
+            verses = self.convert_verses(parsed_verses, filename)
             all_verses.extend(verses)
             results["files_processed"].append(filename)
             
@@ -280,8 +342,13 @@ class DeuteronomistProcessor:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Process the Deuteronomist source pages")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes for parsing (default: 1, serial)")
+    args = parser.parse_args()
+    
     processor = DeuteronomistProcessor()
-    results = processor.process_all_sources()
+    results = processor.process_all_sources(jobs=args.jobs)
     
     print(f"\n📊 Processing Summary:")
     print(f"Total verses: {results['total_verses']}")
@@ -37,6 +37,7 @@ from rich import print as rprint
 sys.path.append(str(Path(__file__).parent / "src"))
 try:
     from kjv_sources.qdrant_client import create_qdrant_client, KJVQdrantClient
+    from kjv_sources.corpus import Corpus, get_corpus
 except ImportError as e:
     print(f"❌ Error importing KJV Sources modules: {e}")
     print("Make sure you're running from the project root directory")
@@ -138,6 +139,7 @@ security = HTTPBearer(auto_error=False)
 # Global variables for RAG system
 qdrant_client: Optional[KJVQdrantClient] = None
 entity_relations: Optional[Dict] = None
+corpus: Optional[Corpus] = None
 
 # =============================================================================
 # Application Startup and Dependencies
@@ -146,7 +148,7 @@ entity_relations: Optional[Dict] = None
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG system on startup"""
-    global qdrant_client, entity_relations
+    global qdrant_client, entity_relations, corpus
     
     console.print("🚀 [bold blue]Starting KJV Sources RAG API Server[/bold blue]")
     
@@ -164,6 +166,10 @@ async def startup_event():
         else:
             entity_relations = {"source_entities": {}, "book_entities": {}, "relation_types": {}}
         
+        # Map the verse corpus (shared between workers when a snapshot is current)
+        corpus = get_corpus(str(Path(__file__).parent / "output"))
+        console.print(f"📖 [yellow]Verse corpus: {len(corpus)} verses from {len(corpus.books)} books[/yellow]")
+        
         # Test connection
         stats = qdrant_client.get_collection_stats()
         console.print(f"✅ [green]Connected to Qdrant - {stats.get('points_count', 0)} verses available[/green]")
@@ -556,12 +562,16 @@ async def get_pov_statistics(client: KJVQdrantClient = Depends(get_qdrant_client
 async def get_available_books(client: KJVQdrantClient = Depends(get_qdrant_client)):
     """Get list of available books in the database"""
     try:
-        # This should be enhanced to query actual data
-        books = ["Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy"]
+        if corpus is not None and corpus.books:
+            books = corpus.books
+            verse_counts = {book: len(corpus.indices(book)) for book in books}
+        else:
+            books = ["Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy"]
+            verse_counts = {}
         
         return ApiResponse(
             success=True,
-            data={"books": books},
+            data={"books": books, "verse_counts": verse_counts},
             message=f"Retrieved {len(books)} available books"
         )
     except Exception as e:
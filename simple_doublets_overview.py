@@ -11,12 +11,16 @@ Author: KJV Sources Project
 License: MIT
 """
 
+import sys
 import json
-import re
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.references import parse_reference
+from kjv_sources.verse_index import get_verse_index
+
 class SimpleDoubletsOverview:
     """Creates simple text and HTML overview of biblical doublets"""
     
@@ -54,25 +58,18 @@ class SimpleDoubletsOverview:
     
     def parse_biblical_reference(self, reference: str) -> Tuple[str, int, int]:
         """Parse biblical reference into book, chapter, verse"""
-        pattern = r'([A-Za-z0-9\s]+)\s+(\d+):(\d+)'
-        match = re.search(pattern, reference.strip())
-        
-        if match:
-            book = match.group(1).strip()
-            chapter = int(match.group(2))
-            verse = int(match.group(3))
-            return book, chapter, verse
-        else:
+        try:
+            return parse_reference(reference).first
+        except ValueError:
             print(f"Warning: Could not parse reference: {reference}")
             return "Unknown", 1, 1
     
     def calculate_position(self, book: str, chapter: int) -> int:
         """Calculate relative position for visualization"""
-        book_positions = {
-            "Genesis": 0, "Exodus": 50, "Leviticus": 90,
-            "Numbers": 120, "Deuteronomy": 156
-        }
-        return book_positions.get(book, 0) + chapter
+        index = get_verse_index()
+        if index.find(book, chapter, 1) is None:
+            return 0
+        return index.chapter_position(book, chapter) + 1
     
     def generate_text_overview(self):
         """Generate text-based overview of doublets"""
@@ -1,7 +1,5 @@
 import os
-import csv
 import json
-import glob
 import click
 import sys
 from pathlib import Path
@@ -17,6 +15,9 @@ from rich.syntax import Syntax
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from parse_wikitext import parse_wikitext_file, COLOR_TO_SOURCE
 
+from .corpus import get_corpus
+from .verse_table import join_field, source_percentages_field
+
 DEFAULT_OUTPUT_DIR = os.path.join(os.getcwd(), "output")
 
 # Source color mapping to match the actual colors from wikitext files
@@ -39,6 +40,19 @@ RICH_COLORS = {
     "UNKNOWN": "rgb(102,102,102)"  # grey
 }
 
+def format_cell(value):
+    """A corpus row value as table text, with list fields joined as in the CSV"""
+    if isinstance(value, list):
+        return ";".join(":".join(map(str, item)) if isinstance(item, tuple) else str(item) for item in value)
+    return str(value)
+
+def corpus_book_names(corpus, books):
+    """Corpus book names matching the given names case-insensitively (all books if none are given)"""
+    if not books:
+        return corpus.books
+    by_key = {name.lower(): name for name in corpus.books}
+    return [by_key[book.lower()] for book in books if book.lower() in by_key]
+
 @click.group()
 def cli():
     """kjv-sources CLI: preview and combine scripture data."""
@@ -54,25 +68,14 @@ def cli():
 def preview(book, data_dir, limit, chapter, format):
     """Preview CSV rows for one book or all books."""
     console = Console(legacy_windows=True)
-    pattern = (
-        f"{data_dir}/{book}/*.csv"
-        if book else f"{data_dir}/*/*.csv"
-    )
-    files = sorted(glob.glob(pattern))
-    if not files:
-        raise click.ClickException(f"No CSVs found with pattern {pattern}")
+    corpus = get_corpus(data_dir)
+    names = corpus_book_names(corpus, [book] if book else [])
+    if not names:
+        raise click.ClickException(f"No verse tables found for {book or 'any book'} in {data_dir}")
 
-    for path in files:
-        name = os.path.basename(os.path.dirname(path))
-        rows = []
-        with open(path, encoding="utf-8") as fp:
-            reader = csv.DictReader(fp)
-            for row in reader:
-                if chapter and int(row["chapter"]) != chapter:
-                    continue
-                rows.append(row)
-                if len(rows) >= limit:
-                    break
+    for name in names:
+        path = corpus.table_paths[name]
+        rows = [corpus.row(row_number) for row_number in corpus.indices(name, chapter)[:limit]]
 
         if not rows:
             console.print(f"[yellow]No matching rows in {name}[/yellow]")
@@ -85,7 +88,7 @@ def preview(book, data_dir, limit, chapter, format):
             for col in rows[0].keys():
                 table.add_column(col, overflow="fold")
             for r in rows:
-                table.add_row(*(r[c] for c in r))
+                table.add_row(*(format_cell(r[c]) for c in r))
             console.print(table)
 
 @cli.command()
@@ -450,12 +453,14 @@ def preview_training(book, limit, format):
             border_style="magenta"
         )
         table.add_column("Text", style="white", width=70, overflow="fold")
-        table.add_column("Labels", style="cyan", width=20, overflow="fold")
+        table.add_column("Tokens", style="green", width=8, justify="right")
+        table.add_column("Sources", style="cyan", width=20, overflow="fold")
         
         for example in examples:
             table.add_row(
                 example.get('text', '')[:67] + "..." if len(example.get('text', '')) > 70 else example.get('text', ''),
-                '->'.join(example.get('labels', []))
+                str(len(example.get('tokens', []))),
+                example.get('metadata', {}).get('source_sequence', '')
             )
     
     elif format == "analysis":
@@ -496,27 +501,23 @@ def preview_enhanced_csv(book, limit):
     """Preview the enhanced CSV structure with LLM-optimized columns."""
     console = Console()
     
-    # Define the books mapping
-    books = {
-        "genesis": "output/Genesis/Genesis.csv",
-        "exodus": "output/Exodus/Exodus.csv", 
-        "leviticus": "output/Leviticus/Leviticus.csv",
-        "numbers": "output/Numbers/Numbers.csv",
-        "deuteronomy": "output/Deuteronomy/Deuteronomy.csv"
-    }
+    # Supported books
+    books = ["genesis", "exodus", "leviticus", "numbers", "deuteronomy"]
     
     # Normalize book name
     book_key = book.lower()
     if book_key not in books:
         console.print(f"[red]Unknown book: {book}[/red]")
-        console.print(f"Available books: {', '.join(books.keys())}")
+        console.print(f"Available books: {', '.join(books)}")
         return
     
-    csv_path = books[book_key]
-    if not os.path.exists(csv_path):
-        console.print(f"[red]Enhanced CSV not found: {csv_path}[/red]")
+    corpus = get_corpus(DEFAULT_OUTPUT_DIR)
+    book_name = book_key.title()
+    if book_name not in corpus.book_index:
+        console.print(f"[red]Enhanced CSV not found for {book_name} in {DEFAULT_OUTPUT_DIR}[/red]")
         console.print(f"[yellow]Run 'python parse_wikitext.py {book}' first to generate enhanced CSV[/yellow]")
         return
+    csv_path = corpus.table_paths[book_name]
     
     console.print()
     console.print(Panel(
@@ -524,14 +525,8 @@ def preview_enhanced_csv(book, limit):
         subtitle=f"[dim]Showing first {limit} rows with LLM-optimized columns[/dim]"
     ))
     
-    # Read CSV and display
-    rows = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for i, row in enumerate(reader):
-            if i >= limit:
-                break
-            rows.append(row)
+    # Take the first rows of the book from the shared corpus
+    rows = [corpus.row(row_number) for row_number in corpus.indices(book_name)[:limit]]
     
     if not rows:
         console.print(f"[yellow]No rows found in {csv_path}[/yellow]")
@@ -570,20 +565,20 @@ def preview_enhanced_csv(book, limit):
             text = text[:34] + "..."
         
         # Format percentages
-        percentages = row.get('source_percentages', '')
+        percentages = source_percentages_field(row)
         if len(percentages) > 17:
             percentages = percentages[:14] + "..."
         
         table.add_row(
-            row.get('verse_id', ''),
-            row.get('canonical_reference', ''),
-            row.get('word_count', ''),
-            row.get('sources', ''),
-            row.get('source_count', ''),
-            row.get('primary_source', ''),
-            row.get('source_sequence', ''),
+            row['verse_id'],
+            row['canonical_reference'],
+            str(row['word_count']),
+            join_field(row['sources']),
+            str(row['source_count']),
+            row['primary_source'],
+            join_field(row['source_sequence'], sep="->"),
             percentages,
-            row.get('redaction_indicators', ''),
+            join_field(row['redaction_indicators'], empty="none"),
             text
         )
     
@@ -619,32 +614,27 @@ def preview_enhanced_csv(book, limit):
     help="Path to write the combined file")
 def combine(data_dir, format, books, output):
     """Merge all book CSVs into one flat JSON/JSONL."""
-    patterns = (
-        [f"{data_dir}/{b}/*.csv" for b in books]
-        if books else [f"{data_dir}/*/*.csv"]
-    )
-    files = sorted(sum((glob.glob(p) for p in patterns), []))
+    corpus = get_corpus(data_dir)
     total = 0
     records = []
 
     with open(output, "w", encoding="utf-8") as out_fp:
-        for path in files:
-            book = os.path.basename(os.path.dirname(path))
-            with open(path, encoding="utf-8") as fp:
-                for row in csv.DictReader(fp):
-                    rec = {
-                        "book": book,
-                        "chapter": int(row["chapter"]),
-                        "verse": int(row["verse"]),
-                        "text": row["text"],
-                        "sources": json.loads(row.get("sources", "[]")),
-                        "color": row.get("color_code"),
-                    }
-                    total += 1
-                    if format == "jsonl":
-                        out_fp.write(json.dumps(rec, ensure_ascii=False) + "\n")
-                    else:
-                        records.append(rec)
+        for book in corpus_book_names(corpus, books):
+            for row_number in corpus.indices(book):
+                spans = corpus["source_spans"][row_number]
+                rec = {
+                    "book": book,
+                    "chapter": corpus["chapter"][row_number],
+                    "verse": corpus["verse"][row_number],
+                    "text": corpus["full_text"][row_number],
+                    "sources": list(corpus["sources"][row_number]),
+                    "color": spans[0][3] if spans else None,
+                }
+                total += 1
+                if format == "jsonl":
+                    out_fp.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                else:
+                    records.append(rec)
 
         if format == "json":
             json.dump(records, out_fp, ensure_ascii=False, indent=2)
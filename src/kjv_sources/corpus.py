@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory verse corpus.
+
+Every book's verse table (``output/<Book>/<Book>.parquet`` when pyarrow is
+installed, ``<Book>.csv`` otherwise) is read once into typed columns: numbers
+in ``array`` columns, the ``;``-joined lists and the source percentages
+parsed once into tuples and per-source float columns. Rows have the shape of
+the Parquet verse table (``sources`` as a list, one ``pct_<source>`` value
+per source, ``source_spans`` as (start, end, source, color) tuples), so the
+helpers in ``verse_table`` work on them unchanged.
+
+``get_corpus()`` loads the corpus of an output directory on first use and
+returns the same object afterwards, so the CLIs, the Qdrant client and the
+analysis scripts share one copy per process; a current binary snapshot of
+the directory (``snapshot.py``) is memory-mapped instead of parsed. Only the
+standard library is needed; ``Corpus.frame()`` builds a typed, cached pandas
+DataFrame of the columns a caller asks for, and ``read_verse_csv()`` reads
+only the named CSV columns for exports that keep the CSV format.
+"""
+
+import os
+import csv
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .verse_table import PERCENTAGE_SOURCES, find_verse_table
+
+# pyarrow is optional; without it every book is read from its CSV
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DEFAULT_OUTPUT_DIR = "output"
+
+# Canonical order of the books the pipeline writes; other books follow alphabetically
+BOOK_ORDER = ["Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy"]
+
+# Typed columns: array typecode of each numeric column
+INT_COLUMNS = {"chapter": "H", "verse": "H", "word_count": "H", "source_count": "B"}
+STRING_COLUMNS = [
+    "verse_id", "canonical_reference", "full_text", "text_clean",
+    "primary_source", "source_confidence", "metadata",
+] + [f"text_{source}" for source in PERCENTAGE_SOURCES]
+LIST_COLUMNS = ["sources", "source_sequence", "redaction_indicators", "source_spans"]
+FLOAT_COLUMNS = [f"pct_{source}" for source in PERCENTAGE_SOURCES]
+
+# Separator of each list column in the enhanced CSV
+CSV_LIST_SEPARATORS = {"sources": ";", "source_sequence": "->", "redaction_indicators": ";"}
+
+# Columns with few distinct values, held as pandas categoricals
+CATEGORY_COLUMNS = ["book", "primary_source", "source_confidence"]
+# pandas dtypes of Corpus.frame() columns
+FRAME_DTYPES = {
+    **{name: {"H": "uint16", "B": "uint8"}[typecode] for name, typecode in INT_COLUMNS.items()},
+    **{name: "category" for name in CATEGORY_COLUMNS},
+    **{name: "float64" for name in FLOAT_COLUMNS},
+}
+# pandas dtypes of read_verse_csv() columns; the ;-joined label columns repeat too
+CSV_DTYPES = {
+    **{name: dtype for name, dtype in FRAME_DTYPES.items() if name in INT_COLUMNS or name in CATEGORY_COLUMNS},
+    **{name: "category" for name in CSV_LIST_SEPARATORS},
+}
+
+Span = Tuple[int, int, str, str]
+
+def parse_csv_list(value: Optional[str], sep: str) -> Tuple[str, ...]:
+    """A ';' or '->' joined CSV field as a tuple; empty and "none" give ()."""
+    if not value or value == "none":
+        return ()
+    return tuple(value.split(sep))
+
+def parse_csv_percentages(value: Optional[str]) -> Dict[str, float]:
+    """The CSV "J:39.4;E:0.0;..." field as {source: percentage}."""
+    percentages = {}
+    for part in (value or "").split(";"):
+        source, _, percentage = part.partition(":")
+        if percentage:
+            percentages[source] = float(percentage)
+    return percentages
+
+def parse_csv_spans(value: Optional[str]) -> Tuple[Span, ...]:
+    """The CSV source_boundaries field as (start, end, source, color) tuples.
+
+    Files written before spans were recorded hold "boundary_N" placeholders
+    or "none", which give ().
+    """
+    if not value:
+        return ()
+    spans = []
+    for part in value.split(";"):
+        fields = part.split(":")
+        if len(fields) != 4 or not fields[0].isdigit():
+            return ()
+        spans.append((int(fields[0]), int(fields[1]), fields[2], fields[3]))
+    return tuple(spans)
+
+def discover_verse_tables(output_dir: str) -> Dict[str, str]:
+    """Map each book under output_dir to its verse table, in canonical order."""
+    if not os.path.isdir(output_dir):
+        return {}
+    book_names = [name for name in os.listdir(output_dir)
+                  if os.path.isdir(os.path.join(output_dir, name)) and not name.startswith(".")]
+    book_names.sort(key=lambda name: (BOOK_ORDER.index(name) if name in BOOK_ORDER else len(BOOK_ORDER), name))
+    tables = {}
+    for book_name in book_names:
+        table_path = find_verse_table(os.path.join(output_dir, book_name), book_name)
+        if table_path:
+            tables[book_name] = table_path
+    return tables
+
+class Corpus:
+    """Verse tables of several books held as typed, array-backed columns.
+
+    Rows are numbered in load order and each book's rows are contiguous.
+    Indexes map a book to its row range, (book, chapter) to its rows and
+    (book, chapter, verse) to a row.
+    """
+
+    def __init__(self, tables: Dict[str, str]):
+        self.table_paths = dict(tables)
+        self.book_names: List[str] = []
+        self.columns: Dict[str, Any] = {"book": array("H")}
+        for name, typecode in INT_COLUMNS.items():
+            self.columns[name] = array(typecode)
+        for name in STRING_COLUMNS + LIST_COLUMNS:
+            self.columns[name] = []
+        for name in FLOAT_COLUMNS:
+            self.columns[name] = array("d")
+        self.book_index: Dict[str, range] = {}
+        self.chapter_index: Dict[Tuple[str, int], array] = {}
+        self.verse_index: Dict[Tuple[str, int, int], int] = {}
+        # Repeated values (source lists, labels) share a single object
+        self._interned: Dict[Any, Any] = {}
+        # DataFrames built by frame(), by (book, columns)
+        self._frames: Dict[Tuple[Optional[str], Tuple[str, ...]], Any] = {}
+
+        for book_name, path in self.table_paths.items():
+            start = len(self)
+            if path.endswith(".parquet") and pq is not None:
+                self._load_parquet(book_name, path)
+            else:
+                self._load_csv(book_name, path)
+            self.book_index[book_name] = range(start, len(self))
+            self.book_names.append(book_name)
+
+    @classmethod
+    def from_output_dir(cls, output_dir: str = DEFAULT_OUTPUT_DIR) -> "Corpus":
+        """Load every book found under a pipeline output directory."""
+        return cls(discover_verse_tables(output_dir))
+
+    def _intern(self, value: Any) -> Any:
+        return self._interned.setdefault(value, value)
+
+    def _append(self, book_name: str, row: Dict[str, Any]) -> None:
+        row_number = len(self)
+        columns = self.columns
+        columns["book"].append(len(self.book_names))
+        for name in INT_COLUMNS:
+            columns[name].append(int(row[name] or 0))
+        for name in STRING_COLUMNS:
+            value = row.get(name) or ""
+            columns[name].append(self._intern(value) if len(value) < 16 else value)
+        for name in LIST_COLUMNS:
+            columns[name].append(self._intern(row[name]))
+        for name in FLOAT_COLUMNS:
+            columns[name].append(row.get(name) or 0.0)
+        chapter, verse = columns["chapter"][row_number], columns["verse"][row_number]
+        self.chapter_index.setdefault((book_name, chapter), array("I")).append(row_number)
+        self.verse_index.setdefault((book_name, chapter, verse), row_number)
+
+    def _load_csv(self, book_name: str, path: str) -> None:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                for name, sep in CSV_LIST_SEPARATORS.items():
+                    row[name] = parse_csv_list(row.get(name), sep)
+                row["source_spans"] = parse_csv_spans(row.get("source_boundaries"))
+                for source, percentage in parse_csv_percentages(row.get("source_percentages")).items():
+                    row[f"pct_{source}"] = percentage
+                self._append(book_name, row)
+
+    def _load_parquet(self, book_name: str, path: str) -> None:
+        for row in pq.read_table(path).to_pylist():
+            for name in CSV_LIST_SEPARATORS:
+                row[name] = tuple(row[name] or ())
+            row["source_spans"] = tuple(
+                (span["start"], span["end"], span["source"], span["color"]) for span in row["source_spans"] or ()
+            )
+            self._append(book_name, row)
+
+    def __len__(self) -> int:
+        return len(self.columns["book"])
+
+    def __getitem__(self, column: str) -> Sequence[Any]:
+        return self.columns[column]
+
+    @property
+    def books(self) -> List[str]:
+        return list(self.book_names)
+
+    def indices(self, book: Optional[str] = None, chapter: Optional[int] = None) -> Sequence[int]:
+        """Row numbers of the whole corpus, a book, or a chapter of a book."""
+        if book is None:
+            return range(len(self))
+        if chapter is None:
+            return self.book_index.get(book, range(0))
+        return self.chapter_index.get((book, chapter), array("I"))
+
+    def find(self, book: str, chapter: int, verse: int) -> Optional[int]:
+        """Row number of a verse, or None."""
+        return self.verse_index.get((book, chapter, verse))
+
+    def row(self, row_number: int) -> Dict[str, Any]:
+        """One verse as a dict shaped like a Parquet verse table row."""
+        row = {name: column[row_number] for name, column in self.columns.items()}
+        row["book"] = self.book_names[row["book"]]
+        for name in LIST_COLUMNS:
+            row[name] = list(row[name])
+        return row
+
+    def iter_rows(self, book: Optional[str] = None, chapter: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Verse rows of the corpus, a book, or a chapter of a book."""
+        for row_number in self.indices(book, chapter):
+            yield self.row(row_number)
+
+    def percentages(self, row_number: int) -> Dict[str, float]:
+        """Source percentages of a verse as {source: percentage}."""
+        return {source: self.columns[f"pct_{source}"][row_number] for source in PERCENTAGE_SOURCES}
+
+    def frame(self, book: Optional[str] = None, columns: Optional[List[str]] = None):
+        """A pandas DataFrame of the corpus or a book, optionally only some columns.
+
+        Numbers get their narrow integer dtypes and repeated labels are
+        categoricals. Frames are cached per (book, columns), so later
+        commands in the same process reuse them; callers get a shallow copy.
+        """
+        import pandas as pd
+        names = tuple(columns or ["book"] + [name for name in self.columns if name != "book"])
+        key = (book, names)
+        if key not in self._frames:
+            rows = self.indices(book)
+            data = {}
+            for name in names:
+                column = self.columns[name]
+                if name == "book":
+                    values = [self.book_names[column[i]] for i in rows]
+                elif isinstance(rows, range):
+                    values = list(column[rows.start:rows.stop])
+                else:
+                    values = [column[i] for i in rows]
+                if name in LIST_COLUMNS:
+                    values = [list(value) for value in values]
+                dtype = FRAME_DTYPES.get(name)
+                if name == "book":
+                    data[name] = pd.Categorical(values, categories=self.book_names)
+                else:
+                    data[name] = pd.Series(values, dtype=dtype) if dtype else values
+            self._frames[key] = pd.DataFrame(data)
+        return self._frames[key].copy(deep=False)
+
+# CSV frames read in this process, by (path, mtime, columns)
+_CSV_FRAMES: Dict[Tuple[str, int, Optional[Tuple[str, ...]]], Any] = {}
+
+def read_verse_csv(path: str, columns: Optional[List[str]] = None):
+    """A verse CSV as written by the parser, reading only the given columns.
+
+    Unlike ``Corpus.frame()`` the CSV field formats are kept, for exports.
+    Known columns get declared dtypes (categoricals for repeated labels),
+    empty fields stay empty strings, and frames are cached until the file
+    changes.
+    """
+    import pandas as pd
+    usecols = tuple(columns) if columns else None
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns, usecols)
+    if key not in _CSV_FRAMES:
+        _CSV_FRAMES[key] = pd.read_csv(
+            path,
+            usecols=list(usecols) if usecols else None,
+            dtype={name: dtype for name, dtype in CSV_DTYPES.items() if usecols is None or name in usecols},
+            keep_default_na=False,
+        )
+        if usecols:
+            # usecols keeps file order; return the columns in the order asked for
+            _CSV_FRAMES[key] = _CSV_FRAMES[key][list(usecols)]
+    return _CSV_FRAMES[key].copy(deep=False)
+
+def count_verse_rows(path: str) -> int:
+    """Number of verses in a verse table without loading its columns."""
+    if path.endswith(".parquet") and pq is not None:
+        return pq.read_metadata(path).num_rows
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+# Corpora loaded in this process, by absolute output directory
+_CORPORA: Dict[str, Corpus] = {}
+
+def get_corpus(output_dir: str = DEFAULT_OUTPUT_DIR, reload: bool = False) -> Corpus:
+    """The corpus of an output directory, loaded on first use and shared afterwards.
+
+    A current ``corpus.snapshot`` (see ``snapshot.build_snapshot``) is mapped
+    instead of reading the verse tables.
+    """
+    from .snapshot import load_snapshot
+    key = os.path.abspath(output_dir)
+    if reload or key not in _CORPORA:
+        _CORPORA[key] = load_snapshot(output_dir) or Corpus.from_output_dir(output_dir)
+    return _CORPORA[key]
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Interval index of doublet passages.
+
+Every passage in ``doublets_data.json`` covers a contiguous range of verse
+IDs (see ``verse_index``). The index cuts the ID line at every passage start
+and end into elementary segments and records which passages cover each
+segment, so "which doublets contain this verse" is one bisect, and "which
+verses belong to this doublet" is a dict lookup returning one range per
+passage.
+
+``get_doublet_index()`` parses a doublets file once and shares the index
+until the file changes; the Qdrant client, the heat map and the Cytoscape
+integration use it instead of scanning every passage for every verse.
+"""
+
+import os
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .references import ReferenceParser, get_reference_parser
+from .verse_index import VerseIndex, get_verse_index
+
+DEFAULT_DOUBLETS_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "doublets_data.json")
+
+# (doublet id, passage number within the doublet)
+PassageKey = Tuple[str, int]
+
+class DoubletIndex:
+    """Doublet passages indexed by the verse-ID ranges they cover."""
+
+    def __init__(self, doublets_data: Dict[str, Any], verse_index: Optional[VerseIndex] = None):
+        self.data = doublets_data
+        self.verse_index = verse_index or get_verse_index()
+        self.reference_parser = ReferenceParser(verse_index) if verse_index else get_reference_parser()
+        self.doublets: Dict[str, Dict[str, Any]] = {}
+        self.passage_ranges: Dict[str, List[Optional[range]]] = {}
+
+        intervals: List[Tuple[range, PassageKey]] = []
+        for doublet in doublets_data.get("doublets", []):
+            self.doublets[doublet["id"]] = doublet
+            ranges = [self.passage_verses(passage) for passage in doublet.get("passages", [])]
+            self.passage_ranges[doublet["id"]] = ranges
+            intervals.extend((verses, (doublet["id"], number))
+                             for number, verses in enumerate(ranges) if verses)
+
+        # Segment i covers IDs boundaries[i] to boundaries[i + 1] - 1
+        self.boundaries = sorted({edge for verses, _ in intervals for edge in (verses.start, verses.stop)})
+        segments: List[List[PassageKey]] = [[] for _ in self.boundaries]
+        for verses, key in intervals:
+            for segment in range(bisect_left(self.boundaries, verses.start),
+                                 bisect_left(self.boundaries, verses.stop)):
+                segments[segment].append(key)
+        self.segments = [tuple(keys) for keys in segments]
+
+    @classmethod
+    def from_file(cls, doublets_file: str, verse_index: Optional[VerseIndex] = None) -> "DoubletIndex":
+        with open(doublets_file, "r", encoding="utf-8") as f:
+            return cls(json.load(f), verse_index)
+
+    def passage_verses(self, passage: Dict[str, Any]) -> Optional[range]:
+        """Verse IDs covered by a passage, or None if it is outside the verse index.
+
+        Passages without chapter/verse fields fall back to the span of their reference.
+        """
+        try:
+            return self.verse_index.passage_range(passage["book"], passage["chapter_start"], passage["verse_start"],
+                                                  passage["chapter_end"], passage["verse_end"])
+        except (KeyError, TypeError):
+            pass
+        try:
+            return self.reference_parser.parse(passage["reference"]).span().ids
+        except (KeyError, ValueError):
+            return None
+
+    def passages_at(self, verse_id: Optional[int]) -> Tuple[PassageKey, ...]:
+        """(doublet id, passage number) of every passage containing a verse."""
+        if verse_id is None:
+            return ()
+        segment = bisect_right(self.boundaries, verse_id) - 1
+        if segment < 0:
+            return ()
+        return self.segments[segment]
+
+    def passages_at_verse(self, book: str, chapter: int, verse: int) -> Tuple[PassageKey, ...]:
+        return self.passages_at(self.verse_index.find(book, chapter, verse))
+
+    def doublets_at(self, verse_id: Optional[int]) -> List[str]:
+        """IDs of the doublets with a passage containing a verse."""
+        return list(dict.fromkeys(doublet_id for doublet_id, _ in self.passages_at(verse_id)))
+
+    def doublets_at_verse(self, book: str, chapter: int, verse: int) -> List[str]:
+        return self.doublets_at(self.verse_index.find(book, chapter, verse))
+
+    def passages_overlapping(self, verses: range) -> List[PassageKey]:
+        """Every passage sharing at least one verse with a range of verse IDs."""
+        if not verses or not self.boundaries:
+            return []
+        first = max(bisect_right(self.boundaries, verses.start) - 1, 0)
+        last = bisect_left(self.boundaries, verses.stop)
+        keys = (key for segment in self.segments[first:last] for key in segment)
+        return list(dict.fromkeys(keys))
+
+    def verses(self, doublet_id: str) -> List[range]:
+        """Verse-ID ranges of a doublet's passages (those inside the verse index)."""
+        return [verses for verses in self.passage_ranges.get(doublet_id, []) if verses]
+
+    def passage(self, key: PassageKey) -> Dict[str, Any]:
+        doublet_id, number = key
+        return self.doublets[doublet_id]["passages"][number]
+
+    def verse_doublet_info(self, book: str, chapter: int, verse: int) -> Dict[str, Any]:
+        """Doublet membership of a verse, in the shape stored in Qdrant payloads."""
+        keys = self.passages_at_verse(book, chapter, verse)
+        doublets = [self.doublets[doublet_id] for doublet_id in dict.fromkeys(d for d, _ in keys)]
+        parallel_passages = []
+        related_themes = []
+        for doublet_id, number in keys:
+            passages = self.doublets[doublet_id]["passages"]
+            parallel_passages.extend(other.get("reference") for other_number, other in enumerate(passages)
+                                     if other_number != number)
+            related_themes.extend(passages[number].get("themes", []))
+        return {
+            "is_doublet": bool(keys),
+            "doublet_ids": [doublet.get("id") for doublet in doublets],
+            "doublet_names": list(dict.fromkeys(doublet.get("name") for doublet in doublets)),
+            "doublet_categories": list(dict.fromkeys(doublet.get("category") for doublet in doublets)),
+            "parallel_passages": list(dict.fromkeys(parallel_passages)),
+            "theological_differences": list(dict.fromkeys(
+                difference for doublet in doublets for difference in doublet.get("theological_differences", [])
+            )),
+            "related_themes": list(dict.fromkeys(related_themes)),
+        }
+
+# Indexes loaded in this process, by absolute doublets file path
+_DOUBLET_INDEXES: Dict[str, Tuple[int, DoubletIndex]] = {}
+
+def get_doublet_index(doublets_file: Optional[str] = None) -> DoubletIndex:
+    """The index of a doublets file, parsed on first use and again only when the file changes."""
+    path = os.path.abspath(doublets_file or DEFAULT_DOUBLETS_FILE)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _DOUBLET_INDEXES.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _DOUBLET_INDEXES[path] = (mtime, DoubletIndex.from_file(path))
+    return cached[1]
@@ -23,11 +23,17 @@ from rich.layout import Layout
 from rich.live import Live
 from rich.prompt import Prompt
 from rich.align import Align
+from rich.markup import escape
 from datetime import datetime
 
 # Add the parent directory to sys.path to import parse_wikitext
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from .corpus import count_verse_rows, discover_verse_tables, get_corpus, read_verse_csv
+from .snapshot import CorpusSnapshot, build_snapshot
+from .sqlite_store import build_database, open_database
+from .verse_table import split_sources
+
 # Import Qdrant client
 try:
     from .qdrant_client import create_qdrant_client, KJVQdrantClient
@@ -55,6 +61,13 @@ BOOKS = {
     "deuteronomy": "Deuteronomy"
 }
 
+# Verse table columns each command reads
+TABLE_COLUMNS = [
+    "chapter", "verse", "canonical_reference", "full_text",
+    "sources", "source_count", "primary_source", "word_count",
+]
+STATS_COLUMNS = ["chapter", "word_count", "sources", "source_count"]
+
 console = Console()
 
 @click.group()
@@ -77,19 +90,19 @@ def view(book, limit, chapter, source, show_multi, format):
         console.print(f"[red]Error: Unknown book '{book}'. Available: {list(BOOKS.keys())}[/red]")
         return
     
-    csv_path = os.path.join(DEFAULT_OUTPUT_DIR, book_name, f"{book_name}.csv")
-    if not os.path.exists(csv_path):
+    corpus = get_corpus(DEFAULT_OUTPUT_DIR)
+    if book_name not in corpus.book_index:
         console.print(f"[red]Error: No data found for {book_name}. Run the parser first.[/red]")
         return
     
-    # Load and filter data
-    df = pd.read_csv(csv_path)
+    # Load and filter data; JSON output shows every column
+    df = corpus.frame(book_name, columns=None if format == "json" else TABLE_COLUMNS)
     
     if chapter:
         df = df[df['chapter'] == chapter]
     
     if source:
-        df = df[df['sources'].str.contains(source, na=False)]
+        df = df[df['sources'].map(lambda sources: source in split_sources(sources))]
     
     if show_multi:
         df = df[df['source_count'] > 1]
@@ -101,7 +114,7 @@ def view(book, limit, chapter, source, show_multi, format):
         return
     
     if format == "json":
-        console.print_json(data=df.to_dict('records'))
+        console.print_json(df.to_json(orient='records'))
         return
     
     if format == "compact":
@@ -124,7 +137,7 @@ def show_rich_table(df, book_name):
     for _, row in df.iterrows():
         # Color-code the sources
         sources_text = Text()
-        for s in row['sources'].split(';'):
+        for s in split_sources(row['sources']):
             color = SOURCE_COLORS.get(s, "white")
             sources_text.append(f"{s} ", style=color)
         
@@ -147,7 +160,7 @@ def show_compact_view(df, book_name):
     
     for _, row in df.iterrows():
         # Create colored source indicator
-        sources = row['sources'].split(';')
+        sources = split_sources(row['sources'])
         source_indicators = []
         for s in sources:
             color = SOURCE_COLORS.get(s, "white")
@@ -182,26 +195,26 @@ def export_csv(book, output, format):
         console.print(f"[red]Error: No data found for {book_name}. Run the parser first.[/red]")
         return
     
-    df = pd.read_csv(csv_path)
-    
     if format == "simple":
         # Simple format with basic columns
-        simple_df = df[['canonical_reference', 'full_text', 'sources', 'primary_source', 'word_count']]
+        df = read_verse_csv(csv_path, columns=['canonical_reference', 'full_text', 'sources',
+                                               'primary_source', 'word_count'])
         output_cols = ['Reference', 'Text', 'Sources', 'Primary Source', 'Word Count']
-        simple_df.columns = output_cols
+        df.columns = output_cols
     
     elif format == "llm":
         # LLM-optimized format
-        llm_df = df[['canonical_reference', 'full_text', 'sources', 'source_count', 
-                    'primary_source', 'source_sequence', 'source_percentages', 
-                    'redaction_indicators', 'text_J', 'text_E', 'text_P', 'text_R']]
+        df = read_verse_csv(csv_path, columns=['canonical_reference', 'full_text', 'sources', 'source_count',
+                                               'primary_source', 'source_sequence', 'source_percentages',
+                                               'redaction_indicators', 'text_J', 'text_E', 'text_P', 'text_R'])
         output_cols = ['Reference', 'Text', 'Sources', 'Source Count', 'Primary Source',
                       'Source Sequence', 'Source Percentages', 'Redaction Indicators',
                       'J Text', 'E Text', 'P Text', 'R Text']
-        llm_df.columns = output_cols
+        df.columns = output_cols
     
     else:
         # Full format (default)
+        df = read_verse_csv(csv_path)
         output_cols = df.columns
     
     if not output:
@@ -285,12 +298,12 @@ def stats(book):
         console.print(f"[red]Error: Unknown book '{book}'. Available: {list(BOOKS.keys())}[/red]")
         return
     
-    csv_path = os.path.join(DEFAULT_OUTPUT_DIR, book_name, f"{book_name}.csv")
-    if not os.path.exists(csv_path):
+    corpus = get_corpus(DEFAULT_OUTPUT_DIR)
+    if book_name not in corpus.book_index:
         console.print(f"[red]Error: No data found for {book_name}. Run the parser first.[/red]")
         return
     
-    df = pd.read_csv(csv_path)
+    df = corpus.frame(book_name, columns=STATS_COLUMNS)
     
     # Calculate statistics
     total_verses = len(df)
@@ -298,10 +311,7 @@ def stats(book):
     total_words = df['word_count'].sum()
     
     # Source analysis
-    source_counts = {}
-    for sources in df['sources']:
-        for source in sources.split(';'):
-            source_counts[source] = source_counts.get(source, 0) + 1
+    source_counts = df['sources'].explode().value_counts().to_dict()
     
     multi_source_verses = len(df[df['source_count'] > 1])
     single_source_verses = len(df[df['source_count'] == 1])
@@ -361,7 +371,7 @@ def combine(books, output):
                 console.print(f"[yellow]Warning: No data found for {book_name}, skipping...[/yellow]")
                 continue
             
-            df = pd.read_csv(csv_path)
+            df = read_verse_csv(csv_path)
             all_data.append(df)
             progress.update(task, advance=1)
     
@@ -385,13 +395,12 @@ def list_books():
     table.add_column("Verses", justify="right")
     table.add_column("Last Updated", style="dim")
     
+    # Row counts only; the verse tables are not loaded
+    tables = discover_verse_tables(DEFAULT_OUTPUT_DIR)
     for book_key, book_name in BOOKS.items():
-        csv_path = os.path.join(DEFAULT_OUTPUT_DIR, book_name, f"{book_name}.csv")
-        
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            verse_count = len(df)
-            mtime = os.path.getmtime(csv_path)
+        if book_name in tables:
+            verse_count = count_verse_rows(tables[book_name])
+            mtime = os.path.getmtime(tables[book_name])
             last_updated = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M")
             
             table.add_row(
@@ -410,6 +419,73 @@ def list_books():
     
     console.print(table)
 
+@cli.command()
+@click.option("--output", default=None, help="Snapshot file (default: output/corpus.snapshot)")
+def snapshot(output):
+    """Compile all book CSVs into one memory-mapped corpus snapshot."""
+    
+    try:
+        path = build_snapshot(DEFAULT_OUTPUT_DIR, output)
+    except FileNotFoundError as e:
+        console.print(f"[red]Error: {e}. Run the parser first.[/red]")
+        return
+    
+    corpus = CorpusSnapshot(path)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    console.print(f"[green]✅ Wrote {len(corpus)} verses from {len(corpus.books)} books to {path} ({size_mb:.1f} MB)[/green]")
+    if output is None:
+        console.print("[blue]📊 The CLIs and API servers now map this file instead of reading the CSVs[/blue]")
+
+@cli.command()
+@click.option("--output", default=None, help="Database file (default: output/kjv_sources.db)")
+def database(output):
+    """Load all book CSVs into the embedded SQLite database with full-text search."""
+    
+    try:
+        path = build_database(DEFAULT_OUTPUT_DIR, output)
+    except FileNotFoundError as e:
+        console.print(f"[red]Error: {e}. Run the parser first.[/red]")
+        return
+    
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    console.print(f"[green]✅ Wrote {path} ({size_mb:.1f} MB)[/green]")
+    if output is None:
+        console.print("[blue]📊 Query it with 'search-text' or through /api/search-text[/blue]")
+
+@cli.command()
+@click.argument("query")
+@click.option("--book", help="Filter by specific book")
+@click.option("--source", help="Filter by specific source (J, E, P, R)")
+@click.option("--limit", default=20, help="Number of results to return")
+def search_text(query, book, source, limit):
+    """Full-text search of verse text in the SQLite database."""
+    
+    database = open_database(DEFAULT_OUTPUT_DIR)
+    if database is None:
+        console.print("[red]Error: No verse database. Run 'database' first.[/red]")
+        return
+    
+    book_name = BOOKS.get(book.lower(), book) if book else None
+    with database:
+        results = database.search(query, limit=limit, book=book_name, source=source.upper() if source else None)
+    
+    if not results:
+        console.print(f"[yellow]No verses found matching '{query}'[/yellow]")
+        return
+    
+    table = Table(title=f"🔍 Full-text results for '{query}'")
+    table.add_column("Reference", style="bold")
+    table.add_column("Text", style="italic", width=70)
+    table.add_column("Sources", style="bold")
+    
+    for verse in results:
+        sources_text = Text()
+        for s in verse["sources"]:
+            sources_text.append(f"{s} ", style=SOURCE_COLORS.get(s, "white"))
+        table.add_row(verse["canonical_reference"], escape(verse["snippet"]), sources_text)
+    
+    console.print(table)
+
 @cli.command()
 @click.argument("book")
 @click.option("--chapter", type=int, help="Specific chapter to search")
@@ -423,12 +499,12 @@ def search(book, chapter, verse, text):
         console.print(f"[red]Error: Unknown book '{book}'. Available: {list(BOOKS.keys())}[/red]")
         return
     
-    csv_path = os.path.join(DEFAULT_OUTPUT_DIR, book_name, f"{book_name}.csv")
-    if not os.path.exists(csv_path):
+    corpus = get_corpus(DEFAULT_OUTPUT_DIR)
+    if book_name not in corpus.book_index:
         console.print(f"[red]Error: No data found for {book_name}. Run the parser first.[/red]")
         return
     
-    df = pd.read_csv(csv_path)
+    df = corpus.frame(book_name, columns=TABLE_COLUMNS)
     
     # Apply filters
     if chapter:
@@ -499,14 +575,14 @@ def upload(book):
         console.print(f"[red]Error: Unknown book '{book}'. Available: {list(BOOKS.keys())}[/red]")
         return
     
-    csv_path = os.path.join(DEFAULT_OUTPUT_DIR, book_name, f"{book_name}.csv")
-    if not os.path.exists(csv_path):
+    corpus = get_corpus(DEFAULT_OUTPUT_DIR)
+    if book_name not in corpus.book_index:
         console.print(f"[red]Error: No data found for {book_name}. Run the parser first.[/red]")
         return
     
     try:
         client = create_qdrant_client()
-        success = client.upload_book_data(book_name, csv_path)
+        success = client.upload_book_data(book_name, corpus)
         
         if success:
             console.print(f"[green]✅ Successfully uploaded {book_name} to Qdrant[/green]")
@@ -528,6 +604,7 @@ def upload_all(books):
     
     try:
         client = create_qdrant_client()
+        corpus = get_corpus(DEFAULT_OUTPUT_DIR)
         
         for book in books:
             book_name = BOOKS.get(book.lower())
@@ -535,13 +612,12 @@ def upload_all(books):
                 console.print(f"[yellow]Warning: Unknown book '{book}', skipping...[/yellow]")
                 continue
             
-            csv_path = os.path.join(DEFAULT_OUTPUT_DIR, book_name, f"{book_name}.csv")
-            if not os.path.exists(csv_path):
+            if book_name not in corpus.book_index:
                 console.print(f"[yellow]Warning: No data found for {book_name}, skipping...[/yellow]")
                 continue
             
             console.print(f"[blue]📤 Uploading {book_name}...[/blue]")
-            success = client.upload_book_data(book_name, csv_path)
+            success = client.upload_book_data(book_name, corpus)
             
             if success:
                 console.print(f"[green]✅ {book_name} uploaded successfully[/green]")
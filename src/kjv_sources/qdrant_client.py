@@ -12,7 +12,6 @@ import re
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import numpy as np
-import pandas as pd
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance, VectorParams, PointStruct, 
@@ -26,6 +25,10 @@ from rich.table import Table
 from rich.panel import Panel
 from pathlib import Path
 
+from .corpus import Corpus, get_corpus
+from .doublet_index import DoubletIndex, get_doublet_index
+from .verse_table import split_sources, join_field, source_percentages_field
+
 console = Console()
 
 class KJVQdrantClient:
@@ -51,6 +54,9 @@ class KJVQdrantClient:
         # Load entity relations
         self.entity_relations = self.load_entity_relations()
         
+        # Doublet interval index, built on first use
+        self._doublet_index: Optional[DoubletIndex] = None
+        
         console.print(f"[green]✅ Connected to Qdrant cluster: {cluster_id}[/green]")
     
     def load_entity_relations(self) -> Dict[str, Any]:
@@ -205,7 +211,7 @@ class KJVQdrantClient:
             console.print(f"[red]❌ Error generating embedding: {e}[/red]")
             return []
     
-    def prepare_verse_data(self, row: pd.Series) -> Dict[str, Any]:
+    def prepare_verse_data(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare verse data for Qdrant storage with POV analysis."""
         # Create a rich text representation for embedding
         text_for_embedding = f"{row['canonical_reference']}: {row['full_text']}"
@@ -229,13 +235,13 @@ class KJVQdrantClient:
             "verse": int(row.get('verse', 0)),
             "canonical_reference": row.get('canonical_reference', ''),
             "full_text": row.get('full_text', ''),
-            "sources": row.get('sources', ''),
+            "sources": join_field(row.get('sources', '')),
             "source_count": int(row.get('source_count', 0)),
             "primary_source": row.get('primary_source', ''),
             "word_count": int(row.get('word_count', 0)),
-            "source_sequence": row.get('source_sequence', ''),
-            "source_percentages": row.get('source_percentages', ''),
-            "redaction_indicators": row.get('redaction_indicators', ''),
+            "source_sequence": join_field(row.get('source_sequence', ''), sep="->"),
+            "source_percentages": source_percentages_field(row),
+            "redaction_indicators": join_field(row.get('redaction_indicators', ''), empty="none"),
             "text_J": row.get('text_J', ''),
             "text_E": row.get('text_E', ''),
             "text_P": row.get('text_P', ''),
@@ -277,7 +283,7 @@ class KJVQdrantClient:
             "metadata": metadata
         }
     
-    def analyze_source_pov(self, row: pd.Series) -> Dict[str, Any]:
+    def analyze_source_pov(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze point of view for each source in the verse."""
         pov_analysis = {
             'primary_pov': '',
@@ -297,7 +303,7 @@ class KJVQdrantClient:
             'confidence': 0.0
         }
         
-        sources = row.get('sources', '').split(';')
+        sources = split_sources(row.get('sources', ''))
         source_texts = {
             'J': row.get('text_J', ''),
             'E': row.get('text_E', ''),
@@ -473,84 +479,32 @@ class KJVQdrantClient:
             console.print(f"[yellow]⚠️ Could not load doublets data: {e}[/yellow]")
             return {"doublets": [], "categories": {}}
     
-    def analyze_verse_for_doublets(self, row: pd.Series) -> Dict[str, Any]:
+    @property
+    def doublet_index(self) -> DoubletIndex:
+        """Interval index of the doublet passages, shared with other users of doublets_data.json."""
+        if self._doublet_index is None:
+            try:
+                self._doublet_index = get_doublet_index()
+            except (OSError, ValueError) as e:
+                console.print(f"[yellow]⚠️ Could not load doublets data: {e}[/yellow]")
+                self._doublet_index = DoubletIndex({"doublets": [], "categories": {}})
+        return self._doublet_index
+    
+    def analyze_verse_for_doublets(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze if a verse is part of any known doublets."""
-        doublet_info = {
-            'is_doublet': False,
-            'doublet_ids': [],
-            'doublet_names': [],
-            'doublet_categories': [],
-            'parallel_passages': [],
-            'theological_differences': [],
-            'related_themes': []
-        }
-        
         book = row.get('book', '')
         chapter = int(row.get('chapter', 0))
         verse = int(row.get('verse', 0))
-        sources = row.get('sources', '').split(';')
-        
-        doublets_data = self.load_doublets_data()
-        
-        for doublet in doublets_data.get('doublets', []):
-            # Check if this verse falls within any doublet passage
-            for passage in doublet.get('passages', []):
-                if (passage.get('book') == book and
-                    passage.get('chapter_start') <= chapter <= passage.get('chapter_end')):
-                    
-                    # Check verse range
-                    verse_in_range = False
-                    if passage.get('chapter_start') == passage.get('chapter_end'):
-                        # Same chapter
-                        verse_in_range = passage.get('verse_start') <= verse <= passage.get('verse_end')
-                    elif chapter == passage.get('chapter_start'):
-                        # First chapter
-                        verse_in_range = verse >= passage.get('verse_start')
-                    elif chapter == passage.get('chapter_end'):
-                        # Last chapter
-                        verse_in_range = verse <= passage.get('verse_end')
-                    else:
-                        # Middle chapters
-                        verse_in_range = True
-                    
-                    if verse_in_range:
-                        doublet_info['is_doublet'] = True
-                        doublet_info['doublet_ids'].append(doublet.get('id'))
-                        doublet_info['doublet_names'].append(doublet.get('name'))
-                        doublet_info['doublet_categories'].append(doublet.get('category'))
-                        
-                        # Add parallel passages
-                        for other_passage in doublet.get('passages', []):
-                            if other_passage != passage:
-                                doublet_info['parallel_passages'].append(other_passage.get('reference'))
-                        
-                        # Add theological differences
-                        doublet_info['theological_differences'].extend(
-                            doublet.get('theological_differences', [])
-                        )
-                        
-                        # Add related themes
-                        doublet_info['related_themes'].extend(
-                            passage.get('themes', [])
-                        )
-        
-        # Remove duplicates
-        doublet_info['doublet_ids'] = list(set(doublet_info['doublet_ids']))
-        doublet_info['doublet_names'] = list(set(doublet_info['doublet_names']))
-        doublet_info['doublet_categories'] = list(set(doublet_info['doublet_categories']))
-        doublet_info['parallel_passages'] = list(set(doublet_info['parallel_passages']))
-        doublet_info['theological_differences'] = list(set(doublet_info['theological_differences']))
-        doublet_info['related_themes'] = list(set(doublet_info['related_themes']))
-        
-        return doublet_info
+        return self.doublet_index.verse_doublet_info(book, chapter, verse)
     
-    def upload_book_data(self, book_name: str, csv_path: str) -> bool:
-        """Upload a book's data to Qdrant."""
+    def upload_book_data(self, book_name: str, corpus: Optional[Corpus] = None) -> bool:
+        """Upload a book's verses to Qdrant from the shared corpus (by default the one under output/)."""
         try:
             console.print(f"[blue]📖 Loading data for {book_name}...[/blue]")
-            df = pd.read_csv(csv_path)
+            corpus = corpus or get_corpus()
+            rows = corpus.indices(book_name)
             
-            if df.empty:
+            if not rows:
                 console.print(f"[yellow]⚠️ No data found for {book_name}[/yellow]")
                 return False
             
@@ -562,10 +516,10 @@ class KJVQdrantClient:
                 TextColumn("[progress.description]{task.description}"),
                 console=console
             ) as progress:
-                task = progress.add_task(f"Processing {book_name} verses...", total=len(df))
+                task = progress.add_task(f"Processing {book_name} verses...", total=len(rows))
                 
-                for _, row in df.iterrows():
-                    verse_data = self.prepare_verse_data(row)
+                for row_number in rows:
+                    verse_data = self.prepare_verse_data(corpus.row(row_number))
                     if verse_data:
                         points.append(PointStruct(
                             id=verse_data["id"],
@@ -1411,27 +1365,8 @@ class KJVQdrantClient:
     def search_doublet_parallels(self, book: str, chapter: int, verse: int) -> List[Dict]:
         """Find parallel passages for a specific verse if it's part of a doublet."""
         try:
-            # First, get the verse to see if it's a doublet
-            verse_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=[0.0] * self.embedding_dim,
-                query_filter=Filter(
-                    must=[
-                        FieldCondition(key="book", match=MatchValue(value=book)),
-                        FieldCondition(key="chapter", match=MatchValue(value=chapter)),
-                        FieldCondition(key="verse", match=MatchValue(value=verse)),
-                        FieldCondition(key="is_doublet", match=MatchValue(value=True))
-                    ]
-                ),
-                limit=1,
-                with_payload=True
-            )
-            
-            if not verse_results:
-                return []
-            
-            # Get the doublet IDs from this verse
-            doublet_ids = verse_results[0].payload.get("doublet_ids", [])
+            # Get the doublet IDs of this verse from the interval index
+            doublet_ids = self.doublet_index.doublets_at_verse(book, chapter, verse)
             
             if not doublet_ids:
                 return []
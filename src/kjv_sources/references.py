@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Biblical reference parsing.
+
+One parser for every reference string in the project:
+
+* single verses: "Genesis 1:1", "Genesis 1 1", "Genesis_1_1", "Gen.1.1";
+* ranges and cross-chapter spans: "Genesis 12:10-20", "Genesis 1:1-2:3";
+* verse lists with partial-verse letters: "Genesis 5:1-28,30-32",
+  "Exodus 3:2-4a,5,7-8; 4:19-20a";
+* whole chapters: "Genesis 15", "Genesis 15-16".
+
+Book names and abbreviations are resolved through the verse index, and
+every range carries its packed verse IDs when the book is in the index.
+Patterns are compiled once and results are kept in a bounded LRU cache,
+since the same few hundred references are parsed over and over by the
+visualisations and the APIs.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+from .verse_index import VerseIndex, get_verse_index
+
+# Parsed references kept per parser
+REFERENCE_CACHE_SIZE = 4096
+
+# Book name (optionally numbered, several words) followed by the chapter/verse part
+REFERENCE_RE = re.compile(r"^\s*((?:[1-3]\s*)?[A-Za-z]+(?:\s+[A-Za-z]+)*)\.?[\s._]*(\d.*?)\s*$")
+# "1.1", "1_1" and "1 1" verse keys
+KEY_LOCATOR_RE = re.compile(r"^(\d+)(?:[._]|\s+)(\d+)$")
+# A ";"-separated group: chapter, optionally a chapter range or ":" and a verse list
+GROUP_RE = re.compile(r"^(\d+)(?:\s*-\s*(\d+)|\s*:\s*(.+))?$")
+# One item of a verse list: verse, optionally "-" and an end verse or chapter:verse
+ITEM_RE = re.compile(r"^(\d+)[a-z]?(?:\s*-\s*(?:(\d+)\s*:\s*)?(\d+)[a-z]?)?$")
+
+class VerseRange(NamedTuple):
+    """Consecutive verses of one book, with their packed verse IDs.
+
+    start and stop are the verse IDs of the first verse and one past the
+    last, or None when the verses are not in the verse index.
+    """
+    book: str
+    chapter_start: int
+    verse_start: int
+    chapter_end: int
+    verse_end: int
+    start: Optional[int] = None
+    stop: Optional[int] = None
+
+    @property
+    def ids(self) -> Optional[range]:
+        if self.start is None or self.stop is None:
+            return None
+        return range(self.start, self.stop)
+
+class Reference(NamedTuple):
+    """A parsed reference: its book and the verse ranges it lists, in order."""
+    text: str
+    book: str
+    ranges: Tuple[VerseRange, ...]
+
+    @property
+    def first(self) -> Tuple[str, int, int]:
+        """(book, chapter, verse) of the first verse."""
+        return self.book, self.ranges[0].chapter_start, self.ranges[0].verse_start
+
+    def span(self) -> VerseRange:
+        """One range from the first verse to the last verse of the reference.
+
+        It has verse IDs only when both the first and the last range are in
+        the verse index.
+        """
+        first, last = self.ranges[0], self.ranges[-1]
+        if first.start is None or last.stop is None:
+            return VerseRange(self.book, first.chapter_start, first.verse_start, last.chapter_end, last.verse_end)
+        return VerseRange(self.book, first.chapter_start, first.verse_start, last.chapter_end, last.verse_end,
+                          first.start, last.stop)
+
+    def verse_ids(self) -> List[range]:
+        """Packed verse-ID ranges of the reference (those in the verse index)."""
+        return [verses.ids for verses in self.ranges if verses.start is not None]
+
+    def __contains__(self, verse_id: object) -> bool:
+        return any(verses.start is not None and verses.start <= verse_id < verses.stop for verses in self.ranges)
+
+class ReferenceParser:
+    """Parser bound to a verse index, with its own LRU cache."""
+
+    def __init__(self, verse_index: Optional[VerseIndex] = None, cache_size: int = REFERENCE_CACHE_SIZE):
+        self.verse_index = verse_index or get_verse_index()
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def _range(self, book: str, chapter_start: int, verse_start: int,
+               chapter_end: int, verse_end: int) -> VerseRange:
+        index = self.verse_index
+        start = index.find(book, chapter_start, verse_start)
+        end = index.find(book, chapter_end, verse_end)
+        if start is None or end is None or end < start:
+            return VerseRange(book, chapter_start, verse_start, chapter_end, verse_end)
+        return VerseRange(book, chapter_start, verse_start, chapter_end, verse_end, start, end + 1)
+
+    def _chapters(self, book: str, chapter_start: int, chapter_end: int) -> VerseRange:
+        try:
+            last_verse = len(self.verse_index.chapter_range(book, chapter_end))
+        except KeyError:
+            # Book or chapter outside the index: verse_end 0 stands for "end of chapter"
+            return VerseRange(book, chapter_start, 1, chapter_end, 0)
+        return self._range(book, chapter_start, 1, chapter_end, last_verse)
+
+    def _parse(self, text: str) -> Reference:
+        match = REFERENCE_RE.match(text)
+        if not match:
+            raise ValueError(f"Not a biblical reference: {text!r}")
+        name, locator = match.groups()
+        book = self.verse_index.resolve_book(name) or " ".join(name.split())
+
+        key = KEY_LOCATOR_RE.match(locator)
+        if key:
+            chapter, verse = int(key.group(1)), int(key.group(2))
+            return Reference(text, book, (self._range(book, chapter, verse, chapter, verse),))
+
+        ranges = []
+        for group in locator.split(";"):
+            group_match = GROUP_RE.match(group.strip())
+            if not group_match:
+                raise ValueError(f"Cannot parse {group.strip()!r} in reference {text!r}")
+            chapter = int(group_match.group(1))
+            if group_match.group(3) is None:
+                ranges.append(self._chapters(book, chapter, int(group_match.group(2) or chapter)))
+                continue
+            for item in group_match.group(3).split(","):
+                item_match = ITEM_RE.match(item.strip())
+                if not item_match:
+                    raise ValueError(f"Cannot parse {item.strip()!r} in reference {text!r}")
+                verse_start = int(item_match.group(1))
+                end_chapter = int(item_match.group(2) or chapter)
+                verse_end = int(item_match.group(3) or verse_start)
+                ranges.append(self._range(book, chapter, verse_start, end_chapter, verse_end))
+                # Later items of a cross-chapter list continue in its last chapter
+                chapter = end_chapter
+        return Reference(text, book, tuple(ranges))
+
+_DEFAULT_PARSER: Optional[ReferenceParser] = None
+
+def get_reference_parser() -> ReferenceParser:
+    """The shared parser of the default verse index."""
+    global _DEFAULT_PARSER
+    if _DEFAULT_PARSER is None:
+        _DEFAULT_PARSER = ReferenceParser()
+    return _DEFAULT_PARSER
+
+def parse_reference(text: str) -> Reference:
+    """Parse a reference with the shared, cached parser; raises ValueError if it is malformed."""
+    return get_reference_parser().parse(text)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped binary corpus snapshot.
+
+``build_snapshot()`` compiles every verse table of an output directory into
+one file, ``<output_dir>/corpus.snapshot``, which ``CorpusSnapshot`` maps
+read-only instead of parsing. Processes that map the same file (several
+uvicorn workers, a CLI next to a server) share its pages through the OS page
+cache, and opening it only reads a small JSON table of contents.
+
+Layout: an 8-byte magic, the table of contents length (little-endian
+uint64), the table of contents (JSON), then 8-byte aligned sections in
+native byte order:
+
+* fixed-width columns: book id, chapter, verse, word count, source count,
+  source bitmask and one float64 column per source percentage;
+* text columns as a uint32 offsets array (rows + 1) plus a UTF-8 blob;
+* list columns (sources, source_sequence, redaction_indicators) as offsets
+  plus uint16 ids into a label table, and source_spans as offsets plus
+  parallel start/end/source/color arrays;
+* a sorted packed (book, chapter, verse) key array with the matching row
+  numbers, used for chapter and verse lookups.
+
+``get_corpus()`` uses the snapshot when it is still current, i.e. it was
+built from the verse tables that are on disk now, and reads the tables
+otherwise.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .corpus import (
+    DEFAULT_OUTPUT_DIR, FLOAT_COLUMNS, INT_COLUMNS, STRING_COLUMNS,
+    Corpus, discover_verse_tables,
+)
+from .verse_table import SOURCE_BITS
+
+SNAPSHOT_FILE_NAME = "corpus.snapshot"
+SNAPSHOT_MAGIC = b"KJVCORP\x00"
+SNAPSHOT_VERSION = 1
+
+# List columns stored as label ids
+LABEL_LIST_COLUMNS = ["sources", "source_sequence", "redaction_indicators"]
+
+# Packed lookup key: book << 24 | chapter << 12 | verse
+_BOOK_SHIFT = 24
+_CHAPTER_SHIFT = 12
+_MAX_BOOKS = 1 << (32 - _BOOK_SHIFT)
+_MAX_NUMBER = 1 << _CHAPTER_SHIFT
+
+_HEADER = struct.Struct("<8sQ")
+
+def snapshot_path(output_dir: str = DEFAULT_OUTPUT_DIR) -> str:
+    """Path of the corpus snapshot of an output directory."""
+    return os.path.join(output_dir, SNAPSHOT_FILE_NAME)
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def _verse_key(book_id: int, chapter: int, verse: int) -> int:
+    return book_id << _BOOK_SHIFT | chapter << _CHAPTER_SHIFT | verse
+
+def _table_stats(tables: Dict[str, str], output_dir: str) -> Dict[str, Dict[str, Any]]:
+    stats = {}
+    for book_name, path in tables.items():
+        stat = os.stat(path)
+        stats[book_name] = {
+            "path": os.path.relpath(path, output_dir),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+    return stats
+
+def write_snapshot(corpus: Corpus, path: str, tables: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Write a corpus to a snapshot file, replacing it atomically.
+
+    tables records the verse tables the corpus was read from, so readers can
+    tell whether the snapshot is still current.
+    """
+    if len(corpus.book_names) > _MAX_BOOKS:
+        raise ValueError(f"A snapshot holds at most {_MAX_BOOKS} books")
+    rows = len(corpus)
+    sections: List[Tuple[str, str, bytes]] = []
+
+    def add(name: str, values: array) -> None:
+        sections.append((name, values.typecode, values.tobytes()))
+
+    for name in ["book"] + list(INT_COLUMNS):
+        add(name, corpus.columns[name])
+    source_mask = array("B", bytes(rows))
+    for row_number, sources in enumerate(corpus.columns["sources"]):
+        for source in sources:
+            source_mask[row_number] |= SOURCE_BITS.get(source, 0)
+    add("source_mask", source_mask)
+    for name in FLOAT_COLUMNS:
+        add(name, corpus.columns[name])
+
+    for name in STRING_COLUMNS:
+        offsets, blob = array("I", [0]), bytearray()
+        for value in corpus.columns[name]:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        add(f"{name}.offsets", offsets)
+        sections.append((f"{name}.data", "B", bytes(blob)))
+
+    labels: Dict[str, int] = {}
+    def label_id(value: str) -> int:
+        return labels.setdefault(value, len(labels))
+
+    for name in LABEL_LIST_COLUMNS:
+        offsets, items = array("I", [0]), array("H")
+        for values in corpus.columns[name]:
+            items.extend(label_id(value) for value in values)
+            offsets.append(len(items))
+        add(f"{name}.offsets", offsets)
+        add(f"{name}.items", items)
+
+    span_offsets = array("I", [0])
+    starts, ends, span_sources, colors = array("I"), array("I"), array("H"), array("H")
+    for spans in corpus.columns["source_spans"]:
+        for start, end, source, color in spans:
+            starts.append(start)
+            ends.append(end)
+            span_sources.append(label_id(source))
+            colors.append(label_id(color))
+        span_offsets.append(len(starts))
+    for name, values in [("offsets", span_offsets), ("starts", starts), ("ends", ends),
+                         ("sources", span_sources), ("colors", colors)]:
+        add(f"source_spans.{name}", values)
+
+    if rows and max(max(corpus.columns["chapter"]), max(corpus.columns["verse"])) >= _MAX_NUMBER:
+        raise ValueError(f"Chapter and verse numbers must be below {_MAX_NUMBER}")
+    # Stable sort: duplicated verses keep their table order, like Corpus.find
+    keys = [_verse_key(corpus.columns["book"][i], corpus.columns["chapter"][i], corpus.columns["verse"][i])
+            for i in range(rows)]
+    order = sorted(range(rows), key=keys.__getitem__)
+    add("verse_keys", array("I", [keys[i] for i in order]))
+    add("verse_rows", array("I", order))
+
+    contents = {
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": rows,
+        "books": [[book_name, corpus.book_index[book_name].start, corpus.book_index[book_name].stop]
+                  for book_name in corpus.book_names],
+        "tables": tables or {},
+        "labels": list(labels),
+        "sections": {},
+    }
+    offset = 0
+    for name, typecode, data in sections:
+        contents["sections"][name] = {"offset": offset, "bytes": len(data), "typecode": typecode}
+        offset = _align(offset + len(data))
+    toc = json.dumps(contents, separators=(",", ":")).encode("utf-8")
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, len(toc)))
+        f.write(toc)
+        f.write(bytes(_align(f.tell()) - f.tell()))
+        for _, _, data in sections:
+            f.write(data)
+            f.write(bytes(_align(len(data)) - len(data)))
+    # Workers that mapped the old file keep their pages; new ones map this one
+    os.replace(temp_path, path)
+    return path
+
+def build_snapshot(output_dir: str = DEFAULT_OUTPUT_DIR, path: Optional[str] = None) -> str:
+    """Compile every verse table under output_dir into a snapshot file."""
+    tables = discover_verse_tables(output_dir)
+    if not tables:
+        raise FileNotFoundError(f"No verse tables found in {output_dir}")
+    return write_snapshot(Corpus(tables), path or snapshot_path(output_dir),
+                          tables=_table_stats(tables, output_dir))
+
+class TextColumn:
+    """Read-only sequence of strings stored as offsets into a UTF-8 blob."""
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def value(self, i: int) -> Any:
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.value(i) for i in range(len(self))[key]]
+        return self.value(range(len(self))[key])
+
+    def __iter__(self):
+        return (self.value(i) for i in range(len(self)))
+
+class LabelListColumn(TextColumn):
+    """Read-only sequence of label tuples stored as offsets into label ids."""
+
+    def __init__(self, offsets: memoryview, items: memoryview, labels: List[str]):
+        super().__init__(offsets, items)
+        self.labels = labels
+
+    def value(self, i: int) -> Tuple[str, ...]:
+        labels = self.labels
+        return tuple(labels[item] for item in self.data[self.offsets[i]:self.offsets[i + 1]])
+
+class SpanColumn(TextColumn):
+    """Read-only sequence of (start, end, source, color) span tuples."""
+
+    def __init__(self, offsets: memoryview, starts: memoryview, ends: memoryview,
+                 sources: memoryview, colors: memoryview, labels: List[str]):
+        super().__init__(offsets, starts)
+        self.ends = ends
+        self.sources = sources
+        self.colors = colors
+        self.labels = labels
+
+    def value(self, i: int) -> Tuple[Tuple[int, int, str, str], ...]:
+        labels = self.labels
+        return tuple((self.data[j], self.ends[j], labels[self.sources[j]], labels[self.colors[j]])
+                     for j in range(self.offsets[i], self.offsets[i + 1]))
+
+class CorpusSnapshot(Corpus):
+    """A Corpus backed by a memory-mapped snapshot file.
+
+    Columns are memoryviews and lazy views over the mapping, so opening a
+    snapshot does no per-row work; rows are decoded when they are read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        magic, toc_length = _HEADER.unpack_from(buffer)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a corpus snapshot")
+        contents = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + toc_length]))
+        if contents["version"] != SNAPSHOT_VERSION or contents["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written by an incompatible version or platform; rebuild it")
+        data_start = _align(_HEADER.size + toc_length)
+
+        def section(name: str) -> memoryview:
+            info = contents["sections"][name]
+            start = data_start + info["offset"]
+            return buffer[start:start + info["bytes"]].cast(info["typecode"])
+
+        self.contents = contents
+        self.tables = contents["tables"]
+        output_dir = os.path.dirname(path)
+        self.table_paths = {book_name: os.path.join(output_dir, table["path"])
+                            for book_name, table in self.tables.items()}
+        self.book_names = [book_name for book_name, _, _ in contents["books"]]
+        self.book_index = {book_name: range(start, stop) for book_name, start, stop in contents["books"]}
+        labels = contents["labels"]
+
+        self.columns: Dict[str, Any] = {"book": section("book")}
+        for name in INT_COLUMNS:
+            self.columns[name] = section(name)
+        for name in STRING_COLUMNS:
+            self.columns[name] = TextColumn(section(f"{name}.offsets"), section(f"{name}.data"))
+        for name in LABEL_LIST_COLUMNS:
+            self.columns[name] = LabelListColumn(section(f"{name}.offsets"), section(f"{name}.items"), labels)
+        self.columns["source_spans"] = SpanColumn(
+            *(section(f"source_spans.{name}") for name in ["offsets", "starts", "ends", "sources", "colors"]),
+            labels,
+        )
+        for name in FLOAT_COLUMNS:
+            self.columns[name] = section(name)
+        self.source_mask = section("source_mask")
+        self._verse_keys = section("verse_keys")
+        self._verse_rows = section("verse_rows")
+        self._book_ids = {book_name: book_id for book_id, book_name in enumerate(self.book_names)}
+        self._frames = {}
+
+    def __len__(self) -> int:
+        return self.contents["rows"]
+
+    def _key_range(self, low: int, high: int) -> Sequence[int]:
+        keys = self._verse_keys
+        return self._verse_rows[bisect_left(keys, low):bisect_left(keys, high)]
+
+    def indices(self, book: Optional[str] = None, chapter: Optional[int] = None) -> Sequence[int]:
+        if book is None or chapter is None:
+            return super().indices(book, chapter)
+        if book not in self._book_ids or not 0 <= chapter < _MAX_NUMBER:
+            return self._verse_rows[0:0]
+        key = _verse_key(self._book_ids[book], chapter, 0)
+        return self._key_range(key, key + (1 << _CHAPTER_SHIFT))
+
+    def find(self, book: str, chapter: int, verse: int) -> Optional[int]:
+        if book not in self._book_ids or not (0 <= chapter < _MAX_NUMBER and 0 <= verse < _MAX_NUMBER):
+            return None
+        key = _verse_key(self._book_ids[book], chapter, verse)
+        rows = self._key_range(key, key + 1)
+        return rows[0] if len(rows) else None
+
+    def rows_with_source(self, source: str, book: Optional[str] = None) -> List[int]:
+        """Row numbers of the verses (of a book) that contain a source."""
+        bit = SOURCE_BITS.get(source, 0)
+        mask = self.source_mask
+        return [i for i in self.indices(book) if mask[i] & bit]
+
+    def is_current(self, output_dir: str) -> bool:
+        """True if the snapshot was built from the verse tables now in output_dir."""
+        return _table_stats(discover_verse_tables(output_dir), output_dir) == self.tables
+
+def load_snapshot(output_dir: str = DEFAULT_OUTPUT_DIR) -> Optional[CorpusSnapshot]:
+    """Map the snapshot of an output directory, or None if it is missing or stale."""
+    path = snapshot_path(output_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = CorpusSnapshot(path)
+    except (ValueError, KeyError, struct.error):
+        return None
+    return snapshot if snapshot.is_current(output_dir) else None
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite verse database.
+
+A local alternative to the PostgreSQL database of ``database_loader.py``:
+the tables of ``database_schema.sql`` (books, chapters, verses, words,
+word_patterns, verse_chunks, global_analysis) in one SQLite file,
+``<output_dir>/kjv_sources.db``, with no server to run.
+
+SQLite has no arrays, JSONB or pgvector, so list columns (``sources``,
+``redaction_indicators``, ``source_attribution``) and JSONB columns hold
+JSON text and embeddings are stored as BLOBs. In place of the GIN index on
+``verses.sources``, ``verse_sources`` keeps one (source, verse id) row per
+verse source as a WITHOUT ROWID table, i.e. a covering index. Verse lookups
+by (book, chapter, verse) go through the UNIQUE indexes on
+``books(osis_name)``, ``chapters(book_id, chapter)`` and
+``verses(chapter_id, verse)``, and ``verses_fts`` is an FTS5 index of
+``verses.text_full`` for full-text search.
+
+``build_database()`` loads every verse table of an output directory in a
+single transaction with ``executemany()`` and swaps the finished file into
+place, so readers never see a half-written database. ``open_database()``
+opens it read-only for the CLI and the API servers.
+"""
+
+import os
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+from .corpus import BOOK_ORDER, DEFAULT_OUTPUT_DIR, Corpus, discover_verse_tables
+from .verse_table import PERCENTAGE_SOURCES
+
+DATABASE_FILE_NAME = "kjv_sources.db"
+
+# Verse text sources with their own column in the verses table
+TEXT_SOURCES = ["J", "E", "P", "R"]
+
+# database_schema.sql in SQLite types
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    osis_name TEXT UNIQUE NOT NULL,
+    testament TEXT NOT NULL CHECK (testament IN ('OT', 'NT')),
+    number INT NOT NULL,
+    word_count INT DEFAULT 0,
+    is_sevened BOOLEAN DEFAULT FALSE,
+    mathematical_properties TEXT
+);
+
+CREATE TABLE IF NOT EXISTS chapters (
+    id INTEGER PRIMARY KEY,
+    book_id INT NOT NULL REFERENCES books(id),
+    chapter INT NOT NULL,
+    word_count INT DEFAULT 0,
+    is_sevened BOOLEAN DEFAULT FALSE,
+    mathematical_properties TEXT,
+    UNIQUE (book_id, chapter)
+);
+
+CREATE TABLE IF NOT EXISTS verses (
+    id INTEGER PRIMARY KEY,
+    chapter_id INT NOT NULL REFERENCES chapters(id),
+    verse INT NOT NULL,
+    osis_ref TEXT UNIQUE NOT NULL,
+    canonical_reference TEXT NOT NULL,
+    text_full TEXT NOT NULL,
+    word_count INT,
+    sources TEXT,
+    source_count INT,
+    primary_source TEXT,
+    source_sequence TEXT,
+    source_percentages TEXT,
+    redaction_indicators TEXT,
+    text_J TEXT, text_E TEXT, text_P TEXT, text_R TEXT,
+    metadata TEXT,
+    mathematical_properties TEXT,
+    UNIQUE (chapter_id, verse)
+);
+
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    verse_id INT REFERENCES verses(id),
+    word TEXT NOT NULL,
+    position_global INT NOT NULL,
+    position_in_verse INT NOT NULL,
+    position_in_chapter INT NOT NULL,
+    position_in_book INT NOT NULL,
+    word_length INT NOT NULL,
+    is_capitalized BOOLEAN NOT NULL,
+    is_number BOOLEAN NOT NULL,
+    is_proper_name BOOLEAN NOT NULL,
+    source_attribution TEXT,
+    mathematical_properties TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS word_patterns (
+    id INTEGER PRIMARY KEY,
+    word TEXT NOT NULL,
+    total_count INT NOT NULL,
+    first_occurrence INT NOT NULL,
+    last_occurrence INT NOT NULL,
+    is_sevened BOOLEAN NOT NULL,
+    is_777 BOOLEAN NOT NULL,
+    is_70x7 BOOLEAN NOT NULL,
+    is_77 BOOLEAN NOT NULL,
+    is_343 BOOLEAN NOT NULL,
+    is_490 BOOLEAN NOT NULL,
+    is_980 BOOLEAN NOT NULL,
+    position_patterns TEXT,
+    pattern_analysis TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS verse_chunks (
+    id INTEGER PRIMARY KEY,
+    start_osis TEXT NOT NULL,
+    end_osis TEXT NOT NULL,
+    text TEXT NOT NULL,
+    span_tokens INT,
+    embedding BLOB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS global_analysis (
+    id INTEGER PRIMARY KEY,
+    total_words INT NOT NULL,
+    is_7_power BOOLEAN NOT NULL,
+    is_823543 BOOLEAN NOT NULL,
+    word_count_analysis TEXT,
+    book_analysis TEXT,
+    chapter_analysis TEXT,
+    verse_analysis TEXT,
+    analysis_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS verse_sources (
+    source TEXT NOT NULL,
+    verse_id INT NOT NULL REFERENCES verses(id),
+    PRIMARY KEY (source, verse_id)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS verses_fts USING fts5(
+    text_full, content='verses', content_rowid='id'
+);
+
+CREATE INDEX IF NOT EXISTS idx_words_position_global ON words(position_global);
+CREATE INDEX IF NOT EXISTS idx_words_word ON words(word);
+CREATE INDEX IF NOT EXISTS idx_words_verse_id ON words(verse_id);
+CREATE INDEX IF NOT EXISTS idx_word_patterns_word ON word_patterns(word);
+CREATE INDEX IF NOT EXISTS idx_word_patterns_count ON word_patterns(total_count);
+CREATE INDEX IF NOT EXISTS idx_verses_osis_ref ON verses(osis_ref);
+"""
+
+# Verse columns with their book and chapter, as returned by the queries
+_VERSE_SELECT = """
+    SELECT b.osis_name AS book, c.chapter AS chapter, v.*
+    FROM verses v
+    JOIN chapters c ON c.id = v.chapter_id
+    JOIN books b ON b.id = c.book_id
+"""
+
+def database_path(output_dir: str = DEFAULT_OUTPUT_DIR) -> str:
+    """Path of the SQLite verse database of an output directory."""
+    return os.path.join(output_dir, DATABASE_FILE_NAME)
+
+def _fts_query(text: str) -> str:
+    """Quote every term so user input cannot be read as FTS5 syntax; terms are ANDed."""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in text.split())
+
+class VerseDatabase:
+    """SQLite verse database with full-text search."""
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+
+    def __enter__(self) -> "VerseDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def create_tables(self) -> None:
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    # Loading
+
+    def _book_id(self, book: str, number: int) -> int:
+        self.conn.execute(
+            "INSERT OR IGNORE INTO books (name, osis_name, testament, number) VALUES (?, ?, 'OT', ?)",
+            (book, book, number),
+        )
+        return self.conn.execute("SELECT id FROM books WHERE osis_name = ?", (book,)).fetchone()[0]
+
+    def _delete_book_verses(self, book_id: int) -> None:
+        chapter_ids = "SELECT id FROM chapters WHERE book_id = ?"
+        verse_ids = f"SELECT id FROM verses WHERE chapter_id IN ({chapter_ids})"
+        self.conn.execute(f"DELETE FROM verse_sources WHERE verse_id IN ({verse_ids})", (book_id,))
+        self.conn.execute(f"DELETE FROM verses WHERE chapter_id IN ({chapter_ids})", (book_id,))
+        self.conn.execute("DELETE FROM chapters WHERE book_id = ?", (book_id,))
+
+    def load_corpus(self, corpus: Corpus, books: Optional[Iterable[str]] = None) -> int:
+        """Load (or replace) books of a corpus in one transaction; returns the number of verses."""
+        loaded = 0
+        with self.conn:
+            for book in books or corpus.books:
+                book_id = self._book_id(book, BOOK_ORDER.index(book) + 1 if book in BOOK_ORDER
+                                        else len(BOOK_ORDER) + corpus.books.index(book) + 1)
+                self._delete_book_verses(book_id)
+                rows = [corpus.row(row_number) for row_number in corpus.indices(book)]
+
+                chapter_words: Dict[int, int] = {}
+                for row in rows:
+                    chapter_words[row["chapter"]] = chapter_words.get(row["chapter"], 0) + row["word_count"]
+                self.conn.executemany(
+                    "INSERT INTO chapters (book_id, chapter, word_count, is_sevened) VALUES (?, ?, ?, ?)",
+                    [(book_id, chapter, words, words % 7 == 0) for chapter, words in chapter_words.items()],
+                )
+                book_words = sum(chapter_words.values())
+                self.conn.execute("UPDATE books SET word_count = ?, is_sevened = ? WHERE id = ?",
+                                  (book_words, book_words % 7 == 0, book_id))
+                chapter_ids = dict(self.conn.execute(
+                    "SELECT chapter, id FROM chapters WHERE book_id = ?", (book_id,)))
+
+                self.conn.executemany(
+                    """
+                    INSERT INTO verses (
+                        chapter_id, verse, osis_ref, canonical_reference,
+                        text_full, word_count, sources, source_count,
+                        primary_source, source_sequence, source_percentages,
+                        redaction_indicators, text_J, text_E, text_P, text_R,
+                        metadata, mathematical_properties
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [(
+                        chapter_ids[row["chapter"]],
+                        row["verse"],
+                        row["verse_id"],
+                        row["canonical_reference"],
+                        row["full_text"],
+                        row["word_count"],
+                        json.dumps(list(row["sources"])),
+                        row["source_count"],
+                        row["primary_source"],
+                        "->".join(row["source_sequence"]),
+                        json.dumps({source: row[f"pct_{source}"] for source in PERCENTAGE_SOURCES}),
+                        json.dumps(list(row["redaction_indicators"])),
+                        *(row[f"text_{source}"] for source in TEXT_SOURCES),
+                        row["metadata"],
+                        json.dumps({}),
+                    ) for row in rows],
+                )
+                self.conn.execute(
+                    """
+                    INSERT INTO verse_sources (source, verse_id)
+                    SELECT DISTINCT j.value, v.id FROM verses v, json_each(v.sources) j
+                    WHERE v.chapter_id IN (SELECT id FROM chapters WHERE book_id = ?)
+                    """,
+                    (book_id,),
+                )
+                loaded += len(rows)
+            self.conn.execute("INSERT INTO verses_fts(verses_fts) VALUES ('rebuild')")
+        return loaded
+
+    def load_word_data(self, word_data: Iterable[Any]) -> int:
+        """Insert WordLevelParser words; their verse_id keys are resolved to verse rows."""
+        with self.conn:
+            cursor = self.conn.executemany(
+                """
+                INSERT INTO words (
+                    verse_id, word, position_global, position_in_verse,
+                    position_in_chapter, position_in_book, word_length,
+                    is_capitalized, is_number, is_proper_name,
+                    source_attribution, mathematical_properties
+                ) VALUES ((SELECT id FROM verses WHERE osis_ref = ?), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                ((word.verse_id, word.word, word.position_global, word.position_in_verse,
+                  word.position_in_chapter, word.position_in_book, word.word_length,
+                  word.is_capitalized, word.is_number, word.is_proper_name,
+                  json.dumps(list(word.source_attribution)), json.dumps(word.mathematical_properties))
+                 for word in word_data),
+            )
+        return cursor.rowcount
+
+    def load_word_patterns(self, patterns: Dict[str, Any]) -> int:
+        """Insert MathematicalPatternEngine word patterns."""
+        with self.conn:
+            cursor = self.conn.executemany(
+                """
+                INSERT INTO word_patterns (
+                    word, total_count, first_occurrence, last_occurrence,
+                    is_sevened, is_777, is_70x7, is_77, is_343, is_490, is_980,
+                    position_patterns, pattern_analysis
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                ((pattern.word, pattern.total_count, pattern.first_occurrence, pattern.last_occurrence,
+                  pattern.is_sevened, pattern.is_777, pattern.is_70x7, pattern.is_77,
+                  pattern.is_343, pattern.is_490, pattern.is_980,
+                  json.dumps(pattern.position_patterns), json.dumps(pattern.pattern_analysis))
+                 for pattern in patterns.values()),
+            )
+        return cursor.rowcount
+
+    def load_global_analysis(self, analysis: Any) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO global_analysis (
+                    total_words, is_7_power, is_823543, word_count_analysis,
+                    book_analysis, chapter_analysis, verse_analysis
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (analysis.total_words, analysis.is_7_power, analysis.is_823543,
+                 json.dumps(analysis.word_count_analysis), json.dumps(analysis.book_analysis),
+                 json.dumps(analysis.chapter_analysis), json.dumps(analysis.verse_analysis)),
+            )
+
+    # Queries
+
+    @staticmethod
+    def _verse(row: sqlite3.Row) -> Dict[str, Any]:
+        """A verse row with its JSON columns decoded, keyed like Corpus rows."""
+        verse = dict(row)
+        verse["verse_id"] = verse.pop("osis_ref")
+        verse["full_text"] = verse.pop("text_full")
+        verse["sources"] = json.loads(verse["sources"] or "[]")
+        verse["source_sequence"] = verse["source_sequence"].split("->") if verse["source_sequence"] else []
+        verse["source_percentages"] = json.loads(verse["source_percentages"] or "{}")
+        verse["redaction_indicators"] = json.loads(verse["redaction_indicators"] or "[]")
+        verse["mathematical_properties"] = json.loads(verse["mathematical_properties"] or "{}")
+        del verse["id"], verse["chapter_id"]
+        return verse
+
+    def books(self) -> List[Dict[str, Any]]:
+        """Books in canonical order with their chapter, verse and word counts."""
+        return [dict(row) for row in self.conn.execute(
+            """
+            SELECT b.osis_name AS name, b.word_count AS word_count,
+                   COUNT(DISTINCT c.id) AS chapters, COUNT(v.id) AS verses
+            FROM books b
+            LEFT JOIN chapters c ON c.book_id = b.id
+            LEFT JOIN verses v ON v.chapter_id = c.id
+            GROUP BY b.id ORDER BY b.number
+            """
+        )]
+
+    def verse(self, book: str, chapter: int, verse: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            _VERSE_SELECT + "WHERE b.osis_name = ? AND c.chapter = ? AND v.verse = ?",
+            (book, chapter, verse),
+        ).fetchone()
+        return self._verse(row) if row else None
+
+    def chapter(self, book: str, chapter: int) -> List[Dict[str, Any]]:
+        return [self._verse(row) for row in self.conn.execute(
+            _VERSE_SELECT + "WHERE b.osis_name = ? AND c.chapter = ? ORDER BY v.verse",
+            (book, chapter),
+        )]
+
+    def search(self, text: str, limit: int = 20, book: Optional[str] = None,
+               source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Verses containing every term of text, best BM25 match first, with a highlighted snippet."""
+        query = _fts_query(text)
+        if not query:
+            return []
+        sql = """
+            SELECT b.osis_name AS book, c.chapter AS chapter, v.*,
+                   snippet(verses_fts, 0, '[', ']', '...', 16) AS snippet
+            FROM verses_fts
+            JOIN verses v ON v.id = verses_fts.rowid
+            JOIN chapters c ON c.id = v.chapter_id
+            JOIN books b ON b.id = c.book_id
+            WHERE verses_fts MATCH ?
+        """
+        params: List[Any] = [query]
+        if book:
+            sql += " AND b.osis_name = ?"
+            params.append(book)
+        if source:
+            sql += " AND EXISTS (SELECT 1 FROM verse_sources s WHERE s.source = ? AND s.verse_id = v.id)"
+            params.append(source)
+        sql += " ORDER BY bm25(verses_fts) LIMIT ?"
+        params.append(limit)
+        return [self._verse(row) for row in self.conn.execute(sql, params)]
+
+    def verses_with_source(self, source: str, book: Optional[str] = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Verses attributed (in whole or part) to a source, in canonical order."""
+        sql = _VERSE_SELECT + "JOIN verse_sources s ON s.verse_id = v.id WHERE s.source = ?"
+        params: List[Any] = [source]
+        if book:
+            sql += " AND b.osis_name = ?"
+            params.append(book)
+        sql += " ORDER BY b.number, c.chapter, v.verse LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [self._verse(row) for row in self.conn.execute(sql, params)]
+
+def build_database(output_dir: str = DEFAULT_OUTPUT_DIR, path: Optional[str] = None) -> str:
+    """Load every verse table under output_dir into a new SQLite database file."""
+    tables = discover_verse_tables(output_dir)
+    if not tables:
+        raise FileNotFoundError(f"No verse tables found in {output_dir}")
+    path = path or database_path(output_dir)
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    with VerseDatabase(temp_path) as database:
+        database.create_tables()
+        database.load_corpus(Corpus(tables))
+    os.replace(temp_path, path)
+    return path
+
+def open_database(output_dir: str = DEFAULT_OUTPUT_DIR) -> Optional[VerseDatabase]:
+    """Open the verse database of an output directory read-only, or None if it was not built."""
+    path = database_path(output_dir)
+    if not os.path.exists(path):
+        return None
+    return VerseDatabase(path, readonly=True)
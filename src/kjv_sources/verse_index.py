@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Canonical verse index.
+
+Every verse gets a packed integer ID: its 0-based position in canonical
+order (Genesis 1:1 is 0, Exodus 1:1 is 1533, ...). A per-book prefix sum of
+the chapter verse counts maps (book, chapter, verse) to that ID with two
+table lookups, and per-ID book and chapter arrays map it back, so both
+directions are O(1). Books, chapters and passages are contiguous ID ranges,
+and an ID is also the verse's exact linear position.
+
+The default index holds the KJV versification of the five books the
+pipeline parses; ``VerseIndex.from_corpus()`` builds one for other books.
+``parse()`` reads single-verse identifiers such as "Genesis 1:1",
+"Genesis_1_1" and "Gen.1.1" with the shared parser in ``references``.
+"""
+
+from array import array
+from typing import Dict, Optional, Sequence, Tuple
+
+# Verses per chapter of each book in canonical order (KJV versification)
+TORAH_CHAPTER_VERSES = {
+    "Genesis": (
+        31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18,
+        34, 24, 20, 67, 34, 35, 46, 22, 35, 43, 55, 32, 20, 31, 29, 43, 36, 30, 23, 23,
+        57, 38, 34, 34, 28, 34, 31, 22, 33, 26,
+    ),
+    "Exodus": (
+        22, 25, 22, 31, 23, 30, 25, 32, 35, 29, 10, 51, 22, 31, 27, 36, 16, 27, 25, 26,
+        36, 31, 33, 18, 40, 37, 21, 43, 46, 38, 18, 35, 23, 35, 35, 38, 29, 31, 43, 38,
+    ),
+    "Leviticus": (
+        17, 16, 17, 35, 19, 30, 38, 36, 24, 20, 47, 8, 59, 57, 33, 34, 16, 30, 37, 27,
+        24, 33, 44, 23, 55, 46, 34,
+    ),
+    "Numbers": (
+        54, 34, 51, 49, 31, 27, 89, 26, 23, 36, 35, 16, 33, 45, 41, 50, 13, 32, 22, 29,
+        35, 41, 30, 25, 18, 65, 23, 31, 40, 16, 54, 42, 56, 29, 34, 13,
+    ),
+    "Deuteronomy": (
+        46, 37, 29, 49, 33, 25, 26, 20, 29, 22, 32, 32, 18, 29, 23, 22, 20, 22, 21, 20,
+        23, 30, 25, 22, 19, 19, 26, 68, 29, 20, 30, 52, 29, 12,
+    ),
+}
+
+# Abbreviations accepted for book names (lower case, without trailing dot)
+BOOK_ABBREVIATIONS = {
+    "gen": "Genesis", "ge": "Genesis", "gn": "Genesis",
+    "exod": "Exodus", "exo": "Exodus", "ex": "Exodus",
+    "lev": "Leviticus", "le": "Leviticus", "lv": "Leviticus",
+    "num": "Numbers", "nu": "Numbers", "nm": "Numbers",
+    "deut": "Deuteronomy", "deu": "Deuteronomy", "dt": "Deuteronomy",
+}
+
+class VerseIndex:
+    """Bidirectional map between verse references and packed integer IDs."""
+
+    def __init__(self, chapter_verses: Dict[str, Sequence[int]]):
+        self.books = list(chapter_verses)
+        self.book_ids = {book: book_id for book_id, book in enumerate(self.books)}
+        self._book_names = {book.lower(): book for book in self.books}
+        # _chapter_starts[book_id][c] is the ID of verse 1 of chapter c + 1;
+        # the last entry is the first ID after the book
+        self._chapter_starts = []
+        # Number of chapters before each book
+        self._chapter_bases = []
+        self._verse_books = array("B")
+        self._verse_chapters = array("H")
+        verse_id = chapter_base = 0
+        for book_id, book in enumerate(self.books):
+            self._chapter_bases.append(chapter_base)
+            chapter_base += len(chapter_verses[book])
+            starts = array("I", [verse_id])
+            for chapter, count in enumerate(chapter_verses[book], 1):
+                verse_id += count
+                starts.append(verse_id)
+                self._verse_books.extend([book_id] * count)
+                self._verse_chapters.extend([chapter] * count)
+            self._chapter_starts.append(starts)
+
+    @classmethod
+    def from_corpus(cls, corpus) -> "VerseIndex":
+        """Build an index from the chapters and verses present in a Corpus."""
+        chapter_verses = {}
+        for book in corpus.books:
+            counts: Dict[int, int] = {}
+            for row_number in corpus.indices(book):
+                chapter = corpus["chapter"][row_number]
+                counts[chapter] = max(counts.get(chapter, 0), corpus["verse"][row_number])
+            chapter_verses[book] = [counts.get(chapter, 0) for chapter in range(1, max(counts, default=0) + 1)]
+        return cls(chapter_verses)
+
+    def __len__(self) -> int:
+        return len(self._verse_books)
+
+    def resolve_book(self, name: str) -> Optional[str]:
+        """Canonical name of a book from its name or abbreviation, any case."""
+        key = name.strip().rstrip(".").lower()
+        return self._book_names.get(key) or self._book_names.get(BOOK_ABBREVIATIONS.get(key, "").lower())
+
+    def verse_id(self, book: str, chapter: int, verse: int) -> int:
+        """Packed ID of a verse; raises KeyError for verses not in the index."""
+        book_id = self.book_ids.get(book)
+        if book_id is None:
+            resolved = self.resolve_book(book)
+            book_id = self.book_ids.get(resolved) if resolved else None
+        if book_id is not None:
+            starts = self._chapter_starts[book_id]
+            if 0 < chapter < len(starts):
+                verse_id = starts[chapter - 1] + verse - 1
+                if starts[chapter - 1] <= verse_id < starts[chapter]:
+                    return verse_id
+        raise KeyError(f"{book} {chapter}:{verse} is not in the verse index")
+
+    def find(self, book: str, chapter: int, verse: int) -> Optional[int]:
+        """Packed ID of a verse, or None."""
+        try:
+            return self.verse_id(book, chapter, verse)
+        except KeyError:
+            return None
+
+    def reference(self, verse_id: int) -> Tuple[str, int, int]:
+        """(book, chapter, verse) of a packed ID."""
+        if not 0 <= verse_id < len(self):
+            raise IndexError(f"Verse ID {verse_id} out of range (0-{len(self) - 1})")
+        book_id = self._verse_books[verse_id]
+        chapter = self._verse_chapters[verse_id]
+        return self.books[book_id], chapter, verse_id - self._chapter_starts[book_id][chapter - 1] + 1
+
+    def verse_key(self, verse_id: int) -> str:
+        """The "Genesis_1_1" verse_id column value of a packed ID."""
+        return "{}_{}_{}".format(*self.reference(verse_id))
+
+    def canonical_reference(self, verse_id: int) -> str:
+        """The "Genesis 1:1" form of a packed ID."""
+        return "{} {}:{}".format(*self.reference(verse_id))
+
+    def parse(self, text: str) -> int:
+        """Packed ID of a "Genesis 1:1", "Genesis_1_1" or "Gen.1.1" reference."""
+        from .references import ReferenceParser, get_reference_parser
+        parser = get_reference_parser() if self is _DEFAULT_INDEX else ReferenceParser(self, cache_size=0)
+        ranges = parser.parse(text).ranges
+        verses = ranges[0]
+        if (len(ranges) != 1 or verses.chapter_start != verses.chapter_end
+                or verses.verse_start != verses.verse_end or verses.verse_start == 0):
+            raise ValueError(f"Not a single verse reference: {text!r}")
+        return self.verse_id(verses.book, verses.chapter_start, verses.verse_start)
+
+    def book_range(self, book: str) -> range:
+        """IDs of every verse of a book."""
+        starts = self._chapter_starts[self.book_ids[self.resolve_book(book) or book]]
+        return range(starts[0], starts[-1])
+
+    def chapter_count(self, book: str) -> int:
+        return len(self._chapter_starts[self.book_ids[self.resolve_book(book) or book]]) - 1
+
+    def chapter_range(self, book: str, chapter: int) -> range:
+        """IDs of every verse of a chapter."""
+        start = self.verse_id(book, chapter, 1)
+        book_id = self._verse_books[start]
+        return range(start, self._chapter_starts[book_id][chapter])
+
+    def chapter_position(self, book: str, chapter: int) -> int:
+        """0-based position of a chapter among the chapters of every book."""
+        book_id = self._verse_books[self.verse_id(book, chapter, 1)]
+        return self._chapter_bases[book_id] + chapter - 1
+
+    def passage_range(self, book: str, chapter_start: int, verse_start: int,
+                      chapter_end: int, verse_end: int) -> range:
+        """IDs of the verses from chapter_start:verse_start to chapter_end:verse_end inclusive."""
+        return range(self.verse_id(book, chapter_start, verse_start),
+                     self.verse_id(book, chapter_end, verse_end) + 1)
+
+_DEFAULT_INDEX: Optional[VerseIndex] = None
+
+def get_verse_index() -> VerseIndex:
+    """The shared index of the KJV books the pipeline parses."""
+    global _DEFAULT_INDEX
+    if _DEFAULT_INDEX is None:
+        _DEFAULT_INDEX = VerseIndex(TORAH_CHAPTER_VERSES)
+    return _DEFAULT_INDEX
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Verse table access for the CLIs and the Qdrant client.
+
+Books processed with ``parse_wikitext.py pipeline --parquet`` have a typed
+``<Book>.parquet`` table next to the enhanced ``<Book>.csv``. It holds the same
+verses with native list columns (sources, redaction_indicators, ...), one
+float column per source percentage (pct_J, pct_E, ...) and categorical
+book/primary_source columns. ``find_verse_table`` prefers it when pyarrow
+is installed and falls back to the CSV otherwise; reading the tables is left
+to ``corpus``. The field helpers accept values from either format.
+"""
+
+import os
+import importlib.util
+from typing import Any, List, Optional
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Sources with a pct_<source> column in the Parquet table
+PERCENTAGE_SOURCES = ["J", "E", "P", "D", "R", "UNKNOWN"]
+
+# Bit of each source in a source bitmask (snapshot columns, word store)
+SOURCE_BITS = {source: 1 << i for i, source in enumerate(PERCENTAGE_SOURCES)}
+
+def find_verse_table(book_dir: str, book_name: str) -> Optional[str]:
+    """Return the path of a book's verse table, preferring Parquet over CSV."""
+    parquet_path = os.path.join(book_dir, f"{book_name}.parquet")
+    if PARQUET_AVAILABLE and os.path.exists(parquet_path):
+        return parquet_path
+    csv_path = os.path.join(book_dir, f"{book_name}.csv")
+    if os.path.exists(csv_path):
+        return csv_path
+    return None
+
+def split_sources(value: Any) -> List[str]:
+    """Sources of a verse as a list, from a CSV ';'-joined string or a Parquet list."""
+    if isinstance(value, str):
+        return value.split(";") if value else []
+    try:
+        return list(value)
+    except TypeError:
+        # Missing value in a CSV column (NaN)
+        return []
+
+def join_field(value: Any, empty: str = "", sep: str = ";") -> str:
+    """A list field as the joined string used in CSV files and Qdrant payloads."""
+    if isinstance(value, str):
+        return value
+    return sep.join(split_sources(value)) or empty
+
+def source_percentages_field(row: Any) -> str:
+    """A verse's source percentages in the CSV "J:39.4;E:0.0;..." form."""
+    if "source_percentages" in row:
+        return row["source_percentages"]
+    return ";".join(f"{source}:{row[f'pct_{source}']}" for source in PERCENTAGE_SOURCES
+                    if f"pct_{source}" in row)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Streaming word-level export.
+
+The word-level data of the whole Bible is far larger than its verse
+tables, so it is written and read in fixed-size chunks and never held as
+one document:
+
+* NDJSON (``.ndjson`` / ``.jsonl``): one word object per line, with the
+  fields of ``word_level_parser.WordData``.
+* Parquet (``.parquet``, requires pyarrow): one row group per chunk, with
+  ``source_attribution`` as a string list and ``mathematical_properties``
+  as a JSON string.
+
+``write_words()`` accepts any iterable of objects with the WordData
+attributes (``WordData``, ``WordStore`` views) and keeps at most one chunk
+in memory. ``iter_word_chunks()`` reads an export back chunk by chunk as
+``WordRecord`` objects, which have the same attributes, so the API server
+and the database loaders can consume an export directly.
+"""
+
+import json
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# pyarrow is only needed for the optional parquet format
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Words held in memory at a time while writing or reading
+EXPORT_CHUNK_SIZE = 10000
+
+# Word fields in export order
+WORD_FIELDS = [
+    "word", "position_global", "position_in_verse", "position_in_chapter", "position_in_book",
+    "book", "chapter", "verse", "verse_id", "canonical_reference", "word_length",
+    "is_capitalized", "is_number", "is_proper_name", "source_attribution", "mathematical_properties",
+]
+
+# Export format of each file extension
+EXPORT_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+
+# Default export file name in an output directory
+WORD_EXPORT_NAME = "words.ndjson"
+
+class WordRecord(SimpleNamespace):
+    """One exported word, with the attributes of WordData."""
+
+def word_export_path(output_dir: str) -> str:
+    """Default path of the word export of an output directory."""
+    return os.path.join(output_dir, WORD_EXPORT_NAME)
+
+def export_format(path: str, format: Optional[str] = None) -> str:
+    """Format of an export: the given one, else the one of its extension."""
+    if format is None:
+        format = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+        if format is None:
+            raise ValueError(f"Cannot tell the export format of {path} (expected one of: {', '.join(EXPORT_FORMATS)})")
+    if format not in ("ndjson", "parquet"):
+        raise ValueError(f"Unknown export format: {format} (expected ndjson or parquet)")
+    if format == "parquet" and pa is None:
+        raise RuntimeError("The parquet format requires pyarrow (pip install pyarrow)")
+    return format
+
+def word_to_dict(word: Any) -> Dict[str, Any]:
+    """A word object as a dict of the export fields."""
+    to_dict = getattr(word, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    return {field: getattr(word, field) for field in WORD_FIELDS}
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of at most chunk_size items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def word_schema():
+    """Arrow schema of the Parquet word export"""
+    return pa.schema([
+        ("word", pa.string()),
+        ("position_global", pa.int64()),
+        ("position_in_verse", pa.int32()),
+        ("position_in_chapter", pa.int32()),
+        ("position_in_book", pa.int32()),
+        ("book", pa.dictionary(pa.int8(), pa.string())),
+        ("chapter", pa.int16()),
+        ("verse", pa.int16()),
+        ("verse_id", pa.string()),
+        ("canonical_reference", pa.string()),
+        ("word_length", pa.int16()),
+        ("is_capitalized", pa.bool_()),
+        ("is_number", pa.bool_()),
+        ("is_proper_name", pa.bool_()),
+        ("source_attribution", pa.list_(pa.string())),
+        ("mathematical_properties", pa.string()),
+    ])
+
+def write_words(words: Iterable[Any], path: str, format: Optional[str] = None,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """Stream words to an NDJSON or Parquet export; returns the number written.
+
+    The export is written to a temporary file next to path and moved into
+    place when complete, so readers never see a partial file.
+    """
+    format = export_format(path, format)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    count = 0
+    try:
+        if format == "parquet":
+            schema = word_schema()
+            with pq.ParquetWriter(temp_path, schema, compression="zstd") as writer:
+                for chunk in iter_chunks(map(word_to_dict, words), chunk_size):
+                    columns = {field: [word[field] for word in chunk] for field in WORD_FIELDS}
+                    columns["source_attribution"] = [list(sources) for sources in columns["source_attribution"]]
+                    columns["mathematical_properties"] = [
+                        json.dumps(properties, ensure_ascii=False) for properties in columns["mathematical_properties"]
+                    ]
+                    writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                    count += len(chunk)
+        else:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for chunk in iter_chunks(words, chunk_size):
+                    f.write("".join(json.dumps(word_to_dict(word), ensure_ascii=False) + "\n" for word in chunk))
+                    count += len(chunk)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return count
+
+def iter_word_chunks(path: str, chunk_size: int = EXPORT_CHUNK_SIZE,
+                     format: Optional[str] = None) -> Iterator[List[WordRecord]]:
+    """Read a word export back as lists of at most chunk_size WordRecords."""
+    format = export_format(path, format)
+    if format == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = []
+            for word in batch.to_pylist():
+                word["mathematical_properties"] = json.loads(word["mathematical_properties"] or "{}")
+                chunk.append(WordRecord(**word))
+            yield chunk
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        for chunk in iter_chunks(lines, chunk_size):
+            yield [WordRecord(**json.loads(line)) for line in chunk]
+
+def iter_words(path: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[WordRecord]:
+    """Every word of an export in order, read chunk by chunk."""
+    for chunk in iter_word_chunks(path, chunk_size):
+        yield from chunk
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Batch numeric word features.
+
+``WordLevelParser`` attaches the same twelve numeric properties to every
+word (length divisible by seven, prime / square / Fibonacci length,
+position residues mod 7, 77 and 777, ...). Testing primality and
+Fibonacci membership word by word is wasted work: word lengths are small
+integers, so every length property is one lookup in a precomputed
+256-entry flag table, and a whole column of lengths is classified at once
+with ``bytes.translate``. Position residues are computed a column at a
+time, by repeating one period when the positions are a range.
+``WordFeatures`` holds the results as typed arrays and only builds
+per-word property dicts when asked.
+"""
+
+from array import array
+from itertools import repeat
+from operator import mod
+from typing import Any, Dict, Iterable, Iterator, Sequence
+
+# Length flags
+SEVENED = 1
+PRIME = 2
+PERFECT_SQUARE = 4
+FIBONACCI = 8
+LENGTH_77 = 16
+LENGTH_490 = 32
+LENGTH_777 = 64
+
+# Residues of word positions
+POSITION_MODULI = (7, 77, 777)
+
+# Lengths classified by table lookup; longer ones fall back to number_flags()
+TABLE_SIZE = 256
+
+def is_prime(n: int) -> bool:
+    """Check if number is prime"""
+    if n < TABLE_SIZE:
+        return n >= 0 and bool(LENGTH_FLAGS[n] & PRIME)
+    if n % 2 == 0:
+        return False
+    for i in range(3, int(n ** 0.5) + 1, 2):
+        if n % i == 0:
+            return False
+    return True
+
+def is_perfect_square(n: int) -> bool:
+    """Check if number is a perfect square"""
+    if n < 0:
+        return False
+    root = int(n ** 0.5)
+    return root * root == n
+
+def is_fibonacci(n: int) -> bool:
+    """Check if number is in Fibonacci sequence"""
+    if n < 0:
+        return False
+    a, b = 0, 1
+    while a < n:
+        a, b = b, a + b
+    return a == n
+
+def number_flags(n: int) -> int:
+    """Length flags of one integer."""
+    flags = 0
+    if n % 7 == 0:
+        flags |= SEVENED
+    if n >= 2 and all(n % i for i in range(2, int(n ** 0.5) + 1)):
+        flags |= PRIME
+    if is_perfect_square(n):
+        flags |= PERFECT_SQUARE
+    if is_fibonacci(n):
+        flags |= FIBONACCI
+    flags |= {77: LENGTH_77, 490: LENGTH_490, 777: LENGTH_777}.get(n, 0)
+    return flags
+
+# Flags of every length below TABLE_SIZE, usable as a bytes.translate table
+LENGTH_FLAGS = bytes(number_flags(n) for n in range(TABLE_SIZE))
+
+def length_flags(lengths: Iterable[int]) -> bytes:
+    """Flags of each length, one byte per length."""
+    try:
+        return array("B", lengths).tobytes().translate(LENGTH_FLAGS)
+    except OverflowError:
+        # A length of 256 or more: classify the long ones individually
+        return bytes(LENGTH_FLAGS[n] if n < TABLE_SIZE else number_flags(n) for n in lengths)
+
+def residues(positions: Sequence[int], modulus: int) -> array:
+    """Each position mod modulus.
+
+    The residues of a range are a rotated 0..modulus-1 pattern repeated, so
+    they are built by sequence repetition instead of one division each.
+    """
+    if isinstance(positions, range) and positions.step == 1:
+        count = len(positions)
+        offset = positions.start % modulus
+        period = array("H", range(offset, modulus)) + array("H", range(offset))
+        return (period * (count // modulus + 1))[:count]
+    return array("H", map(mod, positions, repeat(modulus)))
+
+def word_properties(length: int, position: int) -> Dict[str, Any]:
+    """mathematical_properties of a single word."""
+    flags = LENGTH_FLAGS[length] if length < TABLE_SIZE else number_flags(length)
+    return _properties(position, length, flags, position % 7, position % 77, position % 777)
+
+def _properties(position: int, length: int, flags: int, mod_7: int, mod_77: int, mod_777: int) -> Dict[str, Any]:
+    return {
+        "position": position,
+        "word_length": length,
+        "is_sevened": bool(flags & SEVENED),
+        "is_77": bool(flags & LENGTH_77),
+        "is_777": bool(flags & LENGTH_777),
+        "is_70x7": bool(flags & LENGTH_490),
+        "position_mod_7": mod_7,
+        "position_mod_77": mod_77,
+        "position_mod_777": mod_777,
+        "is_prime_length": bool(flags & PRIME),
+        "is_perfect_square_length": bool(flags & PERFECT_SQUARE),
+        "is_fibonacci_length": bool(flags & FIBONACCI),
+    }
+
+class WordFeatures:
+    """Numeric features of a word sequence, one typed column per feature."""
+
+    def __init__(self, lengths: Sequence[int], positions: Sequence[int]):
+        """positions may be a range, as for a whole parsed file, which is kept as is."""
+        if len(lengths) != len(positions):
+            raise ValueError("lengths and positions differ in length")
+        self.flags = length_flags(lengths)
+        self.lengths = array("I", lengths)
+        self.positions = positions if isinstance(positions, range) else array("I", positions)
+        self.position_residues = {modulus: residues(self.positions, modulus) for modulus in POSITION_MODULI}
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def properties(self, index: int) -> Dict[str, Any]:
+        """mathematical_properties of one word."""
+        residues = self.position_residues
+        return _properties(self.positions[index], self.lengths[index], self.flags[index],
+                           residues[7][index], residues[77][index], residues[777][index])
+
+    def iter_properties(self) -> Iterator[Dict[str, Any]]:
+        """mathematical_properties of every word, in order."""
+        return map(_properties, self.positions, self.lengths, self.flags,
+                   *(self.position_residues[modulus] for modulus in POSITION_MODULI))
+
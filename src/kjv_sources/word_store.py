@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Columnar word store.
+
+Word-level data for the whole Bible is ~790k tokens; one dataclass per
+token, each with its own metadata dict and copies of its verse's strings,
+costs gigabytes. ``WordStore`` keeps it as struct-of-arrays instead:
+
+* per word: vocabulary id, verse row, positions (verse, chapter, book,
+  global) and a source bitmask, each in a typed ``array``;
+* per vocabulary entry: the word and its capitalised / number / proper-name
+  flags, so repeated words share one string;
+* per verse: book id, chapter, verse, verse id, reference, token count and
+  one source-percentages dict, referenced by verse row instead of copied
+  into every word.
+
+Indexing the store returns a ``WordView``: a two-slot object exposing the
+attributes of ``word_level_parser.WordData``, so existing consumers (the
+pattern engine, the API servers, the database loaders) work unchanged.
+Bulk consumers can read the column arrays directly.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .verse_table import PERCENTAGE_SOURCES, SOURCE_BITS
+
+# Vocabulary flags
+CAPITALIZED = 1
+NUMBER = 2
+PROPER_NAME = 4
+
+def source_mask(sources: Iterable[str]) -> int:
+    """Bitmask of source labels; labels without a bit are dropped."""
+    mask = 0
+    for source in sources:
+        mask |= SOURCE_BITS.get(source, 0)
+    return mask
+
+# Source lists of every mask, in canonical source order
+_MASK_SOURCES = [
+    [source for source in PERCENTAGE_SOURCES if mask & SOURCE_BITS[source]]
+    for mask in range(1 << len(PERCENTAGE_SOURCES))
+]
+
+def mask_sources(mask: int) -> List[str]:
+    """Source labels of a bitmask, in canonical order."""
+    return list(_MASK_SOURCES[mask])
+
+class WordView:
+    """One word of a WordStore, with the attributes of WordData."""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: "WordStore", index: int):
+        self.store = store
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"WordView({self.word!r}, {self.canonical_reference}, position_global={self.position_global})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, WordView):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    @property
+    def _verse_row(self) -> int:
+        return self.store.verse_rows[self.index]
+
+    @property
+    def word(self) -> str:
+        return self.store.vocab[self.store.word_ids[self.index]]
+
+    @property
+    def position_global(self) -> int:
+        return self.store.positions_global[self.index]
+
+    @property
+    def position_in_verse(self) -> int:
+        return self.store.positions_in_verse[self.index]
+
+    @property
+    def position_in_chapter(self) -> int:
+        return self.store.positions_in_chapter[self.index]
+
+    @property
+    def position_in_book(self) -> int:
+        return self.store.positions_in_book[self.index]
+
+    @property
+    def book(self) -> str:
+        return self.store.books[self.store.verse_books[self._verse_row]]
+
+    @property
+    def chapter(self) -> int:
+        return self.store.verse_chapters[self._verse_row]
+
+    @property
+    def verse(self) -> int:
+        return self.store.verse_numbers[self._verse_row]
+
+    @property
+    def verse_id(self) -> str:
+        return self.store.verse_ids[self._verse_row]
+
+    @property
+    def canonical_reference(self) -> str:
+        return self.store.verse_references[self._verse_row]
+
+    @property
+    def word_length(self) -> int:
+        return len(self.word)
+
+    def _flag(self, flag: int) -> bool:
+        return bool(self.store.vocab_flags[self.store.word_ids[self.index]] & flag)
+
+    @property
+    def is_capitalized(self) -> bool:
+        return self._flag(CAPITALIZED)
+
+    @property
+    def is_number(self) -> bool:
+        return self._flag(NUMBER)
+
+    @property
+    def is_proper_name(self) -> bool:
+        return self._flag(PROPER_NAME)
+
+    @property
+    def source_mask(self) -> int:
+        return self.store.source_masks[self.index]
+
+    @property
+    def source_attribution(self) -> List[str]:
+        return mask_sources(self.source_mask)
+
+    @property
+    def mathematical_properties(self) -> Dict[str, Any]:
+        """Verse-level properties of the word; the percentages dict is shared by the verse."""
+        verse_row = self._verse_row
+        verse_word_count = self.store.verse_word_counts[verse_row]
+        position = self.position_in_verse
+        return {
+            "source_percentages": self.store.verse_percentages[verse_row],
+            "verse_word_count": verse_word_count,
+            "is_first_word": position == 1,
+            "is_last_word": position == verse_word_count,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The word as a WordData-shaped dict."""
+        return {
+            "word": self.word,
+            "position_global": self.position_global,
+            "position_in_verse": self.position_in_verse,
+            "position_in_chapter": self.position_in_chapter,
+            "position_in_book": self.position_in_book,
+            "book": self.book,
+            "chapter": self.chapter,
+            "verse": self.verse,
+            "verse_id": self.verse_id,
+            "canonical_reference": self.canonical_reference,
+            "word_length": self.word_length,
+            "is_capitalized": self.is_capitalized,
+            "is_number": self.is_number,
+            "is_proper_name": self.is_proper_name,
+            "source_attribution": self.source_attribution,
+            "mathematical_properties": self.mathematical_properties,
+        }
+
+class WordStore(Sequence):
+    """Words of a corpus as parallel typed arrays, with interned vocabulary and verses."""
+
+    def __init__(self, is_proper_name: Optional[Callable[[str], bool]] = None):
+        self.is_proper_name = is_proper_name
+
+        # Vocabulary
+        self.vocab: List[str] = []
+        self.vocab_index: Dict[str, int] = {}
+        self.vocab_flags = array("B")
+
+        # Verses
+        self.books: List[str] = []
+        self.book_index: Dict[str, int] = {}
+        self.verse_books = array("H")
+        self.verse_chapters = array("H")
+        self.verse_numbers = array("H")
+        self.verse_ids: List[str] = []
+        self.verse_references: List[str] = []
+        self.verse_word_counts = array("H")
+        self.verse_percentages: List[Dict[str, float]] = []
+
+        # Words
+        self.word_ids = array("I")
+        self.verse_rows = array("I")
+        self.positions_global = array("I")
+        self.positions_in_verse = array("H")
+        self.positions_in_chapter = array("I")
+        self.positions_in_book = array("I")
+        self.source_masks = array("B")
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [WordView(self, i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("word index out of range")
+        return WordView(self, key)
+
+    def __iter__(self) -> Iterator[WordView]:
+        for i in range(len(self)):
+            yield WordView(self, i)
+
+    def vocab_id(self, word: str) -> int:
+        """Id of a word in the vocabulary, adding it on first use."""
+        word_id = self.vocab_index.get(word)
+        if word_id is None:
+            word_id = self.vocab_index[word] = len(self.vocab)
+            self.vocab.append(word)
+            flags = 0
+            if word[:1].isupper():
+                flags |= CAPITALIZED
+            if word.isdigit():
+                flags |= NUMBER
+            if self.is_proper_name is not None and self.is_proper_name(word):
+                flags |= PROPER_NAME
+            self.vocab_flags.append(flags)
+        return word_id
+
+    def book_id(self, book: str) -> int:
+        """Id of a book, adding it on first use."""
+        book_id = self.book_index.get(book)
+        if book_id is None:
+            book_id = self.book_index[book] = len(self.books)
+            self.books.append(book)
+        return book_id
+
+    def add_verse(self, book: str, chapter: int, verse: int, verse_id: str, canonical_reference: str,
+                  word_count: int, source_percentages: Dict[str, float]) -> int:
+        """Record a verse and return its row."""
+        self.verse_books.append(self.book_id(book))
+        self.verse_chapters.append(chapter)
+        self.verse_numbers.append(verse)
+        self.verse_ids.append(verse_id)
+        self.verse_references.append(canonical_reference)
+        self.verse_word_counts.append(word_count)
+        self.verse_percentages.append(source_percentages)
+        return len(self.verse_ids) - 1
+
+    def add_word(self, word: str, verse_row: int, position_global: int, position_in_verse: int,
+                 position_in_chapter: int, position_in_book: int, sources_mask: int) -> int:
+        """Append a word and return its index."""
+        self.word_ids.append(self.vocab_id(word))
+        self.verse_rows.append(verse_row)
+        self.positions_global.append(position_global)
+        self.positions_in_verse.append(position_in_verse)
+        self.positions_in_chapter.append(position_in_chapter)
+        self.positions_in_book.append(position_in_book)
+        self.source_masks.append(sources_mask)
+        return len(self.word_ids) - 1
+
+    def number_positions(self, first_verse_row: int = 0) -> None:
+        """Number the global, book and chapter positions of the words of verses from first_verse_row on.
+
+        Every verse starts at the prefix sum of the word counts before it.
+        Earlier words keep their positions and numbering continues from the
+        last of them, also within a book or chapter that started before
+        first_verse_row.
+        """
+        verse_count = len(self.verse_ids)
+        if first_verse_row >= verse_count:
+            return
+        first_word = bisect_left(self.verse_rows, first_verse_row)
+        verse_ends = [bisect_left(self.verse_rows, row, first_word) for row in range(first_verse_row + 1, verse_count)]
+        verse_ends.append(len(self))
+        word_counts = [end - start for start, end in zip([first_word] + verse_ends, verse_ends)]
+
+        base = book_base = chapter_base = 0
+        last_book = last_chapter = None
+        if first_word:
+            last_word = first_word - 1
+            last_row = self.verse_rows[last_word]
+            base = self.positions_global[last_word]
+            book_base = base - self.positions_in_book[last_word]
+            chapter_base = base - self.positions_in_chapter[last_word]
+            last_book, last_chapter = self.verse_books[last_row], self.verse_chapters[last_row]
+
+        positions_global = array("I")
+        positions_in_book = array("I")
+        positions_in_chapter = array("I")
+        verse_starts = accumulate(word_counts, initial=base)
+        for row, start, count in zip(range(first_verse_row, verse_count), verse_starts, word_counts):
+            book, chapter = self.verse_books[row], self.verse_chapters[row]
+            if book != last_book:
+                book_base = chapter_base = start
+            elif chapter != last_chapter:
+                chapter_base = start
+            last_book, last_chapter = book, chapter
+            positions_global.extend(range(start + 1, start + count + 1))
+            positions_in_book.extend(range(start - book_base + 1, start - book_base + count + 1))
+            positions_in_chapter.extend(range(start - chapter_base + 1, start - chapter_base + count + 1))
+
+        self.positions_global[first_word:] = positions_global
+        self.positions_in_book[first_word:] = positions_in_book
+        self.positions_in_chapter[first_word:] = positions_in_chapter
+
+    def extend(self, other: "WordStore") -> None:
+        """Append every verse and word of other and number their positions after this store's.
+
+        other's vocabulary and book ids are remapped to this store's, so
+        stores tokenized separately (one per book, in worker processes)
+        merge into the same store a serial load builds.
+        """
+        word_id_map = [self.vocab_id(word) for word in other.vocab]
+        book_id_map = [self.book_id(book) for book in other.books]
+        verse_offset = len(self.verse_ids)
+
+        self.verse_books.extend(map(book_id_map.__getitem__, other.verse_books))
+        self.verse_chapters.extend(other.verse_chapters)
+        self.verse_numbers.extend(other.verse_numbers)
+        self.verse_ids.extend(other.verse_ids)
+        self.verse_references.extend(other.verse_references)
+        self.verse_word_counts.extend(other.verse_word_counts)
+        self.verse_percentages.extend(other.verse_percentages)
+
+        self.word_ids.extend(map(word_id_map.__getitem__, other.word_ids))
+        self.verse_rows.extend(map(verse_offset.__add__, other.verse_rows))
+        self.positions_global.extend(other.positions_global)
+        self.positions_in_verse.extend(other.positions_in_verse)
+        self.positions_in_chapter.extend(other.positions_in_chapter)
+        self.positions_in_book.extend(other.positions_in_book)
+        self.source_masks.extend(other.source_masks)
+        self.number_positions(verse_offset)
+
+    def nbytes(self) -> int:
+        """Approximate size of the word and verse columns in bytes (strings excluded)."""
+        columns = [
+            self.vocab_flags, self.verse_books, self.verse_chapters, self.verse_numbers,
+            self.verse_word_counts, self.word_ids, self.verse_rows, self.positions_global,
+            self.positions_in_verse, self.positions_in_chapter, self.positions_in_book, self.source_masks,
+        ]
+        return sum(column.itemsize * len(column) for column in columns)
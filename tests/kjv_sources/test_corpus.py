@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from kjv_sources.corpus import Corpus, count_verse_rows, get_corpus, parse_csv_spans, read_verse_csv
+from parse_wikitext import iter_verses, tokenize_wikitext, write_csv_output
+
+SAMPLE_WIKITEXT = """==Chapter 1==
+{{font|size=smaller|color=#0000FF|1}}{{font|color=#888800| In the beginning}}
+{{font|size=smaller|color=#0000FF|2}}{{font|color=#000088| And the earth}} {{font|color=#880000| was void.}}
+==Chapter 2==
+{{font|size=smaller|color=#0000FF|1}}{{font|color=#008888| Thus the heavens}}
+"""
+
+
+def write_sample_output(tmp_path, book_names=("Sample",)):
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    for book_name in book_names:
+        write_csv_output(verses, book_name, str(tmp_path / "output" / book_name))
+    return str(tmp_path / "output")
+
+
+def test_corpus_parses_csv_fields_into_typed_columns(tmp_path):
+    corpus = Corpus.from_output_dir(write_sample_output(tmp_path))
+
+    assert corpus.books == ["Sample"]
+    assert len(corpus) == 3
+    assert list(corpus["chapter"]) == [1, 1, 2]
+    row = corpus.row(corpus.find("Sample", 1, 2))
+    assert row["book"] == "Sample"
+    assert row["sources"] == ["J", "R"]
+    assert row["source_sequence"] == ["J", "R"]
+    assert row["source_spans"] == [(0, 13, "J", "#000088"), (14, 23, "R", "#880000")]
+    assert corpus.percentages(corpus.find("Sample", 1, 1))["P"] == 100.0
+    assert list(corpus.indices("Sample", 1)) == [0, 1]
+    assert corpus.find("Sample", 3, 1) is None
+
+
+def test_get_corpus_loads_each_output_dir_once(tmp_path):
+    output_dir = write_sample_output(tmp_path)
+
+    corpus = get_corpus(output_dir)
+
+    assert get_corpus(output_dir) is corpus
+    assert get_corpus(output_dir, reload=True) is not corpus
+
+
+def test_parse_csv_spans_ignores_legacy_placeholders():
+    assert parse_csv_spans("0:3:J:#000088") == ((0, 3, "J", "#000088"),)
+    assert parse_csv_spans("boundary_1") == ()
+    assert parse_csv_spans("none") == ()
+
+
+def test_count_verse_rows_counts_records_only(tmp_path):
+    output_dir = write_sample_output(tmp_path)
+
+    assert count_verse_rows(os.path.join(output_dir, "Sample", "Sample.csv")) == 3
+
+
+def test_frames_are_typed_pruned_and_cached(tmp_path):
+    pytest.importorskip("pandas")
+    output_dir = write_sample_output(tmp_path)
+    corpus = Corpus.from_output_dir(output_dir)
+
+    df = corpus.frame("Sample", columns=["chapter", "primary_source", "sources"])
+
+    assert list(df.columns) == ["chapter", "primary_source", "sources"]
+    assert str(df["chapter"].dtype) == "uint16"
+    assert str(df["primary_source"].dtype) == "category"
+    assert df["sources"].tolist() == [["P"], ["J", "R"], ["E"]]
+    df["chapter"] = 0
+    assert corpus.frame("Sample", columns=["chapter", "primary_source", "sources"])["chapter"].tolist() == [1, 1, 2]
+
+    csv_df = read_verse_csv(os.path.join(output_dir, "Sample", "Sample.csv"), columns=["word_count", "sources"])
+    assert list(csv_df.columns) == ["word_count", "sources"]
+    assert csv_df["sources"].tolist() == ["P", "J;R", "E"]
@@ -0,0 +1,65 @@
+from kjv_sources.doublet_index import DoubletIndex
+
+DOUBLETS = {
+    "doublets": [
+        {
+            "id": "creation",
+            "name": "Creation",
+            "category": "cosmogony",
+            "theological_differences": ["order of creation"],
+            "passages": [
+                {"reference": "Genesis 1:1-2:3", "book": "Genesis", "chapter_start": 1, "verse_start": 1,
+                 "chapter_end": 2, "verse_end": 3, "themes": ["sabbath"]},
+                {"reference": "Genesis 2:4b-25", "book": "Genesis", "chapter_start": 2, "verse_start": 4,
+                 "chapter_end": 2, "verse_end": 25, "themes": ["garden"]},
+            ],
+        },
+        {
+            "id": "seventh_day",
+            "name": "Seventh day",
+            "category": "law",
+            "passages": [
+                {"reference": "Genesis 2:1-3", "book": "Genesis", "chapter_start": 2, "verse_start": 1,
+                 "chapter_end": 2, "verse_end": 3, "themes": ["rest"]},
+                {"reference": "Exodus 20:8-11", "book": "Exodus", "chapter_start": 20, "verse_start": 8,
+                 "chapter_end": 20, "verse_end": 11},
+            ],
+        },
+    ]
+}
+
+
+def test_passages_containing_a_verse():
+    index = DoubletIndex(DOUBLETS)
+
+    assert index.passages_at_verse("Genesis", 1, 1) == (("creation", 0),)
+    assert index.passages_at_verse("Genesis", 2, 2) == (("creation", 0), ("seventh_day", 0))
+    assert index.passages_at_verse("Genesis", 2, 4) == (("creation", 1),)
+    assert index.passages_at_verse("Genesis", 3, 1) == ()
+    assert index.doublets_at_verse("Exodus", 20, 11) == ["seventh_day"]
+    assert index.doublets_at_verse("Leviticus", 1, 1) == []
+
+
+def test_verses_of_a_doublet_and_overlaps():
+    index = DoubletIndex(DOUBLETS)
+
+    assert index.verses("creation") == [range(0, 34), range(34, 56)]
+    assert index.passages_overlapping(range(31, 32)) == [("creation", 0), ("seventh_day", 0)]
+    assert index.passages_overlapping(range(56, 60)) == []
+
+
+def test_verse_doublet_info_matches_qdrant_payload_shape():
+    info = DoubletIndex(DOUBLETS).verse_doublet_info("Genesis", 2, 1)
+
+    assert info["is_doublet"] is True
+    assert info["doublet_ids"] == ["creation", "seventh_day"]
+    assert info["parallel_passages"] == ["Genesis 2:4b-25", "Exodus 20:8-11"]
+    assert info["theological_differences"] == ["order of creation"]
+    assert info["related_themes"] == ["sabbath", "rest"]
+    assert DoubletIndex(DOUBLETS).verse_doublet_info("Genesis", 5, 1)["is_doublet"] is False
+
+
+def test_unresolvable_passage_reference_does_not_break_the_index():
+    index = DoubletIndex({"doublets": [{"id": "bad", "passages": [{"reference": "Genesis 1:1; 99:1"}]}]})
+
+    assert index.passage_ranges["bad"] == [None]
@@ -0,0 +1,61 @@
+import pytest
+
+from kjv_sources.references import ReferenceParser, parse_reference
+from kjv_sources.verse_index import VerseIndex, get_verse_index
+
+
+def test_single_verse_forms_share_one_result():
+    for text in ("Genesis 1:1", "Genesis 1 1", "Genesis_1_1", "Gen.1.1", "gen 1:1"):
+        reference = parse_reference(text)
+        assert reference.book == "Genesis"
+        assert reference.first == ("Genesis", 1, 1)
+        assert reference.verse_ids() == [range(0, 1)]
+
+
+def test_lists_partial_verses_and_chapter_groups():
+    reference = parse_reference("Genesis 6:5-8; 7:1-5,7,16b-20; 8:2b-3a")
+    assert [(r.chapter_start, r.verse_start, r.chapter_end, r.verse_end) for r in reference.ranges] == [
+        (6, 5, 6, 8), (7, 1, 7, 5), (7, 7, 7, 7), (7, 16, 7, 20), (8, 2, 8, 3),
+    ]
+    span = reference.span()
+    assert (span.chapter_start, span.verse_start, span.chapter_end, span.verse_end) == (6, 5, 8, 3)
+    index = get_verse_index()
+    assert index.verse_id("Genesis", 7, 7) in reference
+    assert index.verse_id("Genesis", 7, 6) not in reference
+
+
+def test_cross_chapter_spans_and_whole_chapters():
+    index = get_verse_index()
+    assert parse_reference("Genesis 1:1-2:3").span().ids == range(0, index.verse_id("Genesis", 2, 3) + 1)
+    assert parse_reference("Genesis 15").span().ids == index.chapter_range("Genesis", 15)
+    chapters = parse_reference("Genesis 15-16").span()
+    assert (chapters.chapter_end, chapters.verse_end) == (16, 16)
+
+
+def test_books_outside_the_index_keep_numbers_without_ids():
+    reference = parse_reference("1 Kings 2:3-5")
+    assert reference.first == ("1 Kings", 2, 3)
+    assert reference.span().ids is None
+    assert reference.verse_ids() == []
+
+
+def test_span_of_a_partly_unresolvable_reference_has_no_ids():
+    reference = parse_reference("Genesis 1:1; 99:1")
+
+    assert reference.verse_ids() == [range(0, 1)]
+    span = reference.span()
+    assert (span.start, span.stop, span.ids) == (None, None, None)
+    assert (span.chapter_start, span.chapter_end) == (1, 99)
+
+
+def test_malformed_references_raise_value_error():
+    for text in ("Genesis", "Genesis 1:x", "1:1"):
+        with pytest.raises(ValueError):
+            parse_reference(text)
+
+
+def test_parser_caches_and_uses_its_own_index():
+    parser = ReferenceParser(VerseIndex({"Jude": (25,)}), cache_size=8)
+    assert parser.parse("Jude 1:3") is parser.parse("Jude 1:3")
+    assert parser.parse("Jude 1:3").verse_ids() == [range(2, 3)]
+    assert parser.parse.cache_info().hits == 2
@@ -0,0 +1,41 @@
+import os
+
+from kjv_sources.corpus import Corpus, get_corpus
+from kjv_sources.snapshot import CorpusSnapshot, build_snapshot, load_snapshot
+
+from tests.kjv_sources.test_corpus import write_sample_output
+
+BOOK_NAMES = ("Genesis", "Exodus")
+
+
+def test_snapshot_rows_match_the_csv_corpus(tmp_path):
+    output_dir = write_sample_output(tmp_path, BOOK_NAMES)
+    corpus = Corpus.from_output_dir(output_dir)
+
+    snapshot = CorpusSnapshot(build_snapshot(output_dir))
+
+    assert snapshot.books == corpus.books == ["Genesis", "Exodus"]
+    assert len(snapshot) == len(corpus) == 6
+    assert [snapshot.row(i) for i in range(6)] == [corpus.row(i) for i in range(6)]
+    assert snapshot.percentages(4) == corpus.percentages(4)
+    assert list(snapshot.indices("Exodus", 1)) == [3, 4]
+    assert list(snapshot.indices("Exodus")) == [3, 4, 5]
+    assert list(snapshot.indices("Exodus", 9)) == []
+    assert snapshot.find("Exodus", 2, 1) == 5
+    assert snapshot.find("Leviticus", 1, 1) is None
+    assert snapshot.rows_with_source("R") == [1, 4]
+    assert snapshot["full_text"][3:5] == corpus["full_text"][3:5]
+
+
+def test_get_corpus_maps_current_snapshot_only(tmp_path):
+    output_dir = write_sample_output(tmp_path, BOOK_NAMES)
+    build_snapshot(output_dir)
+
+    assert isinstance(get_corpus(output_dir, reload=True), CorpusSnapshot)
+
+    # Rewriting a verse table makes the snapshot stale
+    csv_path = os.path.join(output_dir, "Exodus", "Exodus.csv")
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert load_snapshot(output_dir) is None
+    assert not isinstance(get_corpus(output_dir, reload=True), CorpusSnapshot)
@@ -0,0 +1,54 @@
+from kjv_sources.corpus import Corpus
+from kjv_sources.sqlite_store import VerseDatabase, build_database, database_path, open_database
+
+from tests.kjv_sources.test_corpus import write_sample_output
+
+BOOK_NAMES = ("Genesis", "Exodus")
+
+
+def test_database_holds_every_verse_of_the_corpus(tmp_path):
+    output_dir = write_sample_output(tmp_path, BOOK_NAMES)
+    corpus = Corpus.from_output_dir(output_dir)
+
+    assert build_database(output_dir) == database_path(output_dir)
+
+    with open_database(output_dir) as database:
+        assert [(book["name"], book["chapters"], book["verses"]) for book in database.books()] == [
+            ("Genesis", 2, 3), ("Exodus", 2, 3),
+        ]
+        verse = database.verse("Exodus", 1, 2)
+        row = corpus.row(corpus.find("Exodus", 1, 2))
+        assert verse["verse_id"] == row["verse_id"]
+        assert verse["full_text"] == row["full_text"]
+        assert verse["sources"] == list(row["sources"])
+        assert verse["source_percentages"]["R"] == row["pct_R"]
+        assert database.verse("Exodus", 3, 1) is None
+        assert [verse["verse"] for verse in database.chapter("Genesis", 1)] == [1, 2]
+
+
+def test_full_text_and_source_queries(tmp_path):
+    output_dir = write_sample_output(tmp_path, BOOK_NAMES)
+    build_database(output_dir)
+
+    with open_database(output_dir) as database:
+        results = database.search("earth void")
+        assert sorted(verse["canonical_reference"] for verse in results) == ["Exodus 1:2", "Genesis 1:2"]
+        assert "[earth]" in results[0]["snippet"]
+        assert [verse["verse_id"] for verse in database.search("heavens", book="Exodus")] == ["Exodus_2_1"]
+        assert database.search("beginning", source="J") == []
+        assert database.search('"') == []
+        assert [verse["verse_id"] for verse in database.verses_with_source("R")] == ["Genesis_1_2", "Exodus_1_2"]
+
+
+def test_reloading_a_book_replaces_its_verses(tmp_path):
+    output_dir = write_sample_output(tmp_path, BOOK_NAMES)
+    corpus = Corpus.from_output_dir(output_dir)
+    database = VerseDatabase(str(tmp_path / "verses.db"))
+    database.create_tables()
+
+    assert database.load_corpus(corpus) == 6
+    assert database.load_corpus(corpus, ["Genesis"]) == 3
+
+    assert sum(book["verses"] for book in database.books()) == 6
+    assert len(database.search("beginning")) == 2
+    database.close()
@@ -0,0 +1,49 @@
+import pytest
+
+from kjv_sources.verse_index import VerseIndex, get_verse_index
+
+
+def test_verse_ids_are_canonical_positions():
+    index = get_verse_index()
+
+    assert len(index) == 5852
+    assert index.verse_id("Genesis", 1, 1) == 0
+    assert index.verse_id("Genesis", 2, 1) == 31
+    assert index.verse_id("Exodus", 1, 1) == 1533
+    assert index.verse_id("Deuteronomy", 34, 12) == 5851
+    assert index.reference(1533) == ("Exodus", 1, 1)
+    assert index.reference(1532) == ("Genesis", 50, 26)
+    for verse_id in range(len(index)):
+        assert index.verse_id(*index.reference(verse_id)) == verse_id
+
+
+def test_parse_accepts_project_verse_identifiers():
+    index = get_verse_index()
+
+    assert index.parse("Genesis 1:1") == index.parse("Genesis_1_1") == index.parse("Gen.1.1") == 0
+    assert index.parse("deut 34:12") == 5851
+    assert index.verse_key(31) == "Genesis_2_1"
+    assert index.canonical_reference(31) == "Genesis 2:1"
+    with pytest.raises(KeyError):
+        index.parse("Genesis 1:32")
+    with pytest.raises(KeyError):
+        index.parse("Genesis 51:1")
+    with pytest.raises(ValueError):
+        index.parse("Genesis")
+
+
+def test_ranges_are_contiguous_id_ranges():
+    index = get_verse_index()
+
+    assert index.chapter_range("Genesis", 1) == range(0, 31)
+    assert index.book_range("Exodus") == range(1533, 2746)
+    assert index.passage_range("Genesis", 1, 1, 2, 3) == range(0, 34)
+    assert index.chapter_position("Exodus", 1) == 50
+    assert index.chapter_count("Leviticus") == 27
+
+
+def test_index_from_custom_chapter_counts():
+    index = VerseIndex({"Ruth": [22, 23, 18, 22]})
+
+    assert index.verse_id("Ruth", 4, 22) == 84
+    assert index.find("Ruth", 5, 1) is None
@@ -0,0 +1,42 @@
+import pytest
+
+from kjv_sources.word_export import iter_word_chunks, iter_words, write_words
+from kjv_sources.word_store import WordStore, source_mask
+
+
+def build_store(word_count=7):
+    store = WordStore()
+    verse_row = store.add_verse("Genesis", 1, 1, "Genesis_1_1", "Genesis 1:1", word_count, {"P": 100.0})
+    for position in range(1, word_count + 1):
+        store.add_word(f"w{position}", verse_row, position, position, position, position, source_mask(["P"]))
+    return store
+
+
+def test_ndjson_export_round_trips_in_chunks(tmp_path):
+    store = build_store()
+    path = str(tmp_path / "words.ndjson")
+
+    assert write_words(store, path, chunk_size=3) == 7
+
+    chunks = list(iter_word_chunks(path, chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    records = list(iter_words(path))
+    assert [record.word for record in records] == [word.word for word in store]
+    assert records[6].source_attribution == ["P"]
+    assert records[6].mathematical_properties == store[6].mathematical_properties
+    assert not (tmp_path / "words.ndjson.tmp").exists()
+
+
+def test_parquet_export_round_trips(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = build_store()
+    path = str(tmp_path / "words.parquet")
+
+    write_words(store, path, chunk_size=4)
+
+    assert [vars(record) for record in iter_words(path, chunk_size=2)] == [word.to_dict() for word in store]
+
+
+def test_unknown_extension_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_words(build_store(), str(tmp_path / "words.txt"))
@@ -0,0 +1,33 @@
+from kjv_sources.word_features import (
+    FIBONACCI, PERFECT_SQUARE, PRIME, SEVENED, WordFeatures, is_fibonacci, is_prime, length_flags, residues,
+    word_properties,
+)
+
+
+def test_length_flags_match_the_number_predicates():
+    lengths = list(range(300))
+
+    flags = length_flags(lengths)
+
+    assert [bool(f & PRIME) for f in flags] == [is_prime(n) for n in lengths]
+    assert [bool(f & FIBONACCI) for f in flags] == [is_fibonacci(n) for n in lengths]
+    assert flags[49] == SEVENED | PERFECT_SQUARE
+    assert [n for n in lengths if flags[n] & FIBONACCI][:8] == [0, 1, 2, 3, 5, 8, 13, 21]
+
+
+def test_residues_of_ranges_and_other_positions():
+    for positions in (range(5, 2000), [3, 9, 10, 800]):
+        assert list(residues(positions, 77)) == [position % 77 for position in positions]
+
+
+def test_batch_properties_equal_single_word_properties():
+    lengths = [2, 7, 77, 490, 1]
+    features = WordFeatures(lengths, range(10, 15))
+
+    assert list(features.iter_properties()) == [word_properties(n, 10 + i) for i, n in enumerate(lengths)]
+    assert features.properties(3)["is_70x7"] and features.properties(2)["is_77"]
+    assert word_properties(7, 777) == {
+        "position": 777, "word_length": 7, "is_sevened": True, "is_77": False, "is_777": False,
+        "is_70x7": False, "position_mod_7": 0, "position_mod_77": 7, "position_mod_777": 0,
+        "is_prime_length": True, "is_perfect_square_length": False, "is_fibonacci_length": False,
+    }
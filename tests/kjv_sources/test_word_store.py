@@ -0,0 +1,72 @@
+from kjv_sources.word_store import WordStore, mask_sources, source_mask
+
+
+def build_store():
+    store = WordStore(is_proper_name={"God"}.__contains__)
+    percentages = {"J": 60.0, "R": 40.0}
+    verse_row = store.add_verse("Genesis", 1, 2, "Genesis_1_2", "Genesis 1:2", 3, percentages)
+    for position, (word, sources) in enumerate([("And", ["R", "J"]), ("God", ["J"]), ("7", [])], start=1):
+        store.add_word(word, verse_row, position, position, position, position, source_mask(sources))
+    store.add_word("And", verse_row, 4, 1, 4, 4, source_mask(["R"]))
+    return store, percentages
+
+
+def test_views_expose_word_data_attributes():
+    store, percentages = build_store()
+
+    first, god, number, last = store
+    assert len(store) == 4
+    assert (first.word, first.book, first.chapter, first.verse) == ("And", "Genesis", 1, 2)
+    assert first.source_attribution == ["J", "R"]
+    assert first.is_capitalized and not first.is_proper_name
+    assert god.is_proper_name and number.is_number and number.source_attribution == []
+    assert first.mathematical_properties["source_percentages"] is percentages
+    assert first.mathematical_properties["is_first_word"] and number.mathematical_properties["is_last_word"]
+    assert store[-1].to_dict()["position_global"] == 4
+    assert [word.word for word in store[1:3]] == ["God", "7"]
+
+
+def test_vocabulary_and_verses_are_interned():
+    store, _ = build_store()
+
+    assert store.vocab == ["And", "God", "7"]
+    assert list(store.word_ids) == [0, 1, 2, 0]
+    assert len(store.verse_ids) == 1
+    assert store.nbytes() == 3 * 1 + 4 * 2 + 4 * (4 + 4 + 4 + 2 + 4 + 4 + 1)
+
+
+def test_masks_round_trip_in_canonical_order():
+    assert mask_sources(source_mask(["UNKNOWN", "P", "J"])) == ["J", "P", "UNKNOWN"]
+    assert source_mask(["not-a-source"]) == 0
+
+
+def test_extend_remaps_vocabulary_verses_and_positions():
+    store, _ = build_store()
+    other = WordStore()
+    verse_row = other.add_verse("Exodus", 1, 1, "Exodus_1_1", "Exodus 1:1", 2, {"P": 100.0})
+    other.add_word("Now", verse_row, 1, 1, 1, 1, source_mask(["P"]))
+    other.add_word("God", verse_row, 2, 2, 2, 2, source_mask(["P"]))
+
+    store.extend(other)
+
+    assert [word.position_global for word in store[4:]] == [5, 6]
+    assert [word.word for word in store[4:]] == ["Now", "God"]
+    assert store[5].is_proper_name and store[5].book == "Exodus"
+    assert store.vocab == ["And", "God", "7", "Now"]
+
+
+def test_extend_continues_the_book_and_chapter_the_store_ends_with():
+    store, _ = build_store()
+    other = WordStore()
+    for verse, chapter, words in [(3, 1, ["Let", "there"]), (1, 2, ["Thus"])]:
+        verse_row = other.add_verse("Genesis", chapter, verse, f"Genesis_{chapter}_{verse}",
+                                    f"Genesis {chapter}:{verse}", len(words), {"P": 100.0})
+        for position, word in enumerate(words, start=1):
+            other.add_word(word, verse_row, position, position, position, position, source_mask(["P"]))
+    exodus_row = other.add_verse("Exodus", 1, 1, "Exodus_1_1", "Exodus 1:1", 1, {"P": 100.0})
+    other.add_word("Now", exodus_row, 1, 1, 1, 1, source_mask(["P"]))
+
+    store.extend(other)
+
+    positions = [(word.position_global, word.position_in_book, word.position_in_chapter) for word in store[4:]]
+    assert positions == [(5, 5, 5), (6, 6, 6), (7, 7, 1), (8, 1, 1)]
@@ -0,0 +1,68 @@
+import json
+
+from csv_data_loader import CSVDataLoader
+from parse_wikitext import iter_verses, tokenize_wikitext, write_csv_output
+
+from tests.test_parse_wikitext import SAMPLE_WIKITEXT
+
+
+def test_load_book_csv_attributes_words_from_source_spans(tmp_path):
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    csv_path = write_csv_output(verses, "Sample", str(tmp_path))
+
+    words = CSVDataLoader(str(tmp_path)).load_book_csv(csv_path, "Sample")
+
+    multi = [(w.word, w.source_attribution) for w in words if w.verse_id == "Sample_1_2"]
+    assert multi == [
+        ("And", ["J"]), ("the", ["J"]), ("earth", ["J"]), ("was", ["R"]), ("void", ["R"]),
+    ]
+
+
+def test_parse_source_spans_ignores_legacy_placeholders():
+    loader = CSVDataLoader()
+
+    assert loader.parse_source_spans("0:3:J:#000088;4:8:R:#880000") == [(0, 3, "J"), (4, 8, "R")]
+    assert loader.parse_source_spans("boundary_1") == []
+    assert loader.parse_source_spans("none") == []
+
+
+def test_word_masks_from_source_texts_follows_the_segment_sequence():
+    loader = CSVDataLoader()
+    row = {"text_P": "And Moses stretched and the waters", "text_J": "and the LORD caused"}
+    words = "And Moses stretched and the LORD caused and the waters".split()
+
+    masks = loader.word_masks_from_source_texts(words, ["P", "J", "P"], row)
+
+    labels = {1: "J", 4: "P"}
+    assert [labels[mask] for mask in masks] == ["P"] * 3 + ["J"] * 4 + ["P"] * 3
+
+
+def test_save_word_data_writes_a_json_document(tmp_path):
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    csv_path = write_csv_output(verses, "Sample", str(tmp_path))
+    loader = CSVDataLoader(str(tmp_path))
+    words = loader.load_book_csv(csv_path, "Sample")
+
+    loader.save_word_data(str(tmp_path / "word_data.json"))
+
+    with open(tmp_path / "word_data.json", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["metadata"]["total_words"] == len(words)
+    assert data["words"] == [word.to_dict() for word in words]
+
+
+def test_parallel_load_matches_serial_load_with_exact_positions(tmp_path):
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    for book_name in ("Alpha", "Beta"):
+        write_csv_output(verses, book_name, str(tmp_path / book_name))
+
+    serial = CSVDataLoader(str(tmp_path)).load_all_books()
+    parallel = CSVDataLoader(str(tmp_path)).load_all_books(jobs=2)
+
+    assert [word.to_dict() for word in parallel] == [word.to_dict() for word in serial]
+    assert [word.position_global for word in serial] == list(range(1, len(serial) + 1))
+    beta = [word for word in serial if word.book == "Beta"]
+    assert beta[0].position_in_book == 1 and beta[-1].position_in_book == len(beta)
+    for chapter in {word.chapter for word in beta}:
+        chapter_words = [word.position_in_chapter for word in beta if word.chapter == chapter]
+        assert chapter_words == list(range(1, len(chapter_words) + 1))
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from dataset_shards import ShardedDatasetReader, ShardedJsonlWriter
+from parse_wikitext import (artifact_blob_path, iter_verses, publish_file, tokenize_wikitext,
+                            update_artifact_index, write_book_outputs)
+
+from tests.test_parse_wikitext import SAMPLE_WIKITEXT
+
+
+def write_records(prefix, records, **options):
+    writer = ShardedJsonlWriter(str(prefix), **options)
+    # Mix single-line and multi-line writes, as the sinks do
+    writer.write(json.dumps(records[0]) + "\n")
+    writer.write("".join(json.dumps(record) + "\n" for record in records[1:]))
+    writer.close()
+    writer.publish(publish_file)
+    return writer.index_path
+
+
+def test_sharded_writer_splits_records_into_fixed_size_gzip_shards(tmp_path):
+    records = [{"id": i, "text": "word " * i} for i in range(25)]
+
+    index_path = write_records(tmp_path / "Sample_training", records, compression="gzip", shard_records=10)
+
+    reader = ShardedDatasetReader(index_path)
+    assert len(reader) == 25
+    assert [shard["records"] for shard in reader.shards] == [10, 10, 5]
+    assert [shard["first_record"] for shard in reader.shards] == [0, 10, 20]
+    assert reader.shards[0]["file"] == "Sample_training-00000.jsonl.gz"
+    assert reader.shards[1]["offset"] == reader.shards[0]["uncompressed_bytes"]
+    assert list(reader) == records
+    assert reader.read_shard(2) == records[20:]
+    assert reader.get(13) == records[13]
+    with pytest.raises(IndexError):
+        reader.get(25)
+
+
+def test_sharded_writer_splits_records_on_newlines_only(tmp_path):
+    # ensure_ascii=False leaves these separators unescaped inside JSON strings
+    records = [{"id": i, "text": f"line\u2028separator\x0b{i}\r"} for i in range(5)]
+    writer = ShardedJsonlWriter(str(tmp_path / "Sample_training"), shard_records=2)
+    writer.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+    writer.close()
+    writer.publish(publish_file)
+
+    reader = ShardedDatasetReader(writer.index_path)
+    assert [shard["records"] for shard in reader.shards] == [2, 2, 1]
+    assert [reader.get(i) for i in range(5)] == records
+
+
+def test_sharded_writer_output_is_reproducible(tmp_path):
+    records = [{"id": i} for i in range(5)]
+    first = write_records(tmp_path / "a", records, compression="gzip", shard_records=2)
+    second = write_records(tmp_path / "b", records, compression="gzip", shard_records=2)
+
+    assert [s["sha256"] for s in ShardedDatasetReader(first).shards] == \
+        [s["sha256"] for s in ShardedDatasetReader(second).shards]
+
+
+def test_write_book_outputs_shards_jsonl_datasets(tmp_path):
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    options = {"compression": "gzip", "shard_records": 3}
+
+    paths = write_book_outputs(verses, "Sample", str(tmp_path), formats=["csv", "classification"],
+                               dataset_options=options)
+
+    assert paths["csv"] == str(tmp_path / "Sample.csv")
+    assert paths["classification"] == str(tmp_path / "Sample_classification.index.json")
+    reader = ShardedDatasetReader(paths["classification"])
+    assert len(reader) == 4 * len(verses)
+    assert reader.shard_count == -(-4 * len(verses) // 3)
+    assert [record["source"] for record in reader.read_shard(0)] == ["J", "E", "P"]
+
+    # Fewer, larger shards replace the old ones instead of leaving them behind
+    write_book_outputs(verses, "Sample", str(tmp_path), formats=["classification"],
+                       dataset_options={"compression": "gzip", "shard_records": 100})
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("Sample_classification")) == \
+        ["Sample_classification-00000.jsonl.gz", "Sample_classification.index.json"]
+
+
+def test_update_artifact_index_stores_dataset_shards(tmp_path):
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    book_dir = tmp_path / "Sample"
+
+    paths = write_book_outputs(verses, "Sample", str(book_dir), formats=["classification"],
+                               dataset_options={"compression": "gzip", "shard_records": 3})
+    update_artifact_index("Sample", str(book_dir), paths, timestamp="20260101_000000")
+
+    reader = ShardedDatasetReader(paths["classification"])
+    for shard in reader.shards:
+        with open(artifact_blob_path(str(tmp_path / ".store"), shard["sha256"]), "rb") as f:
+            assert f.read() == (book_dir / shard["file"]).read_bytes()
@@ -0,0 +1,387 @@
+import pytest
+
+from parse_wikitext import (
+    TOKEN_CHAPTER, TOKEN_SEGMENT, TOKEN_VERSE, iter_verses, parse_wikitext_file, tokenize_wikitext,
+)
+
+SAMPLE_WIKITEXT = """Intro {{font|color=#888800|olive yellow}}
+{{font|size=smaller|color=#0000FF|9}}{{font|color=#888800| Before any chapter.}}
+
+==Chapter 1==
+
+{{font|size=smaller|color=#0000FF|1}}{{font|color=#888800| In the beginning}}<ref>{{Cite web|title=x}}</ref>
+{{font|size=smaller|color=#0000FF|2}}{{font|color=#000088| And the earth}} {{font|color=#880000| was void.}}{{font|size=smaller|color=#0000FF|3}}{{font|color=#000088| }}
+
+== Chapter 2 ==
+<small>{{font|color=#0000FF|1}}</small>{{font|color=#008888| Thus the heavens}}<small>{{font|color=#0000FF|2}}</small>{{font|color=#888800| were finished.}}
+"""
+
+
+def test_tokenize_wikitext_emits_tokens_in_document_order():
+    tokens = list(tokenize_wikitext(SAMPLE_WIKITEXT))
+    kinds = [token[0] for token in tokens]
+
+    assert kinds[0] == TOKEN_CHAPTER
+    assert tokens[1] == (TOKEN_VERSE, "1", "1", None, None)
+    assert tokens[2] == (TOKEN_SEGMENT, "1", "1", "#888800", "In the beginning")
+    assert kinds.count(TOKEN_CHAPTER) == 2
+    assert kinds.count(TOKEN_VERSE) == 5
+
+
+def test_iter_verses_builds_verse_records():
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+
+    assert [(v['chapter'], v['verse']) for v in verses] == [("1", "1"), ("1", "2"), ("2", "1"), ("2", "2")]
+    multi = verses[1]
+    assert multi['source'] == ["J", "R"]
+    assert multi['text'] == "And the earth was void."
+    assert multi['text_J'] == "And the earth"
+    assert multi['text_R'] == "was void."
+    assert multi['segments'] == 2
+    assert verses[2]['source'] == ["E"]
+
+
+def test_parse_wikitext_file_returns_list(tmp_path):
+    path = tmp_path / "Sample.wikitext"
+    path.write_text(SAMPLE_WIKITEXT, encoding="utf-8")
+
+    verses = parse_wikitext_file(str(path))
+
+    assert isinstance(verses, list)
+    assert len(verses) == 4
+
+
+def _read_tree(root):
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in sorted(root.rglob("*")) if path.is_file() and "manifest" not in path.name
+    }
+
+
+def test_process_all_books_parallel_matches_serial(tmp_path, monkeypatch):
+    import json
+    import parse_wikitext
+
+    monkeypatch.setattr(parse_wikitext, "PIPELINE_BOOKS", {
+        "Beta": "wiki_markdown/Beta.wikitext",
+        "Alpha": "wiki_markdown/Alpha.wikitext",
+        "Missing": "wiki_markdown/Missing.wikitext",
+    })
+    run_time = parse_wikitext.time.gmtime()
+    monkeypatch.setattr(parse_wikitext.time, "gmtime", lambda *args: run_time)
+
+    trees = {}
+    for jobs in (1, 2):
+        run_dir = tmp_path / f"jobs{jobs}"
+        (run_dir / "wiki_markdown").mkdir(parents=True)
+        for book in ("Alpha", "Beta"):
+            (run_dir / "wiki_markdown" / f"{book}.wikitext").write_text(SAMPLE_WIKITEXT, encoding="utf-8")
+        monkeypatch.chdir(run_dir)
+        parse_wikitext.process_all_books(jobs=jobs)
+        manifest = json.loads((run_dir / "output" / "pipeline_manifest.json").read_text(encoding="utf-8"))
+        assert list(manifest["books"]) == ["Beta", "Alpha"]
+        trees[jobs] = _read_tree(run_dir / "output")
+
+    assert trees[1] == trees[2]
+
+
+def test_process_all_books_stamps_every_book_with_the_utc_run_time(tmp_path, monkeypatch):
+    import json
+    import time
+    import parse_wikitext
+
+    (tmp_path / "wiki_markdown").mkdir()
+    (tmp_path / "wiki_markdown" / "Alpha.wikitext").write_text(SAMPLE_WIKITEXT, encoding="utf-8")
+    monkeypatch.setattr(parse_wikitext, "PIPELINE_BOOKS", {"Alpha": "wiki_markdown/Alpha.wikitext"})
+    monkeypatch.chdir(tmp_path)
+    run_time = time.gmtime(0)
+    monkeypatch.setattr(parse_wikitext.time, "gmtime", lambda *args: run_time)
+    monkeypatch.setattr(parse_wikitext.time, "localtime", lambda *args: time.gmtime(3600))
+
+    parse_wikitext.process_all_books()
+
+    manifest = json.loads((tmp_path / "output" / "pipeline_manifest.json").read_text(encoding="utf-8"))
+    assert manifest["generated_at"] == "1970-01-01T00:00:00Z"
+    assert manifest["books"]["Alpha"]["processed_at"] == "1970-01-01T00:00:00Z"
+
+
+def test_process_all_books_skips_unchanged_inputs(tmp_path, monkeypatch, capsys):
+    import parse_wikitext
+
+    (tmp_path / "wiki_markdown").mkdir()
+    for book in ("Alpha", "Beta"):
+        (tmp_path / "wiki_markdown" / f"{book}.wikitext").write_text(SAMPLE_WIKITEXT, encoding="utf-8")
+    monkeypatch.setattr(parse_wikitext, "PIPELINE_BOOKS", {
+        "Alpha": "wiki_markdown/Alpha.wikitext",
+        "Beta": "wiki_markdown/Beta.wikitext",
+    })
+    monkeypatch.chdir(tmp_path)
+
+    parse_wikitext.process_all_books()
+    (tmp_path / "wiki_markdown" / "Beta.wikitext").write_text(SAMPLE_WIKITEXT + "\n", encoding="utf-8")
+    capsys.readouterr()
+
+    parse_wikitext.process_all_books()
+    output = capsys.readouterr().out
+    assert "[SKIP] Alpha is up to date" in output
+    assert "Processing Beta" in output
+
+    parse_wikitext.process_all_books(force=True)
+    output = capsys.readouterr().out
+    assert "[SKIP]" not in output
+
+
+def test_write_book_outputs_writes_selected_formats(tmp_path):
+    from parse_wikitext import write_book_outputs
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+
+    paths = write_book_outputs(verses, "Sample", str(tmp_path), formats=["csv", "classification"])
+
+    assert sorted(paths) == ["classification", "csv"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Sample.csv", "Sample_classification.jsonl"]
+    assert len((tmp_path / "Sample_classification.jsonl").read_text(encoding="utf-8").splitlines()) == 4 * len(verses)
+    with pytest.raises(ValueError):
+        write_book_outputs(verses, "Sample", str(tmp_path), formats=["pdf"])
+
+
+def test_update_artifact_index_stores_each_version_once(tmp_path):
+    import json
+    from parse_wikitext import resolve_artifact, update_artifact_index, write_book_outputs
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    book_dir = tmp_path / "Sample"
+
+    for timestamp in ("20260101_000000", "20260102_000000"):
+        paths = write_book_outputs(verses, "Sample", str(book_dir), formats=["csv", "html", "analysis"])
+        update_artifact_index("Sample", str(book_dir), paths, timestamp=timestamp)
+
+    index = json.loads((book_dir / "Sample_artifacts.json").read_text(encoding="utf-8"))
+    assert [v["timestamp"] for v in index["versions"]] == ["20260101_000000"]
+    assert sorted(p.name for p in book_dir.iterdir()) == \
+        ["Sample.csv", "Sample.html", "Sample_analysis.jsonl", "Sample_artifacts.json"]
+    assert len(list((tmp_path / ".store").rglob("*.*"))) == 0
+
+    blob = resolve_artifact("Sample", str(book_dir), "csv", timestamp="20260105_000000")
+    with open(blob, "rb") as f:
+        assert f.read() == (book_dir / "Sample.csv").read_bytes()
+
+
+def test_store_artifact_never_writes_through_an_existing_blob(tmp_path, monkeypatch):
+    import errno
+    import os
+    import parse_wikitext
+    from parse_wikitext import artifact_blob_path, store_artifact
+
+    store_dir = tmp_path / ".store"
+    published = tmp_path / "Genesis_sequence.jsonl"
+    published.write_text("{}\n", encoding="utf-8")
+    sha256 = store_artifact(str(published), str(store_dir))
+    before = os.stat(published)
+
+    # Another worker stored the same content between the check and the link
+    other = tmp_path / "Exodus_sequence.jsonl"
+    other.write_text("{}\n", encoding="utf-8")
+    monkeypatch.setattr(parse_wikitext.os.path, "exists", lambda path: False)
+    assert store_artifact(str(other), str(store_dir)) == sha256
+    monkeypatch.undo()
+    after = os.stat(published)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+    # Without hard links the blob is a complete copy moved into place
+    def no_link(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(parse_wikitext.os, "link", no_link)
+    copied = tmp_path / "Leviticus.csv"
+    copied.write_text("book\n", encoding="utf-8")
+    blob = artifact_blob_path(str(store_dir), store_artifact(str(copied), str(store_dir)))
+    assert open(blob, encoding="utf-8").read() == "book\n"
+    assert os.stat(blob).st_ino != os.stat(copied).st_ino
+    assert not [p for p in store_dir.rglob("*.tmp")]
+
+
+def test_write_html_preview_split_writes_chapter_fragments(tmp_path):
+    from parse_wikitext import write_html_preview
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+
+    write_html_preview(verses, "Sample", str(tmp_path), split=True)
+
+    fragments = sorted(p.name for p in (tmp_path / "chapters").iterdir())
+    assert fragments == ["Sample_1.html", "Sample_2.html"]
+    fragment = (tmp_path / "chapters" / "Sample_2.html").read_text(encoding="utf-8")
+    assert fragment.startswith('<div class="chapter" id="chapter-2">')
+    assert "Thus the heavens" in fragment and "In the beginning" not in fragment
+    index = (tmp_path / "Sample_index.html").read_text(encoding="utf-8")
+    assert 'href="chapters/Sample_1.html"' in index
+    assert "In the beginning" not in index
+
+
+def test_html_chapters_discard_removes_open_fragment(tmp_path):
+    from parse_wikitext import HtmlChaptersSink, derive_verse_fields
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    sink = HtmlChaptersSink("Sample", str(tmp_path))
+    sink.write(verses[0], derive_verse_fields(verses[0], "Sample"))
+
+    sink.discard()
+
+    assert list((tmp_path / "chapters").iterdir()) == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chapters"]
+
+
+def test_parquet_format_writes_typed_verse_table(tmp_path):
+    import pyarrow.parquet as pq
+    from parse_wikitext import write_book_outputs
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+
+    paths = write_book_outputs(verses, "Sample", str(tmp_path), formats=["parquet"])
+    rows = pq.read_table(paths["parquet"]).to_pylist()
+
+    assert len(rows) == len(verses)
+    assert [(row['chapter'], row['verse']) for row in rows] == \
+        [(int(verse['chapter']), int(verse['verse'])) for verse in verses]
+    assert rows[1]['sources'] == ["J", "R"]
+    assert rows[1]['primary_source'] == "J"
+    assert rows[1]['redaction_indicators'] == ["multi_source", "redactor_present"]
+    assert rows[0]['redaction_indicators'] == []
+    assert rows[1]['pct_J'] + rows[1]['pct_R'] > 90.0
+
+
+def test_parquet_format_requires_pyarrow(tmp_path, monkeypatch):
+    import parse_wikitext
+
+    monkeypatch.setattr(parse_wikitext, "pa", None)
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        parse_wikitext.write_book_outputs(verses, "Sample", str(tmp_path), formats=["csv", "parquet"])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_book_is_rebuilt_when_any_recorded_artifact_is_missing(tmp_path):
+    import os
+    from dataset_shards import load_shard_index
+    from parse_wikitext import PARSER_VERSION, is_book_up_to_date, write_book_outputs
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    options = {"compression": "gzip", "shard_records": 2}
+    formats = ["csv", "html", "classification"]
+    paths = write_book_outputs(verses, "Sample", str(tmp_path), formats=formats, dataset_options=options)
+    entry = {"input_sha256": "abc", "parser_version": PARSER_VERSION, "formats": formats,
+             "dataset_options": options, "csv_path": paths["csv"], "artifact_paths": paths}
+
+    assert is_book_up_to_date(entry, "abc", formats, options)
+    assert not is_book_up_to_date(dict(entry, artifact_paths={}), "abc", formats, options)
+
+    shard = load_shard_index(paths["classification"])["shards"][1]["file"]
+    os.remove(tmp_path / shard)
+    assert not is_book_up_to_date(entry, "abc", formats, options)
+
+    write_book_outputs(verses, "Sample", str(tmp_path), formats=formats, dataset_options=options)
+    os.remove(paths["html"])
+    assert not is_book_up_to_date(entry, "abc", formats, options)
+
+
+def test_process_books_returns_structured_results_without_prompting(tmp_path, monkeypatch):
+    from parse_wikitext import process_books
+
+    wiki_dir = tmp_path / "wiki"
+    wiki_dir.mkdir()
+    (wiki_dir / "Sample.wikitext").write_text(SAMPLE_WIKITEXT, encoding="utf-8")
+    monkeypatch.setattr("builtins.input", lambda *args: pytest.fail("batch mode must not prompt"))
+
+    results = process_books(["sample", "missing"], output_root=str(tmp_path / "out"),
+                            formats=("csv", "training"), jobs=2, wikitext_dir=str(wiki_dir))
+
+    sample, missing = results
+    assert sample["status"] == "ok"
+    assert sample["verses"] == 4
+    assert sample["multi_source_verses"] == 1
+    assert sample["source_counts"] == {"P": 2, "J": 1, "R": 1, "E": 1}
+    assert sorted(sample["artifacts"]) == ["csv", "training"]
+    assert (tmp_path / "out" / "Sample" / "Sample.csv").exists()
+    assert set(sample["timings"]) == {"parse", "write", "total"}
+    assert missing["status"] == "missing"
+
+
+SECTIONED_WIKITEXT = """Legend {{font|color=#800080|purple}}
+==Introduction==
+
+{{font|1|size=smaller|color=#0000FF}}{{font|These be the words|color=#008800}}{{font| which Moses spake.|color=#800080}}
+
+== Historical Review ==
+{{font|1|size=smaller|color=#0000FF}}{{font|Ye have dwelt long enough|color=#000000}}
+{{font|size=smaller|color=#0000FF|2}}{{font|color=#880000| in this mount.}}
+===Subheading===
+{{font|size=smaller|color=#0000FF|3}} Plain law text.<ref>note</ref>
+"""
+
+
+def test_tokenize_wikitext_numbers_sections_and_reads_positional_templates():
+    verses = list(iter_verses(tokenize_wikitext(SECTIONED_WIKITEXT, plain_color="#800080")))
+
+    assert [(v['chapter'], v['verse'], v['section']) for v in verses] == [
+        ("1", "1", "Introduction"),
+        ("2", "1", "Historical Review"),
+        ("2", "2", "Historical Review"),
+        ("3", "3", "Subheading"),
+    ]
+    assert verses[0]['text'] == "These be the words which Moses spake."
+    assert verses[0]['color'] == ["#008800", "#800080"]
+    assert verses[0]['source'] == ["D", "D"]
+    assert verses[3]['text'] == "Plain law text."
+    # Without a plain colour, untemplated text is not a segment
+    assert len(list(iter_verses(tokenize_wikitext(SECTIONED_WIKITEXT)))) == 3
+
+
+def test_book_headings_other_than_chapters_are_ignored():
+    wikitext = SAMPLE_WIKITEXT + "\n== References ==\n{{font|size=smaller|color=#0000FF|3}}{{font|color=#888800| Tail.}}\n"
+
+    verses = list(iter_verses(tokenize_wikitext(wikitext)))
+
+    assert verses[-1]['chapter'] == "2"
+    assert verses[-1]['section'] is None
+
+
+def test_verse_text_index_finds_whole_verses_and_fragments():
+    from parse_wikitext import VerseTextIndex
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    index = VerseTextIndex(verses, "Sample")
+
+    assert index.references[index.find("and the EARTH, was void")] == ("Sample", "1", "2")
+    assert index.references[index.find("the earth")] == ("Sample", "1", "2")
+    # A quote running into the next verse resolves to the verse it starts in
+    assert index.references[index.find("was void. Thus the")] == ("Sample", "1", "2")
+    assert index.find("the ear") is None
+    assert index.find("") is None
+
+
+def test_label_verse_tokens_with_bio_sources():
+    from parse_wikitext import label_verse_tokens
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    verse = next(v for v in verses if (v['chapter'], v['verse']) == ('1', '2'))  # "And the earth was void."
+
+    token_spans, labels = label_verse_tokens(verse)
+    assert [verse['text'][start:end] for start, end in token_spans] == ["And", "the", "earth", "was", "void", "."]
+    assert labels == ["B-J", "I-J", "I-J", "B-R", "I-R", "I-R"]
+
+
+def test_sequence_dataset_covers_every_verse(tmp_path):
+    import json
+    from parse_wikitext import write_book_outputs
+
+    verses = list(iter_verses(tokenize_wikitext(SAMPLE_WIKITEXT)))
+    write_book_outputs(verses, "Sample", str(tmp_path), formats=["sequence"])
+
+    lines = (tmp_path / "Sample_sequence.jsonl").read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == len(verses)
+    for record in records:
+        assert len(record["tokens"]) == len(record["offsets"]) == len(record["labels"])
+        assert [record["text"][start:end] for start, end in record["offsets"]] == record["tokens"]
+    assert [record["metadata"]["is_multi_source"] for record in records] == \
+        [len(set(verse['source'])) > 1 for verse in verses]
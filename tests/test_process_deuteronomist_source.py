@@ -0,0 +1,68 @@
+from process_deuteronomist_source import DeuteronomistProcessor
+
+BOOK_WIKITEXT = """==Chapter 1==
+{{font|size=smaller|color=#0000FF|1}}{{font|color=#008800| These be the words which Moses spake.}}
+{{font|size=smaller|color=#0000FF|2}}{{font|color=#800080| Ye have dwelt long enough in this mount.}}
+"""
+
+SOURCE_WIKITEXT = """==Introduction==
+{{font|1|size=smaller|color=#0000FF}}{{font|These be the words which Moses spake.|color=#008800}}
+== Historical Review ==
+{{font|1|size=smaller|color=#0000FF}}{{font|Ye have dwelt long enough in this mount.|color=#800080}}
+{{font|2|size=smaller|color=#0000FF}}{{font|A verse found in no book.|color=#00FF88}}
+"""
+
+
+def test_process_all_sources_recovers_canonical_references(tmp_path):
+    wiki_dir = tmp_path / "wiki"
+    wiki_dir.mkdir()
+    (wiki_dir / "Deuteronomy.wikitext").write_text(BOOK_WIKITEXT, encoding="utf-8")
+    (wiki_dir / "Deuteronomist_source.wikitext").write_text(SOURCE_WIKITEXT, encoding="utf-8")
+    processor = DeuteronomistProcessor(str(wiki_dir), str(tmp_path / "out"))
+
+    results = processor.process_all_sources(jobs=2)
+    verses = processor.parse_deuteronomist_wikitext(wiki_dir / "Deuteronomist_source.wikitext")
+
+    assert results["total_verses"] == 3
+    assert results["sub_sources"] == {"Dtr2": 1, "Dtr1": 1, "Song_of_Moses": 1}
+    assert [(v.reference, v.chapter, v.verse, v.sub_source) for v in verses] == [
+        ("Deuteronomy 1:1", 1, 1, "Dtr2"),
+        ("Deuteronomy 1:2", 1, 2, "Dtr1"),
+        ("Deuteronomist source 2:2", 2, 2, "Song_of_Moses"),
+    ]
+    assert verses[1].section == "Historical Review"
+
+
+FRAGMENT_WIKITEXT = """==Part 1==
+===Preface===
+{{font|size=smaller|color=#0000FF|1}}{{font|color=#0000FF| These be the words}}
+{{font|size=smaller|color=#0000FF|2}}{{font|color=#0000FF| which Moses spake.}}
+===Horeb===
+{{font|size=smaller|color=#0000FF|1}}{{font|color=#0000FF| Ye have dwelt long enough in this mount.}}
+{{font|size=smaller|color=#0000FF|2}}{{font|color=#0000FF| A verse found in no book.}}
+"""
+
+
+def test_convert_verses_resolves_fragments_and_gives_unique_ids(tmp_path):
+    wiki_dir = tmp_path / "wiki"
+    wiki_dir.mkdir()
+    (wiki_dir / "Deuteronomy.wikitext").write_text(BOOK_WIKITEXT, encoding="utf-8")
+    source_path = wiki_dir / "First_Deuteronomist_Version.wikitext"
+    source_path.write_text(FRAGMENT_WIKITEXT, encoding="utf-8")
+    processor = DeuteronomistProcessor(str(wiki_dir), str(tmp_path / "out"))
+
+    verses = processor.parse_deuteronomist_wikitext(source_path)
+    documents = processor.create_vector_db_documents(verses)
+
+    assert [(v.reference, v.section, v.metadata["part"]) for v in verses] == [
+        ("Deuteronomy 1:1", "Preface", 1),
+        ("Deuteronomy 1:1", "Preface", 2),
+        ("Deuteronomy 1:2", "Horeb", 1),
+        ("First Deuteronomist Version 3:2", "Horeb", 1),
+    ]
+    assert [doc["id"] for doc in documents] == [
+        "deuteronomist_First_Deuteronomist_Version_Deuteronomy_1_1",
+        "deuteronomist_First_Deuteronomist_Version_Deuteronomy_1_1_2",
+        "deuteronomist_First_Deuteronomist_Version_Deuteronomy_1_2",
+        "deuteronomist_First_Deuteronomist_Version_First_Deuteronomist_Version_3_2",
+    ]
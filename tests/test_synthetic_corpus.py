@@ -0,0 +1,22 @@
+from benchmarks.synthetic_corpus import book_names, generate_book_wikitext, generate_corpus
+from parse_wikitext import parse_wikitext_file
+
+
+def test_generate_corpus_writes_parseable_books_and_csvs(tmp_path):
+    names = generate_corpus(str(tmp_path), books=2, chapters=3, verses_per_chapter=4)
+
+    assert names == ["Genesis", "Exodus"]
+    for book_name in names:
+        verses = parse_wikitext_file(str(tmp_path / "wiki_markdown" / f"{book_name}.wikitext"))
+        assert len(verses) == 12
+        assert (tmp_path / "output" / book_name / f"{book_name}.csv").exists()
+    assert "<small>" in (tmp_path / "wiki_markdown" / "Exodus.wikitext").read_text(encoding="utf-8")
+
+
+def test_synthetic_books_are_deterministic_and_scale_past_the_canon():
+    assert generate_book_wikitext("Genesis", seed=1) == generate_book_wikitext("Genesis", seed=1)
+    assert generate_book_wikitext("Genesis", seed=1) != generate_book_wikitext("Genesis", seed=2)
+    names = book_names(70)
+    assert names[65] == "Revelation"
+    assert names[66] == "Genesis_2"
+    assert len(set(names)) == 70
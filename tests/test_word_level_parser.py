@@ -0,0 +1,47 @@
+from kjv_sources.word_features import word_properties
+from word_level_parser import WordLevelParser
+
+WORD_LEVEL_TEXT = """GENESIS
+Chapter 1
+1
+In
+the
+beginning
+2
+And
+the
+earth
+"""
+
+
+def test_parsed_words_build_mathematical_properties_on_access(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text(WORD_LEVEL_TEXT, encoding="utf-8")
+    parser = WordLevelParser(str(tmp_path))
+
+    words = parser.parse_word_level_file(str(path))
+
+    assert [(word.word, word.verse, word.position_global) for word in words[2:4]] == [
+        ("beginning", 1, 2), ("And", 2, 3),
+    ]
+    assert [word.mathematical_properties for word in words] == \
+        [word_properties(word.word_length, position) for position, word in enumerate(words)]
+    assert all(word._mathematical_properties is None for word in words)
+
+    words[0].mathematical_properties = {"position": -1}
+    assert words[0].mathematical_properties == {"position": -1}
+
+
+def test_words_keep_the_properties_of_their_own_parse(tmp_path):
+    first_path = tmp_path / "first.txt"
+    first_path.write_text(WORD_LEVEL_TEXT, encoding="utf-8")
+    second_path = tmp_path / "second.txt"
+    second_path.write_text("EXODUS\nChapter 1\n1\nNow\n", encoding="utf-8")
+    parser = WordLevelParser(str(tmp_path))
+
+    first_words = parser.parse_word_level_file(str(first_path))
+    second_words = parser.parse_word_level_file(str(second_path))
+
+    assert first_words[0].mathematical_properties["word_length"] == 2
+    assert first_words[5].mathematical_properties == word_properties(5, 5)
+    assert second_words[0].mathematical_properties == word_properties(3, 0)
@@ -11,6 +11,7 @@ License: MIT
 """
 
 import os
+import sys
 import json
 import logging
 from typing import List, Dict, Any, Optional
@@ -29,6 +30,13 @@ from word_level_parser import WordLevelParser, WordData
 from mathematical_pattern_engine import MathematicalPatternEngine, WordPattern, GlobalAnalysis
 from csv_data_loader import CSVDataLoader
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources.corpus import get_corpus
+from kjv_sources.snapshot import CorpusSnapshot
+from kjv_sources.sqlite_store import open_database
+from kjv_sources.verse_index import get_verse_index
+from kjv_sources.word_export import iter_words, word_export_path
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -61,6 +69,9 @@ except Exception as e:
 word_parser = None
 pattern_engine = None
 word_data = []
+word_export_file = None
+corpus = None
+verse_db = None
 
 # Pydantic models for API responses
 class WordResponse(BaseModel):
@@ -129,10 +140,32 @@ class VerseResponse(BaseModel):
     text_R: str
     mathematical_properties: Dict[str, Any]
 
+class TextSearchResult(BaseModel):
+    verse_id: str
+    canonical_reference: str
+    text_full: str
+    snippet: str
+    sources: List[str]
+    primary_source: str
+
+class TextSearchResponse(BaseModel):
+    query: str
+    results: List[TextSearchResult]
+    total_results: int
+    search_time_ms: float
+
+def iter_loaded_words():
+    """Loaded words, else the words of the word export read chunk by chunk; None if neither"""
+    if word_data:
+        return iter(word_data)
+    if word_export_file:
+        return iter_words(word_export_file)
+    return None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the API on startup"""
-    global word_parser, pattern_engine, word_data
+    global word_parser, pattern_engine, word_data, word_export_file, corpus, verse_db
     
     logger.info("Starting KJV Sources Mathematical Analysis API...")
     
@@ -142,6 +175,23 @@ async def startup_event():
     # Load sample data or initialize empty
     word_data = []
     
+    # Word search streams the word export until /api/load-data loads the words
+    if os.path.exists(word_export_path("output")):
+        word_export_file = word_export_path("output")
+        logger.info(f"Serving words from {word_export_file} until /api/load-data is called")
+    
+    # Verse tables: workers map the same corpus snapshot when one is current
+    corpus = get_corpus("output")
+    if isinstance(corpus, CorpusSnapshot):
+        logger.info(f"Mapped corpus snapshot {corpus.path} ({len(corpus)} verses)")
+    else:
+        logger.info(f"Loaded {len(corpus)} verses from CSV; run 'python kjv_cli.py snapshot' to map them instead")
+    
+    # Full-text search: the embedded SQLite database, when it has been built
+    verse_db = open_database("output")
+    if verse_db is None:
+        logger.info("No SQLite verse database; run 'python kjv_cli.py database' to enable /api/search-text")
+    
     logger.info("API initialized successfully")
 
 @app.get("/", response_class=HTMLResponse)
@@ -238,7 +288,9 @@ async def health_check():
         "components": {
             "word_parser": word_parser is not None,
             "pattern_engine": pattern_engine is not None,
-            "word_data_loaded": len(word_data) > 0
+            "word_data_loaded": len(word_data) > 0,
+            "word_export": word_export_file is not None,
+            "verse_database": verse_db is not None
         }
     }
 
@@ -252,14 +304,15 @@ async def search_bible(
     import time
     start_time = time.time()
     
-    if not word_data:
+    words = iter_loaded_words()
+    if words is None:
         raise HTTPException(status_code=503, detail="No Bible data loaded")
     
     # Simple search implementation
     query_lower = q.lower()
     results = []
     
-    for word in word_data:
+    for word in words:
         if query_lower in word.word.lower():
             results.append(WordResponse(
                 word=word.word,
@@ -318,6 +371,41 @@ async def search_bible(
         search_time_ms=search_time
     )
 
+@app.get("/api/search-text", response_model=TextSearchResponse)
+async def search_text(
+    q: str = Query(..., description="Words that must all appear in the verse"),
+    limit: int = Query(20, description="Maximum number of results"),
+    book: Optional[str] = Query(None, description="Filter by book"),
+    source: Optional[str] = Query(None, description="Filter by source (J, E, P, R)")
+):
+    """Full-text search of verse text in the SQLite verse database"""
+    import time
+    start_time = time.time()
+    
+    if verse_db is None:
+        raise HTTPException(status_code=503, detail="No verse database; run 'python kjv_cli.py database'")
+    
+    verses = verse_db.search(q, limit=limit, book=book.title() if book else None,
+                             source=source.upper() if source else None)
+    results = [
+        TextSearchResult(
+            verse_id=verse["verse_id"],
+            canonical_reference=verse["canonical_reference"],
+            text_full=verse["full_text"],
+            snippet=verse["snippet"],
+            sources=verse["sources"],
+            primary_source=verse["primary_source"]
+        )
+        for verse in verses
+    ]
+    
+    return TextSearchResponse(
+        query=q,
+        results=results,
+        total_results=len(results),
+        search_time_ms=(time.time() - start_time) * 1000
+    )
+
 @app.get("/api/patterns/{word}", response_model=PatternResponse)
 async def get_word_patterns(word: str):
     """Get mathematical patterns for a specific word"""
@@ -352,13 +440,14 @@ async def get_word_patterns(word: str):
 @app.get("/api/chapter/{book}/{chapter}")
 async def get_chapter(book: str, chapter: int):
     """Get complete chapter data with word-level analysis"""
-    if not word_data:
+    words = iter_loaded_words()
+    if words is None:
         raise HTTPException(status_code=503, detail="No Bible data loaded")
     
     try:
         # Filter words for the specified book and chapter
         chapter_words = [
-            word for word in word_data 
+            word for word in words 
             if word.book.lower() == book.lower() and word.chapter == chapter
         ]
         
@@ -421,30 +510,58 @@ async def get_chapter(book: str, chapter: int):
         logger.error(f"Error getting chapter {book} {chapter}: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving chapter: {str(e)}")
 
+@app.get("/api/chapter-html/{book}/{chapter}", response_class=HTMLResponse)
+async def get_chapter_html(book: str, chapter: int):
+    """Get the pre-rendered, source-coloured HTML fragment of a single chapter"""
+    book_name = book.title()
+    fragment_path = Path("output") / book_name / "chapters" / f"{book_name}_{chapter}.html"
+    
+    if not book_name.isalpha() or not fragment_path.exists():
+        raise HTTPException(
+            status_code=404,
+            detail=f"No chapter fragment for {book} Chapter {chapter}; "
+                   f"run 'python parse_wikitext.py pipeline --split-html' to generate them"
+        )
+    
+    return HTMLResponse(fragment_path.read_text(encoding="utf-8"))
+
 @app.get("/api/verse/{reference}", response_model=VerseResponse)
 async def get_verse(reference: str):
     """Get verse data with source attribution"""
-    # This would integrate with your existing CSV data
-    # For now, return a sample response
+    if corpus is None or not len(corpus):
+        raise HTTPException(status_code=503, detail="No Bible data loaded")
+    
+    verse_index = get_verse_index()
+    try:
+        verse_id = verse_index.parse(reference)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid verse reference: {reference}")
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Verse not found: {reference}")
+    row_number = corpus.find(*verse_index.reference(verse_id))
+    if row_number is None:
+        raise HTTPException(status_code=404, detail=f"Verse not found: {reference}")
+    
+    row = corpus.row(row_number)
     return VerseResponse(
-        verse_id="Gen.1.1",
-        canonical_reference="Genesis 1:1",
-        text_full="In the beginning God created the heaven and the earth.",
-        word_count=10,
-        sources=["J", "P"],
-        source_count=2,
-        primary_source="J",
-        source_sequence="J-P",
-        source_percentages={"J": 0.6, "P": 0.4},
-        redaction_indicators=["editorial"],
-        text_J="In the beginning God created",
-        text_E="",
-        text_P="the heaven and the earth.",
-        text_R="",
+        verse_id=row["verse_id"],
+        canonical_reference=row["canonical_reference"],
+        text_full=row["full_text"],
+        word_count=row["word_count"],
+        sources=row["sources"],
+        source_count=row["source_count"],
+        primary_source=row["primary_source"],
+        source_sequence="->".join(row["source_sequence"]),
+        source_percentages=corpus.percentages(row_number),
+        redaction_indicators=row["redaction_indicators"],
+        text_J=row["text_J"],
+        text_E=row["text_E"],
+        text_P=row["text_P"],
+        text_R=row["text_R"],
         mathematical_properties={
-            "word_count": 10,
-            "is_sevened": False,
-            "position_in_bible": 1
+            "word_count": row["word_count"],
+            "is_sevened": row["word_count"] % 7 == 0,
+            "position_in_bible": verse_id + 1
         }
     )
 
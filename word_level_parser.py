@@ -11,14 +11,21 @@ License: MIT
 """
 
 import os
+import sys
 import re
 import json
 import csv
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict, Counter
+from pathlib import Path
 import logging
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from kjv_sources import word_features
+from kjv_sources.word_export import EXPORT_CHUNK_SIZE, write_words
+from kjv_sources.word_features import WordFeatures
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,6 +50,26 @@ class WordData:
     source_attribution: List[str]  # J, E, P, R if applicable
     mathematical_properties: Dict[str, Any]
 
+@dataclass
+class ParsedWordData(WordData):
+    """WordData of a parsed file.
+
+    Unless one is assigned, mathematical_properties is built each time it
+    is read from the feature columns of the parse that produced the word,
+    so parsing does not create a properties dict for every word.
+    """
+    features: Optional[WordFeatures] = field(default=None, repr=False, compare=False)
+
+    @property
+    def mathematical_properties(self) -> Dict[str, Any]:
+        if self._mathematical_properties is None:
+            return self.features.properties(self.position_global)
+        return self._mathematical_properties
+
+    @mathematical_properties.setter
+    def mathematical_properties(self, properties: Optional[Dict[str, Any]]) -> None:
+        self._mathematical_properties = properties
+
 class WordLevelParser:
     """Parser for word-level analysis of KJV Bible text"""
     
@@ -52,6 +79,7 @@ class WordLevelParser:
         self.word_positions: Dict[str, List[int]] = defaultdict(list)
         self.book_positions: Dict[str, List[int]] = defaultdict(list)
         self.verse_positions: Dict[str, List[int]] = defaultdict(list)
+        self.features: Optional[WordFeatures] = None
         
         # Common proper names in the Bible
         self.proper_names = {
@@ -68,6 +96,8 @@ class WordLevelParser:
             'Thomas', 'Andrew', 'Simon', 'Judas', 'Mary', 'Elizabeth', 'Anna',
             'Zacharias', 'John', 'Herod', 'Pilate', 'Caiaphas', 'Annas', 'Gamaliel'
         }
+        # Lowercased once for _is_proper_name; rebuild after changing proper_names
+        self._proper_names_lower = {name.lower() for name in self.proper_names}
         
         # Book names mapping
         self.book_names = {
@@ -142,7 +172,7 @@ class WordLevelParser:
                 
                 # Process regular word
                 if current_book and current_chapter and current_verse:
-                    word_data = WordData(
+                    word_data = ParsedWordData(
                         word=line,
                         position_global=current_position,
                         position_in_verse=word_in_verse,
@@ -158,7 +188,7 @@ class WordLevelParser:
                         is_number=line.isdigit(),
                         is_proper_name=self._is_proper_name(line),
                         source_attribution=[],  # Will be populated later
-                        mathematical_properties=self._calculate_mathematical_properties(line, current_position)
+                        mathematical_properties=None,  # Built on access from the features below
                     )
                     
                     words.append(word_data)
@@ -173,6 +203,14 @@ class WordLevelParser:
                     word_in_chapter += 1
                     word_in_book += 1
         
+        # Numeric properties as columns; words read theirs by position_global,
+        # which counts words from 0, so the positions are a range. Each word
+        # keeps the columns of its own parse, which a later parse replaces
+        # on the parser.
+        self.features = WordFeatures([word_data.word_length for word_data in words], range(len(words)))
+        for word_data in words:
+            word_data.features = self.features
+        
         self.words = words
         logger.info(f"Parsed {len(words)} words from {file_path}")
         return words
@@ -209,7 +247,7 @@ class WordLevelParser:
         clean_word = re.sub(r'[^\w]', '', word)
         
         # Check against known proper names
-        if clean_word.lower() in {name.lower() for name in self.proper_names}:
+        if clean_word.lower() in self._proper_names_lower:
             return True
         
         # Check capitalization pattern
@@ -220,48 +258,19 @@ class WordLevelParser:
     
     def _calculate_mathematical_properties(self, word: str, position: int) -> Dict[str, Any]:
         """Calculate mathematical properties for a word"""
-        return {
-            'position': position,
-            'word_length': len(word),
-            'is_sevened': len(word) % 7 == 0,
-            'is_77': len(word) == 77,
-            'is_777': len(word) == 777,
-            'is_70x7': len(word) == 490,
-            'position_mod_7': position % 7,
-            'position_mod_77': position % 77,
-            'position_mod_777': position % 777,
-            'is_prime_length': self._is_prime(len(word)),
-            'is_perfect_square_length': self._is_perfect_square(len(word)),
-            'is_fibonacci_length': self._is_fibonacci(len(word))
-        }
+        return word_features.word_properties(len(word), position)
     
     def _is_prime(self, n: int) -> bool:
         """Check if number is prime"""
-        if n < 2:
-            return False
-        for i in range(2, int(n ** 0.5) + 1):
-            if n % i == 0:
-                return False
-        return True
+        return word_features.is_prime(n)
     
     def _is_perfect_square(self, n: int) -> bool:
         """Check if number is a perfect square"""
-        root = int(n ** 0.5)
-        return root * root == n
+        return word_features.is_perfect_square(n)
     
     def _is_fibonacci(self, n: int) -> bool:
         """Check if number is in Fibonacci sequence"""
-        if n < 0:
-            return False
-        if n == 0 or n == 1:
-            return True
-        
-        a, b = 0, 1
-        while b <= n:
-            if b == n:
-                return True
-            a, b = b, a + b
-        return False
+        return word_features.is_fibonacci(n)
     
     def save_word_data(self, output_file: str = None):
         """Save word data to CSV file"""
@@ -301,6 +310,13 @@ class WordLevelParser:
         
         logger.info(f"Saved word data to {output_file}")
     
+    def export_word_data(self, output_file: str, format: Optional[str] = None,
+                         chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+        """Stream the parsed words to an NDJSON or Parquet export"""
+        count = write_words(self.words, output_file, format=format, chunk_size=chunk_size)
+        logger.info(f"Exported {count} words to {output_file}")
+        return count
+    
     def get_word_statistics(self) -> Dict[str, Any]:
         """Get comprehensive word statistics"""
         if not self.words: